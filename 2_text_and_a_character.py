@@ -1,31 +1,35 @@
-from packages import get_path_list, get_framebbox, get_textbbox,calc_stats,plot_bounded_obj_num,get_bboxs_inside_frame, get_facebbox, draw_bbox_and_show, classify_face_text_layout, plot_layout
+from packages import get_path_list, get_bboxs_inside_frame, classify_face_text_layout, plot_layout, read_xml_annotation
+import numpy as np
 #吹き出し2つとキャラ1人の場合の位置関係の調査
 if __name__ == "__main__":
     framebboxs_num = 0
-    count = 0
-    bounded_text_bboxs_num = []
-    bounded_face_bboxs_num = []
-    face_text_layout = []
-    all_path = get_path_list.get_path_list()
-    for path in all_path:
-        frame_bboxs = get_framebbox.get_framebbox(path)
-        face_bboxs = get_facebbox.get_facebbox(path)
-        text_bboxs = get_textbbox.get_textbbox(path)
-        for index in frame_bboxs.keys():
-            for frame_bbox in frame_bboxs[index]:
-                framebboxs_num += 1
-                bouded_text_bboxs = get_bboxs_inside_frame.get_bboxs_inside_frame(frame_bbox, text_bboxs[index])
-                bounded_face_bboxs = get_bboxs_inside_frame.get_bboxs_inside_frame(frame_bbox, face_bboxs[index])
-                # 吹き出し2つとキャラ1人の場合
-                if len(bouded_text_bboxs) == 2:
-                    if len(bounded_face_bboxs) == 1:
-                        count += 1
-                        # print(bouded_text_bboxs)
-                        # print(bounded_face_bboxs)
-                        # draw_bbox_and_show.draw_bbox_and_show(path, index, frame_bbox, bouded_text_bboxs)
-                        # draw_bbox_and_show.draw_bbox_and_show(path, index, frame_bbox, bounded_face_bboxs)
-                        # print(classify_face_text_layout.classify_face_text_layout(bounded_face_bboxs[0], bouded_text_bboxs))
-                        face_text_layout.append(classify_face_text_layout.classify_face_text_layout(bounded_face_bboxs[0], bouded_text_bboxs))
+    # 全ページのコマ × テキスト・顔の組（コマの番号は全ページの通し番号）
+    pair_frames = []
+    pair_center_x = []
+    pair_is_face = []
+    for path in get_path_list.get_path_list():
+        pages = read_xml_annotation.read_xml_annotation(path)
+        for index, page in pages.items():
+            # コマ × テキスト・顔の包含判定をページ単位で一括計算
+            text_inside = get_bboxs_inside_frame.assign_bboxs_to_frames(page["frame"].boxes, page["text"].boxes)
+            face_inside = get_bboxs_inside_frame.assign_bboxs_to_frames(page["frame"].boxes, page["face"].boxes)
+            for inside, boxes, is_face in ((text_inside, page["text"].boxes, False), (face_inside, page["face"].boxes, True)):
+                frame_indices, object_indices = np.nonzero(inside)
+                pair_frames.append(frame_indices + framebboxs_num)
+                pair_center_x.append((boxes[object_indices, 0].astype(np.float64) + boxes[object_indices, 2]) / 2)
+                pair_is_face.append(np.full(len(frame_indices), is_face))
+            framebboxs_num += len(page["frame"])
+    # 全コマの配置をまとめて求め、吹き出し2つとキャラ1人の場合を選ぶ
+    # （配置の文字ではなく個数で選ぶ。左右を決められないコマは「不明な配置」になる）
+    pair_frames = np.concatenate(pair_frames)
+    pair_is_face = np.concatenate(pair_is_face)
+    frames, layouts = classify_face_text_layout.classify_face_text_layouts(
+        pair_frames, np.concatenate(pair_center_x), pair_is_face)
+    rows = np.searchsorted(frames, pair_frames)
+    face_counts = np.bincount(rows[pair_is_face], minlength=len(frames))
+    text_counts = np.bincount(rows[~pair_is_face], minlength=len(frames))
+    face_text_layout = layouts[(text_counts == 2) & (face_counts == 1)].tolist()
+    count = len(face_text_layout)
     percent = count/framebboxs_num * 100
     print(f'吹き出し2つとキャラ1人の場合の全体に占める割合: {percent}%')
-    plot_layout.plot_layout(face_text_layout,'コマ内キャラクタと吹き出しの位置関係', 'layout')
\ No newline at end of file
+    plot_layout.plot_layout(face_text_layout,'コマ内キャラクタと吹き出しの位置関係', 'layout')
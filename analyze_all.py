@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 統計一括分析スクリプト
+
+フレーム、キャラクター（body）、オノマトペ、吹き出し（セグメンテーション・
+バウンディングボックス・個数）の統計と、タイトル別・カテゴリ別の統計を
+1回のデータセット走査でまとめて計算し、
+statistics/ 以下にすべてのレポート・CSV・グラフを出力します。
+"""
+
+import sys
+import os
+import argparse
+
+# packagesディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
+
+# import するとコレクターが登録される（登録順に保存される）
+import packages.plot_frame_stats
+import packages.plot_body_stats
+import packages.plot_onomatopeia_stats
+import packages.plot_onomatopoeia_body_stats
+import packages.plot_balloon_size_ratio
+import packages.plot_balloon_bbox_ratio
+import packages.plot_balloon_count_stats
+import packages.plot_grouped_stats
+from packages.metric_collectors import REGISTERED_COLLECTORS, run_collectors
+from packages.incremental_collectors import run_collectors_incremental
+from packages.per_image_table import PerImageTableCollector, TABLE_FORMATS
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots, FigureRenderPool
+from packages.run_profile import enable_profiling, save_run_profile
+
+
+def main():
+    """メイン実行関数"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help='グラフ描画に使うプロセス数（既定: 1 = 逐次処理）。2以上では次の分析と並行して描画する')
+    parser.add_argument('--incremental', action='store_true',
+                        help='タイトルごとの部分集計をキャッシュし、内容が変わったJSONだけを集計し直す')
+    parser.add_argument('--per-image-table', choices=TABLE_FORMATS,
+                        help='全カテゴリの画像ごとの集計を1つの表として保存する形式（arrow / parquet は pyarrow が必要）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    parser.add_argument('--profile', action='store_true',
+                        help='読み込み・集計・レポート・描画の段階ごとの処理時間と RSS を statistics/run_profile.json に保存する')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='--profile に加えて tracemalloc で段階ごとのメモリ確保のピークを記録する（処理は遅くなる）')
+    args = parser.parse_args()
+
+    # 段階ごとの計測（指定しない場合は何も記録しない）
+    if args.profile or args.profile_memory:
+        enable_profiling(trace_memory=args.profile_memory)
+
+    # バッチ実行なので非対話の Agg バックエンドで描画する（ウィンドウを開かない。--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+
+    # アノテーションディレクトリのパス
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./statistics/"  # 結果の保存先
+
+    # ディレクトリが存在するかチェック
+    if not os.path.exists(annotations_dir):
+        print(f"Error: Annotations directory not found: {annotations_dir}")
+        print("Please check the path to your JSON annotation files.")
+        return
+
+    # JSONファイルが存在するかチェック
+    import glob
+    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+    if not json_files:
+        print(f"Error: No JSON files found in: {annotations_dir}")
+        print("Please check that JSON annotation files exist in the specified directory.")
+        return
+
+    # 出力ディレクトリを作成
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Found {len(json_files)} JSON files in {annotations_dir}")
+    print("Starting all analyses...")
+    collector_classes = list(REGISTERED_COLLECTORS)
+    if args.per_image_table:
+        PerImageTableCollector.table_format = args.per_image_table
+        collector_classes.append(PerImageTableCollector)
+    print("Collectors: " + ", ".join(collector.name for collector in collector_classes))
+
+    try:
+        # グラフは描画プールで描き、その間に次のコレクターのレポートを保存する
+        with FigureRenderPool(args.render_workers) as render_pool:
+            if args.incremental:
+                # 変更されたタイトルだけを読み込み・集計し、他のタイトルはキャッシュした部分集計を使う
+                run_collectors_incremental(annotations_dir, collector_classes, output_dir,
+                                           render_pool, workers=args.workers)
+            else:
+                # JSONは1回だけ読み込み、アノテーションも1回だけ走査する
+                dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+                run_collectors(dataset, collector_classes, output_dir, render_pool)
+
+        print("\n" + "="*60)
+        print("All analyses completed successfully!")
+        print("="*60)
+        print(f"Results saved in: {output_dir}")
+        print("\nGenerated files:")
+        for file_name in sorted(os.listdir(output_dir)):
+            if file_name.endswith(('.txt', '.csv', '.png', '.arrow', '.parquet')):
+                print(f"  - {file_name}")
+
+    except Exception as e:
+        print(f"Error during analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+    # 段階ごとの計測結果を出力と同じディレクトリに保存する（失敗した場合もそこまでの記録を残す）
+    save_run_profile(output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,32 @@ Manga109 吹き出しバウンディングボックスサイズ分析スクリ
 
 import sys
 import os
+import argparse
 
 # packagesディレクトリをパスに追加
 sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
 
 from packages.plot_balloon_bbox_ratio import plot_balloon_bbox_ratio
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots
 
 
 def main():
     """メイン実行関数"""
     
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    args = parser.parse_args()
+    
+    # バッチ実行なので非対話の Agg バックエンドで描画する（ウィンドウを開かない。--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+    
     # アノテーションディレクトリのパス
     annotations_dir = "./../annotations/"  # JSONファイルがあるディレクトリ
     output_dir = "./statistics/"  # 結果の保存先
@@ -41,8 +57,11 @@ def main():
     print("Starting balloon bounding box size ratio analysis...")
     
     try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+        
         # 分析実行
-        plot_balloon_bbox_ratio(annotations_dir, output_dir)
+        plot_balloon_bbox_ratio(dataset, output_dir)
         print("\nBounding box analysis completed successfully!")
         print(f"Results saved in: {output_dir}")
         
@@ -9,6 +9,7 @@ Manga109 吹き出し総合分析スクリプト
 
 import sys
 import os
+import argparse
 
 # packagesディレクトリをパスに追加
 sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
@@ -16,11 +17,37 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
 from packages.plot_balloon_size_ratio import plot_balloon_size_ratio
 from packages.plot_balloon_bbox_ratio import plot_balloon_bbox_ratio
 from packages.plot_balloon_count_stats import plot_balloon_count_stats
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots, FigureRenderPool
+from packages.run_profile import enable_profiling, save_run_profile
 
 
 def main():
     """メイン実行関数"""
     
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help='グラフ描画に使うプロセス数（既定: 1 = 逐次処理）。2以上では次の分析と並行して描画する')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    parser.add_argument('--profile', action='store_true',
+                        help='読み込み・集計・レポート・描画の段階ごとの処理時間と RSS を statistics/run_profile.json に保存する')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='--profile に加えて tracemalloc で段階ごとのメモリ確保のピークを記録する（処理は遅くなる）')
+    args = parser.parse_args()
+    
+    # 段階ごとの計測（指定しない場合は何も記録しない）
+    if args.profile or args.profile_memory:
+        enable_profiling(trace_memory=args.profile_memory)
+    
+    # バッチ実行なので非対話の Agg バックエンドで描画する（ウィンドウを開かない。--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+    
     # アノテーションディレクトリのパス
     annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
     output_dir = "./statistics/"  # 結果の保存先
@@ -43,23 +70,28 @@ def main():
     print("Starting comprehensive balloon analysis...")
     
     try:
-        # 1. セグメンテーションマスクベースの分析
-        print("\n" + "="*60)
-        print("1. Segmentation Mask-based Analysis")
-        print("="*60)
-        plot_balloon_size_ratio(annotations_dir, output_dir)
+        # JSONは最初に1回だけ読み込み、各分析で共有する
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
         
-        # 2. バウンディングボックスベースの分析
-        print("\n" + "="*60)
-        print("2. Bounding Box-based Analysis")
-        print("="*60)
-        plot_balloon_bbox_ratio(annotations_dir, output_dir)
-        
-        # 3. 1画像中の吹き出し個数統計
-        print("\n" + "="*60)
-        print("3. Balloon Count Statistics per Image")
-        print("="*60)
-        plot_balloon_count_stats(annotations_dir, output_dir)
+        # グラフは描画プールで描き、その間に次の分析の集計を進める（with を抜けるときに描画完了を待つ）
+        with FigureRenderPool(args.render_workers) as render_pool:
+            # 1. セグメンテーションマスクベースの分析
+            print("\n" + "="*60)
+            print("1. Segmentation Mask-based Analysis")
+            print("="*60)
+            plot_balloon_size_ratio(dataset, output_dir, render_pool)
+            
+            # 2. バウンディングボックスベースの分析
+            print("\n" + "="*60)
+            print("2. Bounding Box-based Analysis")
+            print("="*60)
+            plot_balloon_bbox_ratio(dataset, output_dir, render_pool)
+            
+            # 3. 1画像中の吹き出し個数統計
+            print("\n" + "="*60)
+            print("3. Balloon Count Statistics per Image")
+            print("="*60)
+            plot_balloon_count_stats(dataset, output_dir, render_pool)
         
         print("\n" + "="*60)
         print("All analyses completed successfully!")
@@ -87,6 +119,9 @@ def main():
         print(f"Error during analysis: {str(e)}")
         import traceback
         traceback.print_exc()
+    
+    # 段階ごとの計測結果を出力と同じディレクトリに保存する（失敗した場合もそこまでの記録を残す）
+    save_run_profile(output_dir)
 
 
 if __name__ == "__main__":
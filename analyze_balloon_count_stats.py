@@ -9,16 +9,32 @@ Manga109 1画像中の吹き出し個数統計分析スクリプト
 
 import sys
 import os
+import argparse
 
 # packagesディレクトリをパスに追加
 sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
 
 from packages.plot_balloon_count_stats import plot_balloon_count_stats
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots
 
 
 def main():
     """メイン実行関数"""
     
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    args = parser.parse_args()
+    
+    # バッチ実行なので非対話の Agg バックエンドで描画する（ウィンドウを開かない。--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+    
     # アノテーションディレクトリのパス
     annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
     output_dir = "./statistics/"  # 結果の保存先
@@ -41,8 +57,11 @@ def main():
     print("Starting balloon count statistics analysis...")
     
     try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+        
         # 分析実行
-        plot_balloon_count_stats(annotations_dir, output_dir)
+        plot_balloon_count_stats(dataset, output_dir)
         print("\nBalloon count statistics analysis completed successfully!")
         print(f"Results saved in: {output_dir}")
         
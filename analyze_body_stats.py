@@ -9,17 +9,24 @@ Manga109 キャラクター（body）統計分析スクリプト
 
 import sys
 import os
+import argparse
 import glob
 
 # packagesディレクトリをパスに追加
 sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
 
 from packages.plot_body_stats import plot_body_stats
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
 
 
 def main():
     """メイン実行関数"""
     
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    args = parser.parse_args()
+    
     # アノテーションディレクトリのパス
     annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
     output_dir = "./statistics/"  # 結果の保存先
@@ -41,8 +48,11 @@ def main():
     print("Starting body (character) statistics analysis...")
     
     try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+        
         # キャラクター分析実行
-        plot_body_stats(annotations_dir, output_dir)
+        plot_body_stats(dataset, output_dir)
         
         print("\n" + "="*60)
         print("Body (character) statistics analysis completed successfully!")
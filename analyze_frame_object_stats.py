@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 コマ内オブジェクト数分析スクリプト（JSON 版）
+
+このスクリプトは、Manga109データセットのアノテーションJSONファイルから
+吹き出し・body・face・text・オノマトペをそれを含むコマ（id=1）に割り当て、
+コマごとのオブジェクト数を分析します。
+- コマごとのカテゴリ別の個数（CSV）
+- コマ内のオブジェクト数の統計
+- コマ内のオブジェクト数の分布（全カテゴリ・カテゴリごと）
+"""
+
+import sys
+import os
+import argparse
+import glob
+
+# packagesディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
+
+from packages.plot_frame_object_stats import plot_frame_object_stats
+from packages.rle_frame_containment import DEFAULT_OVERLAP_THRESHOLD
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots
+from packages.run_profile import enable_profiling, save_run_profile
+
+
+def main():
+    """メイン実行関数"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_OVERLAP_THRESHOLD,
+                        help=f'オブジェクト面積のうちコマと重なる割合の閾値（既定: {DEFAULT_OVERLAP_THRESHOLD}）')
+    parser.add_argument('--bbox', action='store_true',
+                        help='セグメンテーションではなくバウンディングボックスの重なりで判定する（XML 版と同じ判定）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    parser.add_argument('--profile', action='store_true',
+                        help='読み込み・包含判定・描画の段階ごとの処理時間と RSS を statistics/run_profile.json に保存する')
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling()
+
+    # バッチ実行なので非対話の Agg バックエンドで描画する（--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+
+    # アノテーションディレクトリのパス
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./statistics/"  # 結果の保存先
+
+    # ディレクトリが存在するかチェック
+    if not os.path.exists(annotations_dir):
+        print(f"Error: Annotations directory not found: {annotations_dir}")
+        print("Please check the path to your JSON annotation files.")
+        return
+
+    # JSONファイルが存在するかチェック
+    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+    if not json_files:
+        print(f"Error: No JSON files found in: {annotations_dir}")
+        print("Please check that JSON annotation files exist in the specified directory.")
+        return
+
+    print(f"Found {len(json_files)} JSON files in {annotations_dir}")
+    print("Starting objects-per-frame analysis...")
+
+    try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+
+        # コマ内オブジェクト数の分析実行
+        plot_frame_object_stats(dataset, output_dir, threshold=args.threshold, use_masks=not args.bbox)
+
+        print("\n" + "="*60)
+        print("Objects-per-frame analysis completed successfully!")
+        print("="*60)
+        print(f"Results saved in: {output_dir}")
+        print("\nGenerated files:")
+        print("  - frame_object_statistics.txt (English)")
+        print("  - frame_object_statistics_jp.txt (Japanese)")
+        print("  - frame_object_counts.csv (Per-frame object counts)")
+        if not args.no_plots:
+            print("  - frame_object_num.png, frame_<category>_num.png (Count distributions)")
+
+    except Exception as e:
+        print(f"Error during analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+    save_run_profile(output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 タイトル別・カテゴリ別統計分析スクリプト
+
+このスクリプトは、Manga109データセットのアノテーションJSONファイルから
+サイズ比（セグメンテーション・BBox）と1画像あたりの個数を、マンガタイトル別・
+カテゴリ別・タイトル×カテゴリ別に集計し、表とグラフを保存します。
+"""
+
+import sys
+import os
+import argparse
+
+# packagesディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
+
+from packages.plot_grouped_stats import plot_grouped_stats
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots
+
+
+def main():
+    """メイン実行関数"""
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='グラフを描画せず、レポート（.txt / .csv）だけを出力する（matplotlib を import しない）')
+    args = parser.parse_args()
+    
+    # バッチ実行なので非対話の Agg バックエンドで描画する（ウィンドウを開かない。--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+    
+    # アノテーションディレクトリのパス
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./statistics/"  # 結果の保存先
+    
+    # ディレクトリが存在するかチェック
+    if not os.path.exists(annotations_dir):
+        print(f"Error: Annotations directory not found: {annotations_dir}")
+        print("Please check the path to your JSON annotation files.")
+        return
+    
+    # JSONファイルが存在するかチェック
+    import glob
+    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+    if not json_files:
+        print(f"Error: No JSON files found in: {annotations_dir}")
+        print("Please check that JSON annotation files exist in the specified directory.")
+        return
+    
+    # 出力ディレクトリを作成
+    os.makedirs(output_dir, exist_ok=True)
+    
+    print(f"Found {len(json_files)} JSON files in {annotations_dir}")
+    print("Starting grouped (per-title / per-category) statistics analysis...")
+    
+    try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+        
+        # 分析実行
+        plot_grouped_stats(dataset, output_dir)
+        print("\nGrouped statistics analysis completed successfully!")
+        print(f"Results saved in: {output_dir}")
+        print("\nGenerated files:")
+        print("  - grouped_stats_by_title.csv / grouped_stats_by_category.csv / grouped_stats_by_title_category.csv")
+        print("  - grouped_<metric>_by_title_en.png / grouped_<metric>_by_title_jp.png")
+        
+    except Exception as e:
+        print(f"Error during analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
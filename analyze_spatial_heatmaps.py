@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 オブジェクト配置のヒートマップ作成スクリプト（JSON 版）
+
+このスクリプトは、Manga109データセットのアノテーションJSONファイルから
+吹き出し・body・face・text・オノマトペなどがページのどこに現れるかを、
+ページを縮小したグリッド上の占有率としてカテゴリごとに集計します。
+- カテゴリごとの占有率のグリッド（.npy）
+- カテゴリごとのヒートマップを並べた図（英語版・日本語版）
+- タイトルごとのヒートマップ（--per-title）
+"""
+
+import sys
+import os
+import argparse
+import glob
+
+# packagesディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
+
+from packages.plot_spatial_heatmaps import plot_spatial_heatmaps, GRID_SHAPE, HEATMAP_METHODS, HEATMAP_DIR_NAME
+from packages.generate_synthetic_manga109 import parse_page_size
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.figure_renderer import use_batch_backend, disable_plots, FigureRenderPool
+from packages.run_profile import enable_profiling, save_run_profile
+
+
+def main():
+    """メイン実行関数"""
+
+    grid_rows, grid_cols = GRID_SHAPE
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='JSON読み込み・面積計算に使うプロセス数（既定: 1 = 逐次処理）')
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help='グラフ描画に使うプロセス数（既定: 1 = 逐次処理）。--per-title で図が多いときに使う')
+    parser.add_argument('--method', choices=HEATMAP_METHODS, default='mask',
+                        help='mask: セグメンテーションで集計する / bbox: バウンディングボックスで集計する（既定: mask）')
+    parser.add_argument('--grid', type=parse_page_size, default=(grid_cols, grid_rows), metavar='WxH',
+                        help=f'グリッドの列数x行数（既定: {grid_cols}x{grid_rows}）')
+    parser.add_argument('--categories', nargs='+', metavar='NAME',
+                        help='集計するカテゴリ名（例: balloon body onomatopoeia。既定: すべてのカテゴリ）')
+    parser.add_argument('--per-title', action='store_true',
+                        help='タイトルごとのヒートマップも保存する')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='図を描画せず、グリッド（.npy）だけを出力する（matplotlib を import しない）')
+    parser.add_argument('--profile', action='store_true',
+                        help='読み込み・集計・描画の段階ごとの処理時間と RSS を statistics/run_profile.json に保存する')
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling()
+
+    # バッチ実行なので非対話の Agg バックエンドで描画する（--no-plots では描画しない）
+    if args.no_plots:
+        disable_plots()
+    else:
+        use_batch_backend()
+
+    # アノテーションディレクトリのパス
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./statistics/"  # 結果の保存先
+
+    # ディレクトリが存在するかチェック
+    if not os.path.exists(annotations_dir):
+        print(f"Error: Annotations directory not found: {annotations_dir}")
+        print("Please check the path to your JSON annotation files.")
+        return
+
+    # JSONファイルが存在するかチェック
+    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+    if not json_files:
+        print(f"Error: No JSON files found in: {annotations_dir}")
+        print("Please check that JSON annotation files exist in the specified directory.")
+        return
+
+    print(f"Found {len(json_files)} JSON files in {annotations_dir}")
+    print("Starting spatial heatmap analysis...")
+
+    try:
+        # JSON読み込み（--workers 指定時は並列）
+        dataset = load_manga_seg_dataset(annotations_dir, workers=args.workers)
+
+        category_ids = None
+        if args.categories:
+            category_ids = dataset.find_category_ids(args.categories)
+            if not category_ids:
+                print(f"Error: No categories found: {', '.join(args.categories)}")
+                return
+
+        # ヒートマップの集計と描画
+        grid_cols, grid_rows = args.grid
+        with FigureRenderPool(args.render_workers) as render_pool:
+            plot_spatial_heatmaps(dataset, output_dir, method=args.method, grid_shape=(grid_rows, grid_cols),
+                                  category_ids=category_ids, per_title=args.per_title, render_pool=render_pool)
+
+        heatmap_dir = os.path.join(output_dir, HEATMAP_DIR_NAME)
+        print("\n" + "="*60)
+        print("Spatial heatmap analysis completed successfully!")
+        print("="*60)
+        print(f"Results saved in: {heatmap_dir}")
+        print("\nGenerated files:")
+        print("  - heatmap_<category>.npy (Occupancy grid per category)")
+        print("  - heatmap_meta.json (Grid shape, method, categories and page counts)")
+        if not args.no_plots:
+            print("  - spatial_heatmaps_en.png / spatial_heatmaps_jp.png (Heatmaps)")
+        if args.per_title:
+            print("  - titles/<title>.npy, titles/<title>.png (Per-title heatmaps)")
+
+    except Exception as e:
+        print(f"Error during analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+    save_run_profile(output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 分析のベンチマーク
+
+packages/generate_synthetic_manga109.py で合成データセット（COCO 形式 JSON と Manga109 形式 XML）を
+基準の大きさの 1×・10×・100×（タイトル数を倍にする）で生成し、各分析の入口の処理時間を計測して
+JSON に保存します。Manga109 の実データがない環境（CI など）でも、同じ条件で繰り返し計測できます。
+
+計測する段階:
+    generate        合成データの生成（参考値）
+    ingest_cold     load_manga_seg_dataset（キャッシュなし: JSON のパース・列への変換・面積計算）
+    ingest_warm     load_manga_seg_dataset（列指向キャッシュあり。面積もキャッシュから読む）
+    mask_area       RLE のセグメンテーション面積の計算（calc_column_seg_areas。キャッシュを作るときに1回だけ実行される）
+    xml_ingest      read_xml_annotation（全 XML）
+    containment     ページごとのコマ × オブジェクト（text, face）の包含判定（assign_bboxs_to_frames）
+    stats           run_collectors（全コレクター、--no-plots 相当。レポート・CSV の保存を含む）
+    plotting        run_collectors（全コレクター、グラフあり）と plot_bounded_obj_num
+
+--baseline に以前の結果を渡すと、段階ごとの比を表示し、許容範囲を超えて遅くなった段階があれば
+終了コード 1 で終わります。
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import numpy as np
+
+# packagesディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), 'packages'))
+
+# import するとコレクターが登録される
+import packages.plot_frame_stats
+import packages.plot_body_stats
+import packages.plot_onomatopeia_stats
+import packages.plot_onomatopoeia_body_stats
+import packages.plot_balloon_size_ratio
+import packages.plot_balloon_bbox_ratio
+import packages.plot_balloon_count_stats
+import packages.plot_grouped_stats
+from packages.metric_collectors import REGISTERED_COLLECTORS, run_collectors
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.seg_json_cache import calc_column_seg_areas, read_seg_json_columns
+from packages.read_xml_annotation import read_xml_annotation, _read_xml_annotation_cached
+from packages.get_bboxs_inside_frame import assign_bboxs_to_frames
+from packages.plot_bounded_obj_num import plot_bounded_obj_num
+from packages.figure_renderer import use_batch_backend, disable_plots, enable_plots
+from packages.generate_synthetic_manga109 import (
+    generate_synthetic_manga109, parse_objects_per_page, parse_page_size,
+    DEFAULT_OBJECTS_PER_PAGE, DEFAULT_PAGE_SIZES,
+)
+
+# 結果の JSON の形式を変えたら上げる
+RESULTS_VERSION = 1
+
+STAGES = ('generate', 'ingest_cold', 'ingest_warm', 'mask_area', 'xml_ingest',
+          'containment', 'stats', 'plotting')
+
+
+def _time_call(function, repeat: int, setup=None):
+    """
+    関数を repeat 回実行して処理時間を計測する
+
+    Args:
+        function: 計測する関数（引数なし）
+        repeat: 実行回数
+        setup: 毎回の実行前に呼ぶ関数（計測しない）
+
+    Returns:
+        (最小の秒数, 各回の秒数のリスト, 最後の実行の戻り値)
+    """
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs, result
+
+
+def _read_all_columns(json_dir: str, cache_dir: str) -> list:
+    """全 JSON の列（面積の計測用。キャッシュがあればキャッシュから読む）"""
+    json_files = sorted(os.path.join(json_dir, name) for name in os.listdir(json_dir) if name.endswith('.json'))
+    return [(json_path, read_seg_json_columns(json_path, cache_dir)[0]) for json_path in json_files]
+
+
+def _read_all_xml(xml_dir: str) -> list:
+    """全 XML を読み込む（前回の結果のキャッシュを使わない）"""
+    _read_xml_annotation_cached.cache_clear()
+    xml_files = sorted(os.path.join(xml_dir, name) for name in os.listdir(xml_dir) if name.endswith('.xml'))
+    return [read_xml_annotation(xml_path) for xml_path in xml_files]
+
+
+def _count_bounded_objects(books: list) -> list:
+    """ページごとにコマ内のオブジェクト（text, face）の数を求める（main.py と同じ処理）"""
+    bounded_obj_num = []
+    for pages in books:
+        for page in pages.values():
+            nonframe_boxes = np.concatenate([page["text"].boxes, page["face"].boxes])
+            inside = assign_bboxs_to_frames(page["frame"].boxes, nonframe_boxes)
+            bounded_obj_num.extend(inside.sum(axis=1).tolist())
+    return bounded_obj_num
+
+
+def benchmark_scale(scale: int, args, work_dir: str, with_plots: bool) -> dict:
+    """
+    1つの倍率で合成データを生成し、各段階の処理時間を計測する
+
+    Args:
+        scale: 基準の大きさに対する倍率（タイトル数 = args.titles × scale）
+        args: コマンドライン引数
+        work_dir: 合成データ・キャッシュ・出力の作業ディレクトリ
+        with_plots: plotting の段階を計測するかどうか
+
+    Returns:
+        倍率・データの大きさ・段階ごとの処理時間の辞書
+    """
+    scale_dir = os.path.join(work_dir, f"scale_{scale}")
+    data_dir = os.path.join(scale_dir, "data")
+    cache_dir = os.path.join(scale_dir, "cache")
+    output_dir = os.path.join(scale_dir, "statistics")
+    shutil.rmtree(scale_dir, ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    num_titles = args.titles * scale
+    print(f"\n=== Scale {scale}x: {num_titles} titles x {args.pages} pages ===")
+    stages = {}
+
+    def record(stage, function, setup=None, repeat=args.repeat):
+        seconds, runs, result = _time_call(function, repeat, setup)
+        stages[stage] = {'seconds': seconds, 'runs': runs}
+        print(f"  {stage:<12} {seconds:9.3f} s")
+        return result
+
+    # 合成データの生成は1回だけ（同じシードなら毎回同じデータになる）
+    generated = record('generate', lambda: generate_synthetic_manga109(
+        data_dir, num_titles, args.pages, dict(args.objects), args.page_size, args.seed), repeat=1)
+
+    dataset = record('ingest_cold', lambda: load_manga_seg_dataset(generated['json_dir'], cache_dir),
+                     setup=lambda: shutil.rmtree(cache_dir, ignore_errors=True))
+    dataset = record('ingest_warm', lambda: load_manga_seg_dataset(generated['json_dir'], cache_dir))
+
+    file_columns = _read_all_columns(generated['json_dir'], cache_dir)
+    record('mask_area', lambda: [calc_column_seg_areas(columns, json_path) for json_path, columns in file_columns])
+
+    books = record('xml_ingest', lambda: _read_all_xml(generated['xml_dir']))
+    bounded_obj_num = record('containment', lambda: _count_bounded_objects(books))
+
+    # 集計はファクトテーブルの作成から計測する（データセットごとにキャッシュされるため毎回作り直す）
+    def reset_fact_table():
+        dataset._fact_table = None
+
+    disable_plots()
+    record('stats', lambda: run_collectors(dataset, REGISTERED_COLLECTORS, output_dir), setup=reset_fact_table)
+    enable_plots()
+
+    if with_plots:
+        def run_plots():
+            run_collectors(dataset, REGISTERED_COLLECTORS, output_dir)
+            plot_bounded_obj_num(bounded_obj_num, "コマ内のオブジェクト数", os.path.join(output_dir, "bounded_obj_num"))
+        record('plotting', run_plots, setup=reset_fact_table)
+
+    if not args.keep_data:
+        shutil.rmtree(scale_dir, ignore_errors=True)
+
+    return {
+        'scale': scale,
+        'titles': generated['titles'],
+        'images': generated['images'],
+        'annotations': generated['annotations'],
+        'xml_objects': generated['xml_objects'],
+        'frames': len(bounded_obj_num),
+        'stages': stages,
+    }
+
+
+def print_summary(results: dict):
+    """段階 × 倍率の処理時間の表を表示する"""
+    scales = results['scales']
+    print("\n=== Benchmark summary (seconds) ===")
+    print(f"  {'stage':<12}" + "".join(f"{str(entry['scale']) + 'x':>11}" for entry in scales))
+    for stage in STAGES:
+        cells = [entry['stages'].get(stage) for entry in scales]
+        if all(cell is None for cell in cells):
+            continue
+        print(f"  {stage:<12}" + "".join(f"{cell['seconds']:11.3f}" if cell else f"{'-':>11}" for cell in cells))
+    print(f"  {'annotations':<12}" + "".join(f"{entry['annotations']:11d}" for entry in scales))
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float, min_seconds: float) -> list:
+    """
+    以前の結果と段階ごとに比べ、遅くなった段階を返す
+
+    Args:
+        results: 今回の結果
+        baseline: 以前の結果（同じ形式）
+        tolerance: 許容する増加率（0.25 = 25% 遅くなるまでは許容）
+        min_seconds: これより短い差は揺らぎとみなして無視する秒数
+
+    Returns:
+        [(倍率, 段階, 以前の秒数, 今回の秒数), ...]
+    """
+    baseline_scales = {entry['scale']: entry for entry in baseline.get('scales', [])}
+    regressions = []
+    print("\n=== Comparison with baseline ===")
+    for entry in results['scales']:
+        base_entry = baseline_scales.get(entry['scale'])
+        if base_entry is None:
+            continue
+        for stage, timing in entry['stages'].items():
+            # 合成データの生成は分析の処理ではないため比較しない
+            if stage == 'generate' or stage not in base_entry['stages']:
+                continue
+            before, after = base_entry['stages'][stage]['seconds'], timing['seconds']
+            ratio = after / before if before > 0 else float('inf')
+            slower = after > before * (1 + tolerance) and after - before > min_seconds
+            mark = "  REGRESSION" if slower else ""
+            print(f"  {entry['scale']:>4}x {stage:<12} {before:9.3f} s -> {after:9.3f} s ({ratio:5.2f}x){mark}")
+            if slower:
+                regressions.append((entry['scale'], stage, before, after))
+    return regressions
+
+
+def main():
+    """メイン実行関数"""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='計測する倍率（既定: 1 10 100）')
+    parser.add_argument('--titles', type=int, default=1,
+                        help='倍率 1 のタイトル数（既定: 1）')
+    parser.add_argument('--pages', type=int, default=20,
+                        help='1タイトルあたりのページ数（既定: 20）')
+    parser.add_argument('--objects', type=parse_objects_per_page, nargs='*', default=[], metavar='CATEGORY=N',
+                        help='1ページあたりの平均個数（例: frame=6 text=12。既定は実データの見開きページ程度）')
+    parser.add_argument('--page-size', type=parse_page_size, nargs='+', default=list(DEFAULT_PAGE_SIZES),
+                        metavar='WxH', help='ページサイズ（既定: 1654x1170）')
+    parser.add_argument('--seed', type=int, default=0, help='合成データの乱数のシード（既定: 0）')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='各段階の実行回数（最小の時間を結果とする。既定: 1）')
+    parser.add_argument('--work-dir', default='./cache/benchmark/',
+                        help='合成データ・キャッシュ・出力の作業ディレクトリ（既定: ./cache/benchmark/）')
+    parser.add_argument('--keep-data', action='store_true',
+                        help='計測後も合成データと出力を残す')
+    parser.add_argument('--output', default='./benchmarks/benchmark_results.json',
+                        help='結果の保存先（既定: ./benchmarks/benchmark_results.json）')
+    parser.add_argument('--baseline',
+                        help='比較する以前の結果の JSON（遅くなった段階があれば終了コード 1）')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='--baseline との比較で許容する増加率（既定: 0.25）')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='plotting の段階を計測しない（matplotlib を import しない）')
+    args = parser.parse_args()
+
+    if not args.no_plots:
+        use_batch_backend()
+
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'titles': args.titles,
+            'pages': args.pages,
+            'objects_per_page': {**DEFAULT_OBJECTS_PER_PAGE, **dict(args.objects)},
+            'page_sizes': [list(size) for size in args.page_size],
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'plots': not args.no_plots,
+        },
+        'scales': [],
+    }
+
+    for scale in args.scales:
+        results['scales'].append(benchmark_scale(scale, args, args.work_dir, not args.no_plots))
+
+    print_summary(results)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance, min_seconds=0.05)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline")
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ matplotlibで日本語が正しく表示されるかテストします。
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import numpy as np
+from packages.japanese_font import resolve_japanese_font, DEFAULT_FONT_CACHE_PATH
 
 def check_japanese_fonts():
     """利用可能な日本語フォントを確認"""
@@ -113,6 +114,12 @@ def main():
     # 利用可能なフォント確認
     japanese_fonts = check_japanese_fonts()
     
+    # グラフで使うフォントを探し直してキャッシュを更新（フォントを追加・削除した後に実行する）
+    font = resolve_japanese_font(refresh=True)
+    if font is not None:
+        print(f"\nグラフで使用するフォント: {font['family']} ({font['path']})")
+    print(f"フォントキャッシュを更新しました: {DEFAULT_FONT_CACHE_PATH}")
+    
     if not japanese_fonts:
         print("\n警告: 日本語フォントが見つかりません！")
         install_font_recommendations()
@@ -1,4 +1,5 @@
-from packages import get_framebbox, get_path_list, get_nonframebbox, get_bboxs_inside_frame, plot_bounded_obj_num, draw_bbox_and_show, calc_stats
+import numpy as np
+from packages import get_framebbox, get_path_list, get_nonframebbox, get_bboxs_inside_frame, plot_bounded_obj_num, draw_bbox_and_show, calc_stats, read_xml_annotation
 
 if __name__ == "__main__":
     bounded_bboxs_num = []
@@ -6,22 +7,20 @@ if __name__ == "__main__":
     for path in all_path:
         # if "ARMS" not in path:
         #     continue
-        frame_bboxs = get_framebbox.get_framebbox(path)
-        nonframe_bboxs = get_nonframebbox.get_nonframebbox(path)
-        for index in frame_bboxs.keys():
+        pages = read_xml_annotation.read_xml_annotation(path)
+        for index, page in pages.items():
             # print(index)
-            for frame_bbox in frame_bboxs[index]:
-                # print(frame_bbox["id"])
-                bouded_nonframe_bboxs = get_bboxs_inside_frame.get_bboxs_inside_frame(frame_bbox, nonframe_bboxs[index])
-                bounded_bboxs_num.append(bouded_nonframe_bboxs.__len__())
-                # if len(bouded_nonframe_bboxs) == 0:
-                #     print(path)
-                #     print(index)
-                #     print(frame_bbox)
-                #     print(bouded_nonframe_bboxs.__len__())
-                #     print(bouded_nonframe_bboxs)
-                #     print("=================================")
-                #     draw_bbox_and_show.draw_bbox_and_show(path, index, frame_bbox, nonframe_bboxs[index])
+            nonframe_boxes = np.concatenate([page["text"].boxes, page["face"].boxes])
+            # コマ × オブジェクトの包含判定をページ単位で一括計算
+            inside = get_bboxs_inside_frame.assign_bboxs_to_frames(page["frame"].boxes, nonframe_boxes)
+            bounded_bboxs_num.extend(inside.sum(axis=1).tolist())
+            # for frame_index in np.flatnonzero(~inside.any(axis=1)):
+            #     print(path)
+            #     print(index)
+            #     print(page["frame"].ids[frame_index])
+            #     print("=================================")
+            #     frame_bbox = get_framebbox.get_framebbox(path)[index][frame_index]
+            #     draw_bbox_and_show.draw_bbox_and_show(path, index, frame_bbox, get_nonframebbox.get_nonframebbox(path)[index])
     mode, median, mean, variance, std_dev = calc_stats.calc_stats(bounded_bboxs_num,"bounded_obj_num")
     print("mode: ", mode)
     print("median: ", median)
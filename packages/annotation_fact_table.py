@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+アノテーションのファクトテーブル
+
+すべての集計（frame, body, オノマトペ, 吹き出し…）の元になる、アノテーション1件につき
+1行の列指向テーブルです。各列は連続した型付きの NumPy 配列で、タイトル名は
+辞書エンコード（titles の番号）で持つため、1件あたりのメモリは数十バイトです。
+
+アノテーションの列（N 件、データセットの読み込み順）:
+    image_idx     int32    画像の行番号（images_* の番号。画像がない場合は -1）
+    title_idx     int32    タイトルの番号（titles の番号。画像がない場合は -1）
+    category_id   int16    カテゴリID
+    bbox_x, bbox_y, bbox_w, bbox_h   float64   バウンディングボックス（ない場合は NaN）
+    seg_area      int64    セグメンテーションのピクセル数（ない・計算失敗は -1）
+    image_area    int64    画像の面積（画像がない場合は 0）
+
+画像の列（M 枚、データセットの画像順）:
+    image_ids, image_file_names, image_widths, image_heights, image_areas, image_title_idx
+
+各コレクターはこのテーブルをカテゴリで絞り込み（category_mask）、画像ごとの個数は
+image_counts（np.bincount）で、タイトルごとの集計は title_idx で求めます。
+"""
+
+import numpy as np
+from packages.load_manga_seg_dataset import get_manga_title
+
+
+class AnnotationFactTable:
+    """アノテーション1件につき1行の列指向テーブル"""
+
+    def __init__(self, dataset):
+        images = dataset.images
+        self.image_ids = np.fromiter(images.keys(), dtype=np.int64, count=len(images))
+        self.image_file_names = np.array([info['file_name'] for info in images.values()], dtype=np.str_)
+        self.image_widths = np.fromiter((info['width'] for info in images.values()),
+                                        dtype=np.int64, count=len(images))
+        self.image_heights = np.fromiter((info['height'] for info in images.values()),
+                                         dtype=np.int64, count=len(images))
+        self.image_areas = self.image_widths * self.image_heights
+
+        # タイトル名は辞書エンコードする（番号は初出順）
+        image_titles = [get_manga_title(name) for name in self.image_file_names.tolist()]
+        title_codes = {}
+        for title in image_titles:
+            title_codes.setdefault(title, len(title_codes))
+        self.titles = np.array(list(title_codes), dtype=np.str_)
+        self.image_title_idx = np.array([title_codes[title] for title in image_titles], dtype=np.int32)
+
+        # アノテーション → 画像の行番号（画像がない行のタイトル番号は -1、画像の面積は 0）
+        self.image_idx = self._lookup_images(dataset.ann_image_ids)
+        has_image = self.image_idx >= 0
+        self.title_idx = np.full(len(self.image_idx), -1, dtype=np.int32)
+        self.title_idx[has_image] = self.image_title_idx[self.image_idx[has_image]]
+        self.image_area = np.zeros(len(self.image_idx), dtype=np.int64)
+        self.image_area[has_image] = self.image_areas[self.image_idx[has_image]]
+
+        self.category_id = np.asarray(dataset.ann_category_ids, dtype=np.int16)
+        bboxes = np.asarray(dataset.ann_bboxes, dtype=np.float64)
+        self.bbox_x = np.ascontiguousarray(bboxes[:, 0])
+        self.bbox_y = np.ascontiguousarray(bboxes[:, 1])
+        self.bbox_w = np.ascontiguousarray(bboxes[:, 2])
+        self.bbox_h = np.ascontiguousarray(bboxes[:, 3])
+        self.seg_area = np.asarray(dataset.ann_seg_areas, dtype=np.int64)
+
+    def _lookup_images(self, ann_image_ids) -> np.ndarray:
+        """画像ID → 画像の行番号（見つからない場合は -1）"""
+        ann_image_ids = np.asarray(ann_image_ids, dtype=np.int64)
+        image_idx = np.full(len(ann_image_ids), -1, dtype=np.int32)
+        if len(self.image_ids) == 0:
+            return image_idx
+        order = np.argsort(self.image_ids, kind='stable')
+        sorted_ids = self.image_ids[order]
+        positions = np.minimum(np.searchsorted(sorted_ids, ann_image_ids), len(sorted_ids) - 1)
+        found = sorted_ids[positions] == ann_image_ids
+        image_idx[found] = order[positions[found]]
+        return image_idx
+
+    def __len__(self):
+        return len(self.category_id)
+
+    @property
+    def num_images(self) -> int:
+        return len(self.image_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """アノテーションの列のバイト数"""
+        return sum(column.nbytes for column in (
+            self.image_idx, self.title_idx, self.category_id, self.bbox_x, self.bbox_y,
+            self.bbox_w, self.bbox_h, self.seg_area, self.image_area))
+
+    def image_table(self) -> dict:
+        """画像ごとの列（image_id, file_name, manga_title, width, height, area）"""
+        return {
+            'image_id': self.image_ids,
+            'file_name': self.image_file_names,
+            'manga_title': self.titles[self.image_title_idx],
+            'width': self.image_widths,
+            'height': self.image_heights,
+            'area': self.image_areas,
+        }
+
+    def category_mask(self, category_ids) -> np.ndarray:
+        """
+        指定カテゴリで、画像がわかっているアノテーションの行（真偽値の配列）
+
+        Args:
+            category_ids: カテゴリIDまたはカテゴリIDのリスト
+        """
+        if isinstance(category_ids, int):
+            category_ids = [category_ids]
+        return np.isin(self.category_id, list(category_ids)) & (self.image_idx >= 0)
+
+    def image_counts(self, mask) -> np.ndarray:
+        """画像ごとの行数（画像の行番号順、int64）"""
+        return np.bincount(self.image_idx[mask], minlength=self.num_images).astype(np.int64)
+
+    def images_by_first_row(self, mask) -> np.ndarray:
+        """行がある画像の行番号を、その画像の最初の行の順に返す"""
+        image_idx = self.image_idx[mask]
+        _, first_rows = np.unique(image_idx, return_index=True)
+        return image_idx[np.sort(first_rows)]
+
+    def row_titles(self, mask) -> np.ndarray:
+        """行のタイトル名"""
+        return self.titles[self.title_idx[mask]]
+
+
+class ColumnParts:
+    """
+    同じ列名を持つ列の辞書を行方向に連結していく（タイトルごとの集計の統合に使う）
+
+    merge のたびに連結し直すと、増分実行でタイトルごとの部分集計を統合するときに
+    タイトル数の2乗に比例してコピーが増えるため、部分ごとの辞書のリストとして持ち、
+    columns() で初めて参照したときに1回だけ連結する。
+    """
+
+    def __init__(self, columns: dict = None):
+        self.parts = [] if columns is None else [columns]
+
+    def append(self, columns: dict):
+        """部分（列名 → 配列 の辞書）を追加する"""
+        self.parts.append(columns)
+
+    def extend(self, other):
+        """別の ColumnParts の部分を後ろに追加する"""
+        self.parts.extend(other.parts)
+
+    def columns(self) -> dict:
+        """連結した列（列名 → 配列 の辞書。部分がない場合は空の辞書）"""
+        if len(self.parts) > 1:
+            names = self.parts[0].keys()
+            self.parts = [{name: np.concatenate([part[name] for part in self.parts]) for name in names}]
+        return self.parts[0] if self.parts else {}
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+セグメンテーション面積計算
+
+RLE をマスク画像にデコードせず、ランレングスから直接ピクセル数を求めます。
+maskUtils.decode → np.any(axis=2) → np.sum と同じ値を返します。
+"""
+
+import numpy as np
+from packages.lazy_import import lazy_import
+
+# pycocotools は RLE を初めて扱うときに import する（面積は seg_json_cache のキャッシュに保存されるため、
+# キャッシュから読み込む場合は import しない）
+maskUtils = lazy_import('pycocotools.mask')
+
+
+def _to_compressed_rle(rle: dict) -> dict:
+    """非圧縮RLE（counts がリスト）を圧縮RLEに変換する"""
+    if isinstance(rle['counts'], list):
+        height, width = rle['size']
+        return maskUtils.frPyObjects(rle, height, width)
+    return rle
+
+
+def calc_segmentation_area(segmentation) -> int:
+    """
+    セグメンテーション（RLE）のピクセル数を計算する
+
+    Args:
+        segmentation: RLE の辞書、または複数パーツの RLE のリスト
+                      （リストの場合は和集合の面積）
+
+    Returns:
+        セグメンテーション領域のピクセル数
+    """
+    if isinstance(segmentation, dict):
+        counts = segmentation['counts']
+        if isinstance(counts, list):
+            # 非圧縮RLEは奇数番目（前景）のランの合計
+            return int(np.sum(counts[1::2], dtype=np.int64))
+        return int(maskUtils.area(segmentation))
+
+    rles = [_to_compressed_rle(rle) for rle in segmentation]
+    if len(rles) == 1:
+        return int(maskUtils.area(rles[0]))
+
+    # 複数パーツは RLE のまま和集合をとる（重なった部分を二重に数えない）
+    return int(maskUtils.area(maskUtils.merge(rles, intersect=False)))
+
+
+def calc_segmentation_areas(segmentations) -> np.ndarray:
+    """
+    複数のセグメンテーションのピクセル数をまとめて計算する
+
+    Args:
+        segmentations: calc_segmentation_area に渡せるセグメンテーションのリスト
+
+    Returns:
+        ピクセル数の配列（int64）
+    """
+    return np.fromiter(
+        (calc_segmentation_area(seg) for seg in segmentations),
+        dtype=np.int64, count=len(segmentations)
+    )
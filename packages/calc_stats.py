@@ -1,13 +1,17 @@
-import numpy as np
-from scipy import stats
+from packages.streaming_stats import IntegerCounts
 
 def calc_stats(data, file_name: str):
-    mode_result = stats.mode(data)
-    mode = mode_result.mode if mode_result.mode.size > 0 else None
-    median = np.median(data)
-    mean = np.mean(data)
-    variance = np.var(data, ddof=1)
-    std_dev = np.std(data, ddof=1)
+    # 整数値（コマ内のオブジェクト数など）は値ごとの件数から厳密に計算する
+    if isinstance(data, IntegerCounts):
+        counts = data
+    else:
+        counts = IntegerCounts()
+        counts.update(data)
+    mode = counts.mode()
+    median = counts.percentile(50)
+    mean = counts.mean()
+    variance = counts.variance(ddof=1)
+    std_dev = counts.std(ddof=1)
     # write to file
     with open(f'{file_name}.txt', 'w') as f:
         f.write(f'最頻値: {mode}\n')
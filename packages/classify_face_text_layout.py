@@ -1,3 +1,14 @@
+import numpy as np
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+
+# 配置の文字列に使う文字（t=テキスト, c=キャラクタ）
+TEXT_LETTER = 't'
+FACE_LETTER = 'c'
+
+# テキスト2つ・顔1つで、テキストが顔の左右どちらにもない（中心の x 座標が3つとも同じ）場合の配置
+UNKNOWN_LAYOUT = "不明な配置"
+
 def classify_face_text_layout(face_bbox, text_bboxs):
     face_xmin = face_bbox["xmin"]
     face_ymin = face_bbox["ymin"]
@@ -33,4 +44,67 @@ def classify_face_text_layout(face_bbox, text_bboxs):
     elif text_right:
         return "ctt"
     else:
-        return "不明な配置"
\ No newline at end of file
+        return UNKNOWN_LAYOUT
+
+
+def classify_face_text_layouts(frames, center_x, is_face):
+    """
+    コマ内のテキスト・顔を中心の x 座標の順に並べた配置（"tct", "ttc" など）をまとめて求める
+
+    classify_face_text_layout はテキスト2つ・顔1つのコマしか扱えませんが、こちらは
+    任意の個数のテキスト・顔について、コマ × オブジェクトの組の列から全コマ分を1回のソートで求めます。
+    中心の x 座標が同じ場合はテキストを先に並べます。
+
+    ただしテキスト2つ・顔1つのコマは classify_face_text_layout と同じ結果にします。
+    そちらは左右を厳密な比較で決めるため、顔と中心が同じテキストはもう一方のテキストの側に並び
+    （テキスト1 == 顔 < テキスト2 は "ctt"）、3つとも同じ場合は UNKNOWN_LAYOUT になります。
+
+    Args:
+        frames: 組ごとのコマの番号（(P,)）
+        center_x: 組ごとのオブジェクトの中心の x 座標（(P,)）
+        is_face: 組ごとのオブジェクトが顔かどうか（(P,)。False はテキスト）
+
+    Returns:
+        (コマの番号（昇順、int64）, 配置の文字列の pandas.Categorical)
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    center_x = np.asarray(center_x, dtype=np.float64)
+    is_face = np.asarray(is_face, dtype=bool)
+
+    # コマごとに中心の x 座標の順に並べる
+    order = np.lexsort((is_face, center_x, frames))
+    frame_ids, starts, lengths = np.unique(frames[order], return_index=True, return_counts=True)
+    positions = np.arange(len(order)) - np.repeat(starts, lengths)
+
+    # 1コマ1行の文字の表を作り、行をそのまま固定長のバイト列として読む
+    width = int(lengths.max()) if len(lengths) else 1
+    letters = np.zeros((len(frame_ids), width), dtype=np.uint8)
+    letters[np.repeat(np.arange(len(frame_ids)), lengths), positions] = np.where(
+        is_face[order], ord(FACE_LETTER), ord(TEXT_LETTER))
+    codes = letters.view(f'S{width}').ravel()
+
+    categories, inverse = np.unique(codes, return_inverse=True)
+    categories = np.char.decode(categories, 'ascii').tolist()
+
+    # テキスト2つ・顔1つのコマは classify_face_text_layout と同じ判定に置き換える
+    rows = np.searchsorted(frame_ids, frames)
+    face_counts = np.bincount(rows[is_face], minlength=len(frame_ids))
+    text_counts = np.bincount(rows[~is_face], minlength=len(frame_ids))
+    two_texts_one_face = (text_counts == 2) & (face_counts == 1)
+    if not two_texts_one_face.any():
+        return frame_ids, pd.Categorical.from_codes(inverse.ravel(), categories=categories)
+
+    face_x = np.zeros(len(frame_ids))
+    face_x[rows[is_face]] = center_x[is_face]
+    text_min_x = np.full(len(frame_ids), np.inf)
+    text_max_x = np.full(len(frame_ids), -np.inf)
+    np.minimum.at(text_min_x, rows[~is_face], center_x[~is_face])
+    np.maximum.at(text_max_x, rows[~is_face], center_x[~is_face])
+    text_left = text_min_x < face_x
+    text_right = text_max_x > face_x
+    two_text_layouts = np.select([text_left & text_right, text_left, text_right],
+                                 ['tct', 'ttc', 'ctt'], UNKNOWN_LAYOUT)
+
+    layouts = np.asarray(categories, dtype=object)[inverse.ravel()]
+    layouts[two_texts_one_face] = two_text_layouts[two_texts_one_face]
+    return frame_ids, pd.Categorical(layouts)
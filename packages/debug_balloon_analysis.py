@@ -1,17 +1,14 @@
-import json
-import glob
 import os
 import numpy as np
-import matplotlib.pyplot as plt
-import japanize_matplotlib
-import seaborn as sns
+from packages.load_manga_seg_dataset import as_manga_seg_dataset
 
 def debug_image_sizes_and_balloons(annotations_dir: str, output_dir: str = "./"):
     """
     画像サイズと吹き出し情報をデバッグ・分析する
     
     Args:
-        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
         output_dir: 結果の保存先ディレクトリ
     """
     
@@ -21,56 +18,35 @@ def debug_image_sizes_and_balloons(annotations_dir: str, output_dir: str = "./")
     images_with_balloons = []
     images_without_balloons = []
     
-    # JSONファイルを取得
-    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
-    
-    print(f"Found {len(json_files)} JSON files")
-    
-    for json_path in json_files:
-        print(f"Processing: {os.path.basename(json_path)}")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # カテゴリID → クラス名のマッピング
-        category_map = {cat['id']: cat['name'] for cat in data.get("categories", [])}
+    # データセットを取得（JSONは1ファイルにつき1回だけ読み込む）
+    dataset = as_manga_seg_dataset(annotations_dir)
+    
+    # 画像情報を収集
+    for image_id, img in dataset.images.items():
+        image_info[image_id] = {
+            'file_name': img['file_name'],
+            'width': img['width'],
+            'height': img['height'],
+            'balloon_count': 0,
+            'balloons': []
+        }
         
-        # 画像情報を収集
-        for img in data['images']:
-            image_id = img['id']
-            file_name = img['file_name']
-            width = img['width']
-            height = img['height']
+        image_sizes.append((img['width'], img['height']))
+    
+    # 吹き出し（balloon）クラスのアノテーションを処理
+    for ann in dataset.get_balloon_annotations(with_segmentation=False):
+        image_id = ann['image_id']
+        if image_id in image_info:
+            bbox = ann['bbox']
+            x, y, width, height = bbox
             
-            image_info[image_id] = {
-                'file_name': file_name,
+            image_info[image_id]['balloon_count'] += 1
+            image_info[image_id]['balloons'].append({
+                'bbox': bbox,
+                'area': width * height,
                 'width': width,
-                'height': height,
-                'balloon_count': 0,
-                'balloons': []
-            }
-            
-            image_sizes.append((width, height))
-        
-        # 吹き出しアノテーションを処理
-        for ann in data['annotations']:
-            category_id = ann['category_id']
-            class_name = category_map.get(category_id, f"category_{category_id}")
-            
-            # 吹き出し（balloon）クラスのみを対象とする
-            if 'balloon' in class_name.lower() or 'speech' in class_name.lower():
-                image_id = ann['image_id']
-                if image_id in image_info:
-                    bbox = ann['bbox']
-                    x, y, width, height = bbox
-                    
-                    image_info[image_id]['balloon_count'] += 1
-                    image_info[image_id]['balloons'].append({
-                        'bbox': bbox,
-                        'area': width * height,
-                        'width': width,
-                        'height': height
-                    })
+                'height': height
+            })
     
     # 吹き出しがある画像とない画像を分類
     for image_id, info in image_info.items():
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+図の描画（バッチ実行用）
+
+analyze_*.py のようなバッチ実行では use_batch_backend で非対話の Agg バックエンドに
+固定し、plt.show() でウィンドウを開かないようにします（show_figure）。
+
+FigureRenderPool は図の仕様（データとラベル）と描画関数をプロセスプールに渡し、
+PNG の描画・保存を別プロセスで行います。メインプロセスはその間に次の分析の
+集計やレポート出力を進められます。描画関数はモジュールレベルの関数とし、
+保存後に必ず plt.close で図を閉じます。
+
+disable_plots を呼ぶと（analyze_*.py の --no-plots）render_figure は何も描画せず、
+matplotlib も import されません。レポート（.txt / .csv）だけを出力するときに使います。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from packages.run_profile import profile_stage
+
+_batch_mode = False
+_plots_enabled = True
+
+
+def use_batch_backend():
+    """非対話の Agg バックエンドに切り替える（図はファイルにのみ保存する）"""
+    global _batch_mode
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    _batch_mode = True
+
+
+def is_batch_mode() -> bool:
+    """バッチ実行中（Agg バックエンド）かどうか"""
+    if _batch_mode:
+        return True
+    import matplotlib
+    return matplotlib.get_backend().lower() == 'agg'
+
+
+def disable_plots():
+    """グラフを描画しない（レポートのみ出力する）"""
+    global _plots_enabled
+    _plots_enabled = False
+
+
+def enable_plots():
+    """disable_plots を取り消してグラフを描画する（ベンチマークで描画の有無を切り替える場合）"""
+    global _plots_enabled
+    _plots_enabled = True
+
+
+def plots_enabled() -> bool:
+    """グラフを描画するかどうか"""
+    return _plots_enabled
+
+
+def show_figure(fig=None):
+    """
+    対話実行のときだけ図を表示し、図を閉じる
+
+    Args:
+        fig: 閉じる図（None の場合は現在の図）
+    """
+    import matplotlib.pyplot as plt
+    if not is_batch_mode():
+        plt.show()
+    plt.close(fig if fig is not None else plt.gcf())
+
+
+def render_figure(render_pool, render_function, *args):
+    """
+    図を描画する（render_pool が None の場合はこのプロセスでそのまま描画する。
+    disable_plots 後は何もしない）
+
+    Args:
+        render_pool: FigureRenderPool または None
+        render_function: 図を描画・保存するモジュールレベルの関数
+        *args: render_function に渡す図の仕様（pickle できる値）
+    """
+    if not _plots_enabled:
+        return
+    # 描画プールに渡した場合は投入までの時間だけを記録する
+    with profile_stage(f"plot:{render_function.__name__.lstrip('_')}"):
+        if render_pool is None:
+            render_function(*args)
+        else:
+            render_pool.submit(render_function, *args)
+
+
+class FigureRenderPool:
+    """
+    図の描画を別プロセスで行うプール
+
+    with 文で使い、抜けるときに投入したすべての描画の完了を待つ
+    （描画中の例外はそこで送出される）。workers が 1 以下の場合は
+    submit したその場で描画する。
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._executor = None
+        self._futures = []
+        if workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=use_batch_backend)
+
+    def submit(self, render_function, *args):
+        """描画関数と図の仕様を投入する"""
+        if self._executor is None:
+            render_function(*args)
+        else:
+            self._futures.append(self._executor.submit(render_function, *args))
+
+    def wait(self):
+        """投入済みの描画がすべて終わるまで待つ"""
+        futures, self._futures = self._futures, []
+        with profile_stage("plot_wait"):
+            for future in futures:
+                future.result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
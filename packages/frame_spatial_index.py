@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コマの空間インデックス（一様グリッド）
+
+ページ内のコマのバウンディングボックスを約 √F × √F の一様グリッドに登録し、
+「このオブジェクトと重なるコマはどれか」を、そのオブジェクトが覆うセルに
+登録されたコマだけを調べて求めます。コマ・オブジェクトが多い密なページでも、
+全コマ × 全オブジェクトの総当たりをせずに重なり率
+（重なり面積 / オブジェクト面積）を計算できます。
+"""
+
+import numpy as np
+
+
+def _expand_cell_ranges(cx0, cy0, cx1, cy1, grid_size):
+    """
+    各ボックスが覆うセル範囲を (ボックス番号, セル番号) の組に展開する
+
+    cx1 < cx0 または cy1 < cy0 のボックスはどのセルにも属さない
+    """
+    nx = np.maximum(cx1 - cx0 + 1, 0)
+    ny = np.maximum(cy1 - cy0 + 1, 0)
+    counts = nx * ny
+    items = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell_x = cx0[items] + offsets % nx[items]
+    cell_y = cy0[items] + offsets // nx[items]
+    return items, cell_y * grid_size + cell_x
+
+
+def calc_pair_overlap_ratios(frame_boxes, obj_boxes, frame_indices, obj_indices):
+    """
+    指定した (コマ, オブジェクト) の組の重なり率（重なり面積 / オブジェクト面積）を計算する
+
+    Returns:
+        float64 配列。面積 0 のオブジェクトは 0
+    """
+    frames = frame_boxes[frame_indices]
+    objs = obj_boxes[obj_indices]
+    overlap_w = np.minimum(frames[:, 2], objs[:, 2]) - np.maximum(frames[:, 0], objs[:, 0])
+    overlap_h = np.minimum(frames[:, 3], objs[:, 3]) - np.maximum(frames[:, 1], objs[:, 1])
+    overlap_area = np.maximum(overlap_w, 0) * np.maximum(overlap_h, 0)
+
+    obj_area = (objs[:, 2] - objs[:, 0]) * (objs[:, 3] - objs[:, 1])
+    ratios = np.zeros(len(overlap_area), dtype=np.float64)
+    np.divide(overlap_area, obj_area, out=ratios, where=obj_area != 0)
+    return ratios
+
+
+class FrameGridIndex:
+    """
+    1ページ分のコマのバウンディングボックスを登録した一様グリッド
+
+    Attributes:
+        frame_boxes: コマの xmin, ymin, xmax, ymax（int64, (F, 4)）
+        grid_size: 1辺のセル数
+        origin: グリッド左上の座標 (x, y)
+        cell_size: セルの幅・高さ
+        cell_starts: セル番号 → cell_frames 内の範囲（(grid_size² + 1,)）
+        cell_frames: セルごとに並べたコマ番号
+    """
+
+    def __init__(self, frame_boxes, grid_size: int = None):
+        """
+        Args:
+            frame_boxes: コマの xmin, ymin, xmax, ymax（(F, 4) 配列）
+            grid_size: 1辺のセル数。None の場合は ceil(√F)
+        """
+        self.frame_boxes = np.asarray(frame_boxes, dtype=np.int64).reshape(-1, 4)
+        num_frames = len(self.frame_boxes)
+        if grid_size is None:
+            grid_size = max(1, int(np.ceil(np.sqrt(num_frames))))
+        self.grid_size = grid_size
+
+        if num_frames:
+            self.origin = self.frame_boxes[:, :2].min(axis=0)
+            extent = self.frame_boxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2, dtype=np.int64)
+            extent = np.ones(2, dtype=np.int64)
+        # セルの大きさは切り上げ（最低 1 ピクセル）
+        self.cell_size = np.maximum(-(-extent // grid_size), 1)
+
+        frame_indices, cells = _expand_cell_ranges(*self._cell_ranges(self.frame_boxes), grid_size)
+        order = np.argsort(cells, kind='stable')
+        self.cell_frames = frame_indices[order]
+        self.cell_starts = np.searchsorted(cells[order], np.arange(grid_size * grid_size + 1))
+
+    def _cell_ranges(self, boxes):
+        """ボックスが覆うセルの範囲（グリッド外の部分は切り捨て）"""
+        last = self.grid_size - 1
+        cx0 = (boxes[:, 0] - self.origin[0]) // self.cell_size[0]
+        cy0 = (boxes[:, 1] - self.origin[1]) // self.cell_size[1]
+        cx1 = (boxes[:, 2] - self.origin[0]) // self.cell_size[0]
+        cy1 = (boxes[:, 3] - self.origin[1]) // self.cell_size[1]
+        # グリッドと重ならないボックスは空の範囲にする
+        outside = (cx1 < 0) | (cy1 < 0) | (cx0 > last) | (cy0 > last)
+        cx0 = np.clip(cx0, 0, last)
+        cy0 = np.clip(cy0, 0, last)
+        cx1 = np.where(outside, -1, np.clip(cx1, 0, last))
+        cy1 = np.clip(cy1, 0, last)
+        return cx0, cy0, cx1, cy1
+
+    def query(self, obj_box) -> np.ndarray:
+        """
+        1つのオブジェクトと重なる（重なり面積が正の）コマの番号を返す
+
+        Args:
+            obj_box: オブジェクトの xmin, ymin, xmax, ymax
+        """
+        frame_indices, _, _ = self.overlap_pairs([obj_box])
+        return frame_indices
+
+    def overlap_pairs(self, obj_boxes):
+        """
+        重なり面積が正の (コマ, オブジェクト) の組と、その重なり率を返す
+
+        Args:
+            obj_boxes: オブジェクトの xmin, ymin, xmax, ymax（(O, 4) 配列）
+
+        Returns:
+            (コマ番号の配列, オブジェクト番号の配列, 重なり率の配列)
+            組はオブジェクト番号・コマ番号の順に並ぶ
+        """
+        obj_boxes = np.asarray(obj_boxes, dtype=np.int64).reshape(-1, 4)
+        num_frames = len(self.frame_boxes)
+
+        # オブジェクト → 覆うセル → セルに登録されたコマ
+        obj_indices, cells = _expand_cell_ranges(*self._cell_ranges(obj_boxes), self.grid_size)
+        counts = self.cell_starts[cells + 1] - self.cell_starts[cells]
+        pair_objs = np.repeat(obj_indices, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_frames = self.cell_frames[np.repeat(self.cell_starts[cells], counts) + offsets]
+
+        # 複数のセルで見つかった同じ組をまとめる
+        keys = np.unique(pair_objs * num_frames + pair_frames)
+        pair_objs = keys // max(num_frames, 1)
+        pair_frames = keys % max(num_frames, 1)
+
+        ratios = calc_pair_overlap_ratios(self.frame_boxes, obj_boxes, pair_frames, pair_objs)
+        overlapping = ratios > 0
+        return pair_frames[overlapping], pair_objs[overlapping], ratios[overlapping]
+
+    def assign(self, obj_boxes, iou_threshold=0.5) -> np.ndarray:
+        """
+        各コマに含まれるオブジェクトを判定する（assign_bboxs_to_frames と同じ結果）
+
+        Args:
+            obj_boxes: オブジェクトの xmin, ymin, xmax, ymax（(O, 4) 配列）
+            iou_threshold: オブジェクト面積のうちコマと重なる割合の閾値（正の値）
+
+        Returns:
+            (F, O) の bool 配列（True: そのコマに含まれる）
+        """
+        obj_boxes = np.asarray(obj_boxes, dtype=np.int64).reshape(-1, 4)
+        inside = np.zeros((len(self.frame_boxes), len(obj_boxes)), dtype=bool)
+        frame_indices, obj_indices, ratios = self.overlap_pairs(obj_boxes)
+        selected = ratios >= iou_threshold
+        inside[frame_indices[selected], obj_indices[selected]] = True
+        return inside
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成 Manga109 データセットの生成（ベンチマーク・CI 用）
+
+Manga109 はライセンスの都合で CI に置けないため、同じ形式の合成データを作ります。
+
+    <output_dir>/manga_seg_jsons/<タイトル>.json   COCO 形式（images / annotations / categories）
+    <output_dir>/annotations/<タイトル>.xml         Manga109 形式（book / pages / page / frame, text, face, body）
+
+JSON のカテゴリは実データと同じ（1: frame, 2: face, 3: text, 4: body, 5: balloon, 6: onomatopoeia）で、
+セグメンテーションは pycocotools で圧縮した RLE（一部は複数パーツの RLE のリスト）です。
+XML には JSON の frame / text / face / body と同じバウンディングボックスを同じ ID（16進8桁）で書くため、
+JSON 系（analyze_*.py）と XML 系（main.py など）のどちらの分析にも使えます。
+
+コマはページを格子状に分割して置き、他のオブジェクトは大部分をいずれかのコマの中に置きます
+（一部はコマの外に置き、包含判定で外れる組も作ります）。マスクはコマが矩形、その他は
+バウンディングボックスに内接する楕円です。RLE は列ごとの楕円の範囲から非圧縮の counts を
+直接作って pycocotools で圧縮するため、ページ全体のマスク画像は作りません。
+
+    python -m packages.generate_synthetic_manga109 ./../synthetic_manga109 --titles 4 --pages 20
+"""
+
+import argparse
+import json
+import os
+import xml.etree.ElementTree as ET
+import numpy as np
+from packages.lazy_import import lazy_import
+
+maskUtils = lazy_import('pycocotools.mask')
+
+# 実データと同じカテゴリ（ID 順）
+CATEGORIES = [
+    {"id": 1, "name": "frame"},
+    {"id": 2, "name": "face"},
+    {"id": 3, "name": "text"},
+    {"id": 4, "name": "body"},
+    {"id": 5, "name": "balloon"},
+    {"id": 6, "name": "onomatopoeia"},
+]
+
+# XML に書くカテゴリ（Manga109 の XML アノテーションにあるタグ）
+XML_TAGS = ("frame", "text", "face", "body")
+
+# 1ページあたりのオブジェクト数の平均（実データの見開きページ程度）
+DEFAULT_OBJECTS_PER_PAGE = {
+    "frame": 6,
+    "face": 8,
+    "text": 10,
+    "body": 8,
+    "balloon": 9,
+    "onomatopoeia": 4,
+}
+
+# ページサイズ（幅, 高さ）。Manga109 の見開き画像のサイズ
+DEFAULT_PAGE_SIZES = ((1654, 1170),)
+
+# コマの外に置くオブジェクトの割合
+OUTSIDE_FRAME_RATE = 0.1
+
+# 複数パーツの RLE のリストにするオブジェクトの割合（オノマトペ以外は 0）
+MULTI_PART_RATE = {"onomatopoeia": 0.3}
+
+# タイトルごとの登場人物数
+CHARACTERS_PER_TITLE = 5
+
+
+def encode_ellipse_rle(box, height: int, width: int, rectangle: bool = False) -> tuple:
+    """
+    バウンディングボックスに内接する楕円（または矩形）のマスクを RLE にする
+
+    Args:
+        box: xmin, ymin, xmax, ymax（xmax, ymax は含まない。ページ内に収まっていること）
+        height: ページの高さ
+        width: ページの幅
+        rectangle: True の場合はバウンディングボックス全体を塗る
+
+    Returns:
+        (圧縮 RLE（counts は str）, ピクセル数)
+    """
+    xmin, ymin, xmax, ymax = (int(v) for v in box)
+    columns = np.arange(xmin, xmax)
+    if rectangle:
+        tops = np.full(len(columns), ymin, dtype=np.int64)
+        bottoms = np.full(len(columns), ymax, dtype=np.int64)
+    else:
+        # 列ごとの楕円の上端・下端（どの列も1ピクセル以上塗る）
+        center_x, center_y = (xmin + xmax) / 2, (ymin + ymax) / 2
+        dx = (columns + 0.5 - center_x) / ((xmax - xmin) / 2)
+        half = (ymax - ymin) / 2 * np.sqrt(np.clip(1 - dx * dx, 0, 1))
+        tops = np.clip(np.round(center_y - half), ymin, ymax - 1).astype(np.int64)
+        bottoms = np.clip(np.round(center_y + half), tops + 1, ymax).astype(np.int64)
+
+    # 列優先（Fortran 順）の非圧縮 RLE: 背景, 前景, 背景, 前景, ..., 背景
+    counts = np.empty(2 * len(columns) + 1, dtype=np.int64)
+    counts[1::2] = bottoms - tops
+    counts[0] = xmin * height + tops[0]
+    counts[2:-1:2] = (height - bottoms[:-1]) + tops[1:]
+    counts[-1] = (height - bottoms[-1]) + (width - xmax) * height
+
+    rle = maskUtils.frPyObjects({"size": [height, width], "counts": counts.tolist()}, height, width)
+    rle["counts"] = rle["counts"].decode("ascii")
+    return rle, int(counts[1::2].sum())
+
+
+def _frame_boxes(rng, num_frames: int, width: int, height: int) -> np.ndarray:
+    """ページを格子状に分割したコマ（xmin, ymin, xmax, ymax の (n, 4) 配列）"""
+    if num_frames == 0:
+        return np.empty((0, 4), dtype=np.int64)
+    num_columns = int(np.ceil(np.sqrt(num_frames)))
+    num_rows = int(np.ceil(num_frames / num_columns))
+    margin = max(2, min(width, height) // 40)
+    cell_w, cell_h = width / num_columns, height / num_rows
+    cells = np.arange(num_frames)
+    xmin = (cells % num_columns) * cell_w + margin
+    ymin = (cells // num_columns) * cell_h + margin
+    # 余白を乱数で揺らす（コマの大きさをそろえない）
+    jitter = rng.uniform(0, margin, size=(num_frames, 2))
+    boxes = np.stack([xmin + jitter[:, 0], ymin + jitter[:, 1],
+                      xmin + cell_w - 2 * margin, ymin + cell_h - 2 * margin], axis=1)
+    return np.floor(boxes).astype(np.int64)
+
+
+def _object_boxes(rng, num_objects: int, frames: np.ndarray, width: int, height: int) -> np.ndarray:
+    """コマの中（一部はページ内の任意の位置）に置いたオブジェクト（(n, 4) 配列）"""
+    if num_objects == 0:
+        return np.empty((0, 4), dtype=np.int64)
+    # 置く領域: いずれかのコマ、またはページ全体
+    regions = np.tile(np.array([0, 0, width, height], dtype=np.int64), (num_objects, 1))
+    if len(frames):
+        inside = rng.random(num_objects) >= OUTSIDE_FRAME_RATE
+        regions[inside] = frames[rng.integers(0, len(frames), size=np.count_nonzero(inside))]
+    region_w = regions[:, 2] - regions[:, 0]
+    region_h = regions[:, 3] - regions[:, 1]
+    # 領域の 10〜45% の大きさ（2ピクセル以上）
+    box_w = np.maximum(2, (region_w * rng.uniform(0.1, 0.45, size=num_objects)).astype(np.int64))
+    box_h = np.maximum(2, (region_h * rng.uniform(0.1, 0.45, size=num_objects)).astype(np.int64))
+    xmin = regions[:, 0] + (rng.random(num_objects) * np.maximum(region_w - box_w, 1)).astype(np.int64)
+    ymin = regions[:, 1] + (rng.random(num_objects) * np.maximum(region_h - box_h, 1)).astype(np.int64)
+    xmax = np.minimum(xmin + box_w, width)
+    ymax = np.minimum(ymin + box_h, height)
+    return np.stack([xmin, ymin, xmax, ymax], axis=1)
+
+
+def _segmentation(rng, category: str, box, height: int, width: int):
+    """オブジェクトのセグメンテーション（RLE、または複数パーツの RLE のリスト）と面積"""
+    rle, area = encode_ellipse_rle(box, height, width, rectangle=category == "frame")
+    xmin, ymin, xmax, ymax = (int(v) for v in box)
+    if rng.random() >= MULTI_PART_RATE.get(category, 0.0) or xmax - xmin < 4:
+        return rle, area
+    # 左半分に重なる2つ目のパーツ（面積は pycocotools で和集合から求める）
+    part, _ = encode_ellipse_rle((xmin, ymin, (xmin + xmax) // 2, ymax), height, width, rectangle=True)
+    merged = maskUtils.merge([_to_bytes_rle(rle), _to_bytes_rle(part)], intersect=False)
+    return [rle, part], int(maskUtils.area(merged))
+
+
+def _to_bytes_rle(rle: dict) -> dict:
+    return {"size": rle["size"], "counts": rle["counts"].encode("ascii")}
+
+
+def _add_xml_objects(page_elem, category: str, ids, boxes, rng, characters):
+    """ページ要素に frame / text / face / body の要素を追加する"""
+    for obj_id, (xmin, ymin, xmax, ymax) in zip(ids, boxes.tolist()):
+        attrib = {"id": f"{obj_id:08x}"}
+        if category in ("face", "body"):
+            attrib["character"] = characters[rng.integers(0, len(characters))]
+        attrib.update(xmin=str(xmin), ymin=str(ymin), xmax=str(xmax), ymax=str(ymax))
+        elem = ET.SubElement(page_elem, category, attrib)
+        if category == "text":
+            elem.text = "セリフ"
+
+
+def generate_title(title: str, output_dir: str, num_pages: int, objects_per_page: dict,
+                   page_size, rng, first_image_id: int = 0, first_ann_id: int = 0) -> dict:
+    """
+    1タイトル分の JSON と XML を書き出す
+
+    Args:
+        title: タイトル名（ファイル名と file_name の先頭に使う）
+        output_dir: 出力先（manga_seg_jsons/ と annotations/ を作る）
+        num_pages: ページ数
+        objects_per_page: カテゴリ名 → 1ページあたりの平均個数（ページごとにポアソン分布で決める）
+        page_size: ページの (幅, 高さ)
+        rng: np.random.Generator
+        first_image_id: 最初の画像ID（データセット全体で重複しないように渡す）
+        first_ann_id: 最初のアノテーションID
+
+    Returns:
+        {'images': 画像数, 'annotations': アノテーション数, 'xml_objects': XML のオブジェクト数}
+    """
+    width, height = (int(v) for v in page_size)
+    category_ids = {category["name"]: category["id"] for category in CATEGORIES}
+    images, annotations = [], []
+    xml_objects = 0
+
+    book = ET.Element("book", {"title": title})
+    characters_elem = ET.SubElement(book, "characters")
+    characters = []
+    for index in range(CHARACTERS_PER_TITLE):
+        character_id = f"{first_ann_id + index:07x}c"
+        characters.append(character_id)
+        ET.SubElement(characters_elem, "character", {"id": character_id, "name": f"{title}_character{index}"})
+    pages_elem = ET.SubElement(book, "pages")
+
+    ann_id = first_ann_id
+    for page_index in range(num_pages):
+        image_id = first_image_id + page_index
+        images.append({"id": image_id, "file_name": f"{title}/{page_index:03d}.jpg",
+                       "width": width, "height": height})
+        page_elem = ET.SubElement(pages_elem, "page", {
+            "index": str(page_index), "width": str(width), "height": str(height)})
+
+        num_frames = int(rng.poisson(objects_per_page.get("frame", 0)))
+        frames = _frame_boxes(rng, num_frames, width, height)
+        for category in category_ids:
+            if category == "frame":
+                boxes = frames
+            else:
+                num_objects = int(rng.poisson(objects_per_page.get(category, 0)))
+                boxes = _object_boxes(rng, num_objects, frames, width, height)
+            ids = range(ann_id, ann_id + len(boxes))
+            for obj_id, box in zip(ids, boxes.tolist()):
+                segmentation, area = _segmentation(rng, category, box, height, width)
+                xmin, ymin, xmax, ymax = box
+                annotations.append({
+                    "id": obj_id, "image_id": image_id, "category_id": category_ids[category],
+                    "bbox": [float(xmin), float(ymin), float(xmax - xmin), float(ymax - ymin)],
+                    "segmentation": segmentation, "area": float(area), "iscrowd": 0,
+                })
+            if category in XML_TAGS:
+                _add_xml_objects(page_elem, category, ids, boxes, rng, characters)
+                xml_objects += len(boxes)
+            ann_id += len(boxes)
+
+    json_path = os.path.join(output_dir, "manga_seg_jsons", f"{title}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"images": images, "annotations": annotations, "categories": CATEGORIES}, f)
+
+    xml_path = os.path.join(output_dir, "annotations", f"{title}.xml")
+    ET.indent(book)
+    ET.ElementTree(book).write(xml_path, encoding="utf-8", xml_declaration=True)
+
+    return {"images": len(images), "annotations": len(annotations), "xml_objects": xml_objects}
+
+
+def generate_synthetic_manga109(output_dir: str, num_titles: int = 4, pages_per_title: int = 20,
+                                objects_per_page: dict = None, page_sizes=DEFAULT_PAGE_SIZES,
+                                seed: int = 0) -> dict:
+    """
+    合成 Manga109 データセット（JSON と XML）を生成する
+
+    Args:
+        output_dir: 出力先（manga_seg_jsons/ と annotations/ を作る）
+        num_titles: タイトル数（Title000, Title001, ...）
+        pages_per_title: 1タイトルあたりのページ数
+        objects_per_page: カテゴリ名 → 1ページあたりの平均個数（None の場合は DEFAULT_OBJECTS_PER_PAGE。
+                          指定しなかったカテゴリは既定値）
+        page_sizes: ページの (幅, 高さ) のリスト（タイトルごとにこの中から選ぶ）
+        seed: 乱数のシード（同じ引数なら同じデータを生成する）
+
+    Returns:
+        {'json_dir', 'xml_dir', 'titles', 'images', 'annotations', 'xml_objects'}
+    """
+    objects_per_page = {**DEFAULT_OBJECTS_PER_PAGE, **(objects_per_page or {})}
+    page_sizes = [tuple(size) for size in page_sizes]
+    json_dir = os.path.join(output_dir, "manga_seg_jsons")
+    xml_dir = os.path.join(output_dir, "annotations")
+    os.makedirs(json_dir, exist_ok=True)
+    os.makedirs(xml_dir, exist_ok=True)
+
+    totals = {"images": 0, "annotations": 0, "xml_objects": 0}
+    for title_index in range(num_titles):
+        # タイトルごとに乱数列を分ける（タイトル数を増やしても既存タイトルの内容は変わらない）
+        rng = np.random.default_rng([seed, title_index])
+        page_size = page_sizes[int(rng.integers(0, len(page_sizes)))]
+        counts = generate_title(f"Title{title_index:03d}", output_dir, pages_per_title, objects_per_page,
+                                page_size, rng, first_image_id=totals["images"],
+                                first_ann_id=totals["annotations"])
+        for key, value in counts.items():
+            totals[key] += value
+
+    print(f"Generated {num_titles} titles, {totals['images']} pages, "
+          f"{totals['annotations']} annotations in {output_dir}")
+    return {"json_dir": json_dir, "xml_dir": xml_dir, "titles": num_titles, **totals}
+
+
+def parse_page_size(text: str):
+    """'幅x高さ' の文字列をページサイズにする（argparse 用）"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_objects_per_page(text: str):
+    """'カテゴリ名=個数' の文字列を (カテゴリ名, 個数) にする（argparse 用）"""
+    category, count = text.split("=")
+    if category not in DEFAULT_OBJECTS_PER_PAGE:
+        raise argparse.ArgumentTypeError(f"Unknown category: {category}")
+    return category, float(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成 Manga109 データセット（COCO 形式 JSON と Manga109 形式 XML）を生成する")
+    parser.add_argument('output_dir', help='出力先（manga_seg_jsons/ と annotations/ を作る）')
+    parser.add_argument('--titles', type=int, default=4, help='タイトル数（既定: 4）')
+    parser.add_argument('--pages', type=int, default=20, help='1タイトルあたりのページ数（既定: 20）')
+    parser.add_argument('--objects', type=parse_objects_per_page, nargs='*', default=[],
+                        metavar='CATEGORY=N', help='1ページあたりの平均個数（例: frame=6 text=12）')
+    parser.add_argument('--page-size', type=parse_page_size, nargs='+', default=list(DEFAULT_PAGE_SIZES),
+                        metavar='WxH', help='ページサイズ（複数指定するとタイトルごとに選ぶ。既定: 1654x1170）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数のシード（既定: 0）')
+    args = parser.parse_args()
+
+    generate_synthetic_manga109(args.output_dir, args.titles, args.pages, dict(args.objects),
+                                args.page_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,61 @@
+import numpy as np
+from packages.frame_spatial_index import FrameGridIndex
+
+# コマ数 × オブジェクト数がこれ以上のページは空間インデックスで判定する
+SPATIAL_INDEX_MIN_PAIRS = 32768
+
+
+def calc_overlap_ratios(frame_boxes, obj_boxes):
+    """
+    コマ × オブジェクトの重なり率（重なり面積 / オブジェクト面積）を一括で計算する
+
+    Args:
+        frame_boxes: コマの xmin, ymin, xmax, ymax（(F, 4) 配列）
+        obj_boxes: オブジェクトの xmin, ymin, xmax, ymax（(O, 4) 配列）
+
+    Returns:
+        (F, O) の float64 配列。面積 0 のオブジェクトは 0
+    """
+    frame_boxes = np.asarray(frame_boxes, dtype=np.int64).reshape(-1, 4)
+    obj_boxes = np.asarray(obj_boxes, dtype=np.int64).reshape(-1, 4)
+
+    overlap_w = np.minimum(frame_boxes[:, None, 2], obj_boxes[None, :, 2]) \
+        - np.maximum(frame_boxes[:, None, 0], obj_boxes[None, :, 0])
+    overlap_h = np.minimum(frame_boxes[:, None, 3], obj_boxes[None, :, 3]) \
+        - np.maximum(frame_boxes[:, None, 1], obj_boxes[None, :, 1])
+    overlap_area = np.maximum(overlap_w, 0) * np.maximum(overlap_h, 0)
+
+    obj_area = (obj_boxes[:, 2] - obj_boxes[:, 0]) * (obj_boxes[:, 3] - obj_boxes[:, 1])
+    ratios = np.zeros(overlap_area.shape, dtype=np.float64)
+    np.divide(overlap_area, obj_area[None, :], out=ratios, where=obj_area[None, :] != 0)
+    return ratios
+
+
+def assign_bboxs_to_frames(frame_boxes, obj_boxes, iou_threshold=0.5):
+    """
+    各コマに含まれるオブジェクトを一括で判定する
+
+    Args:
+        frame_boxes: コマの xmin, ymin, xmax, ymax（(F, 4) 配列）
+        obj_boxes: オブジェクトの xmin, ymin, xmax, ymax（(O, 4) 配列）
+        iou_threshold: オブジェクト面積のうちコマと重なる割合の閾値
+
+    Returns:
+        (F, O) の bool 配列（True: そのコマに含まれる）
+    """
+    frame_boxes = np.asarray(frame_boxes, dtype=np.int64).reshape(-1, 4)
+    obj_boxes = np.asarray(obj_boxes, dtype=np.int64).reshape(-1, 4)
+    # 密なページは重なるコマの候補だけを調べる（閾値 0 以下は重ならない組も含むため総当たり）
+    if iou_threshold > 0 and len(frame_boxes) * len(obj_boxes) >= SPATIAL_INDEX_MIN_PAIRS:
+        return FrameGridIndex(frame_boxes).assign(obj_boxes, iou_threshold)
+    return calc_overlap_ratios(frame_boxes, obj_boxes) >= iou_threshold
+
+
 def get_bboxs_inside_frame(frame_bbox, obj_bboxs, iou_threshold=0.5):
-    frame_xmin = int(frame_bbox["xmin"])
-    frame_ymin = int(frame_bbox["ymin"])
-    frame_xmax = int(frame_bbox["xmax"])
-    frame_ymax = int(frame_bbox["ymax"])
-
-    bouded_obj_bboxs = []
-    for obj_bbox in obj_bboxs:
-        obj_xmin = int(obj_bbox["xmin"])
-        obj_ymin = int(obj_bbox["ymin"])
-        obj_xmax = int(obj_bbox["xmax"])
-        obj_ymax = int(obj_bbox["ymax"])
-
-        overlap_xmin = max(frame_xmin, obj_xmin)
-        overlap_ymin = max(frame_ymin, obj_ymin)
-        overlap_xmax = min(frame_xmax, obj_xmax)
-        overlap_ymax = min(frame_ymax, obj_ymax)
-
-        overlap_area = max(0, overlap_xmax - overlap_xmin) * max(0, overlap_ymax - overlap_ymin)
-        obj_area = (obj_xmax - obj_xmin) * (obj_ymax - obj_ymin)
-        iou = overlap_area / obj_area
-        if iou >= iou_threshold:
-            bouded_obj_bboxs.append(obj_bbox)
-    return bouded_obj_bboxs
\ No newline at end of file
+    frame_box = [int(frame_bbox[key]) for key in ("xmin", "ymin", "xmax", "ymax")]
+    obj_boxes = [[int(obj_bbox[key]) for key in ("xmin", "ymin", "xmax", "ymax")]
+                 for obj_bbox in obj_bboxs]
+
+    inside = assign_bboxs_to_frames([frame_box], obj_boxes, iou_threshold)[0]
+    bouded_obj_bboxs = [obj_bbox for obj_bbox, is_inside in zip(obj_bboxs, inside) if is_inside]
+    return bouded_obj_bboxs
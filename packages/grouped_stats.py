@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+グループ別統計（タイトル別・カテゴリ別・タイトル×カテゴリ別）
+
+任意の指標の値を、グループ番号（タイトル番号、カテゴリ番号、またはその組み合わせ）ごとに
+件数・平均・標準偏差・最小・最大・四分位・ヒストグラムへ集約します。グループの数だけ
+ループせず、(グループ, 値) で1回ソートしてから np.add.reduceat で区間ごとに合計し、
+分位点はソート済みの区間の中の位置から直接読み取ります。109 タイトル × 6 カテゴリでも
+全体の統計1回とほぼ同じ時間で計算できます。
+
+    groups, keys = group_index(title_codes, category_codes)
+    summary = grouped_summary(values, groups, len(keys))
+    counts, edges = grouped_histogram(values, groups, len(keys), bins=50)
+
+summary の各統計量はグループ番号順の配列で、値のないグループは count=0・統計量は NaN です。
+統計量の名前は streaming_stats の summary() と同じ（mean, median, std, min, max, p25, p75）です。
+"""
+
+import numpy as np
+
+# 既定で求める分位点
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quantile_name(q: float) -> str:
+    """分位点の統計量名（0.5 → 'median'、0.25 → 'p25'）"""
+    if q == 0.5:
+        return 'median'
+    return f"p{q * 100:g}"
+
+
+def group_index(*codes):
+    """
+    複数のキー列（0 以上の整数コード）の組み合わせを、出現する組だけの連番にまとめる
+
+    Args:
+        *codes: 行ごとのキーの配列（タイトル番号・カテゴリ番号など。長さはすべて同じ）
+
+    Returns:
+        (行ごとのグループ番号 int64, グループ番号 → キーの組 の配列 (グループ数, キー数))。
+        グループはキーの組の辞書順
+    """
+    codes = [np.asarray(code, dtype=np.int64) for code in codes]
+    dims = tuple(int(code.max()) + 1 if len(code) else 1 for code in codes)
+    flat = np.ravel_multi_index(codes, dims)
+    unique_flat, groups = np.unique(flat, return_inverse=True)
+    keys = np.stack(np.unravel_index(unique_flat, dims), axis=1)
+    return groups.astype(np.int64).ravel(), keys
+
+
+def _sort_by_group(values, groups):
+    """(グループ, 値) の順に並べた値とグループ番号"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    groups = np.asarray(groups, dtype=np.int64).ravel()
+    # 値で並べてからグループ番号で安定ソートする（np.lexsort より速い。
+    # グループ番号が 16 ビットに収まれば安定ソートは基数ソートになる）
+    order = np.argsort(values)
+    group_dtype = np.uint16 if len(groups) == 0 or groups.max() < 1 << 16 else np.int64
+    order = order[np.argsort(groups[order].astype(group_dtype), kind='stable')]
+    return values[order], groups[order]
+
+
+def grouped_summary(values, groups, num_groups: int, quantiles=QUANTILES) -> dict:
+    """
+    グループごとの件数・平均・標準偏差・最小・最大・分位点を1回のソートで求める
+
+    Args:
+        values: 値の配列（NaN は除いておく）
+        groups: 行ごとのグループ番号（0 <= 番号 < num_groups）
+        num_groups: グループ数
+        quantiles: 求める分位点（0〜1。np.percentile の linear 補間と同じ値）
+
+    Returns:
+        統計量名 → グループ番号順の配列 の辞書（count は int64、他は float64）
+    """
+    sorted_values, sorted_groups = _sort_by_group(values, groups)
+    counts = np.bincount(sorted_groups, minlength=num_groups).astype(np.int64)
+    summary = {'count': counts}
+
+    nonempty = np.flatnonzero(counts)
+    starts = (np.cumsum(counts) - counts)[nonempty]
+    sizes = counts[nonempty]
+
+    def per_group(values_nonempty):
+        column = np.full(num_groups, np.nan)
+        column[nonempty] = values_nonempty
+        return column
+
+    if len(nonempty):
+        means = np.add.reduceat(sorted_values, starts) / sizes
+        # 平均を引いてから2乗和をとる（大きな値でも桁落ちしにくい）
+        deviations = sorted_values - np.repeat(means, sizes)
+        variances = np.add.reduceat(deviations * deviations, starts) / sizes
+        ends = starts + sizes - 1
+        summary['mean'] = per_group(means)
+        summary['std'] = per_group(np.sqrt(variances))
+        summary['min'] = per_group(sorted_values[starts])
+        summary['max'] = per_group(sorted_values[ends])
+        for q in quantiles:
+            position = (sizes - 1) * q
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, sizes - 1)
+            low_values = sorted_values[starts + low]
+            high_values = sorted_values[starts + high]
+            summary[quantile_name(q)] = per_group(low_values + (high_values - low_values) * (position - low))
+    else:
+        for name in ['mean', 'std', 'min', 'max'] + [quantile_name(q) for q in quantiles]:
+            summary[name] = np.full(num_groups, np.nan)
+
+    return summary
+
+
+def grouped_histogram(values, groups, num_groups: int, bins=50, range=None):
+    """
+    全グループ共通のビン境界で、グループごとのヒストグラムを1回の np.bincount で求める
+
+    Args:
+        values: 値の配列（NaN は除いておく）
+        groups: 行ごとのグループ番号
+        num_groups: グループ数
+        bins: ビン数またはビン境界（np.histogram の bins と同じ）
+        range: ビンの範囲（None の場合は全値の最小〜最大）
+
+    Returns:
+        (度数の配列 (グループ数, ビン数), ビン境界の配列)
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    groups = np.asarray(groups, dtype=np.int64).ravel()
+    edges = np.histogram_bin_edges(values, bins=bins, range=range)
+    num_bins = len(edges) - 1
+
+    # np.histogram と同じく最後のビンは右端を含み、範囲外の値は数えない
+    bin_index = np.searchsorted(edges, values, side='right') - 1
+    bin_index[values == edges[-1]] = num_bins - 1
+    inside = (bin_index >= 0) & (bin_index < num_bins)
+    counts = np.bincount(groups[inside] * num_bins + bin_index[inside],
+                         minlength=num_groups * num_bins)
+    return counts.reshape(num_groups, num_bins).astype(np.int64), edges
+
+
+def summary_rows(summary: dict, keys: dict) -> dict:
+    """
+    grouped_summary の結果から、値のあるグループだけの表（列名 → 配列）を作る
+
+    Args:
+        summary: grouped_summary の戻り値
+        keys: キー列名 → グループ番号順のキーの配列（manga_title, category など）
+
+    Returns:
+        キー列・統計量の列の辞書（CSV などに保存できる）
+    """
+    nonempty = summary['count'] > 0
+    columns = {name: np.asarray(values)[nonempty] for name, values in keys.items()}
+    for name, values in summary.items():
+        columns[name] = values[nonempty]
+    return columns
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+増分実行（変更されたタイトルだけを集計し直す）
+
+run_collectors はデータセット全体を1回走査しますが、1〜2タイトルのアノテーションを
+修正しただけでも全タイトルの読み込み（RLE の面積計算を含む）と集計をやり直します。
+
+run_collectors_incremental はタイトル（JSON ファイル）ごとにコレクターで集計した結果
+（件数・合計・分位点スケッチ・画像ごとの行）を部分集計として pickle で保存し、
+次回は JSON の内容ハッシュが変わったタイトルだけを読み込み・集計し直します。
+すべてのタイトルの部分集計をファイル順に merge してから save するため、
+レポート・CSV・グラフは全体を走査した場合と同じ内容になります。
+
+キャッシュ（./cache/collector_partials/<タイトル>-<パスのハッシュ>.pkl）のキー:
+    JSON: 内容の SHA-1（サイズ・mtime が同じなら前回のハッシュを使い、読み直さない）
+    コレクター: PARTIAL_CACHE_VERSION とコレクターのモジュール・_SHARED_SOURCE_MODULES（読み込み・
+                列の構成・面積・ファクトテーブル・集計の共通処理）のソースのハッシュ
+                （読み込みや集計処理を変更すると自動的に無効になる）
+"""
+
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+from packages.load_manga_seg_dataset import MangaSegDataset, read_json_files
+from packages.metric_collectors import collect_annotations, create_collectors, save_collectors
+from packages.seg_json_cache import DEFAULT_CACHE_DIR, get_cache_path
+from packages.run_profile import profile_stage
+from packages import (
+    annotation_fact_table, calc_mask_area, load_manga_seg_dataset, metric_collectors, seg_json_cache, streaming_stats
+)
+
+# 部分集計の形式を変えたら上げる
+PARTIAL_CACHE_VERSION = 2
+
+DEFAULT_PARTIAL_CACHE_DIR = "./cache/collector_partials/"
+
+# すべてのコレクターの部分集計が依存するモジュール（ソースのハッシュをキーに含める）
+_SHARED_SOURCE_MODULES = (
+    load_manga_seg_dataset, seg_json_cache, calc_mask_area, annotation_fact_table, metric_collectors, streaming_stats,
+)
+
+_source_hashes = {}
+
+
+def hash_file(path: str) -> str:
+    """ファイル内容の SHA-1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_hash(module) -> str:
+    """モジュールのソースファイルのハッシュ（プロセス内で1回だけ計算）"""
+    path = inspect.getsourcefile(module)
+    if path not in _source_hashes:
+        _source_hashes[path] = hash_file(path)
+    return _source_hashes[path]
+
+
+def get_collector_key(collector_class) -> str:
+    """コレクターの部分集計が有効かどうかの判定に使うキー"""
+    modules = (inspect.getmodule(collector_class),) + _SHARED_SOURCE_MODULES
+    sources = [_source_hash(module) for module in modules]
+    return f"{PARTIAL_CACHE_VERSION}:{collector_class.__qualname__}:" + ":".join(sources)
+
+
+def _get_partial_path(json_path: str, cache_dir: str) -> str:
+    return get_cache_path(json_path, cache_dir) + ".pkl"
+
+
+def _load_partials(partial_path: str):
+    """保存済みの部分集計（なければ None）"""
+    try:
+        with open(partial_path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def _save_partials(partial_path: str, entry: dict):
+    """部分集計を保存する（書き込み途中のファイルは残さない）"""
+    os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+    tmp_path = partial_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, partial_path)
+
+
+def _get_source_entry(json_path: str, cached_entry) -> dict:
+    """JSON のサイズ・mtime・内容ハッシュ（サイズ・mtime が前回と同じならハッシュは計算し直さない）"""
+    stat = os.stat(json_path)
+    entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if (cached_entry is not None and cached_entry.get('size') == stat.st_size
+            and cached_entry.get('mtime_ns') == stat.st_mtime_ns):
+        entry['content_hash'] = cached_entry['content_hash']
+    else:
+        entry['content_hash'] = hash_file(json_path)
+    return entry
+
+
+def run_collectors_incremental(annotations_dir: str, collector_classes, output_dir: str = "./",
+                               render_pool=None, cache_dir: str = DEFAULT_PARTIAL_CACHE_DIR,
+                               seg_cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 1):
+    """
+    変更されたタイトルだけを集計し直し、タイトルごとの部分集計を統合して保存する
+
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
+        collector_classes: 実行するコレクタークラスのリスト
+        output_dir: 結果の保存先ディレクトリ
+        render_pool: グラフを描画する FigureRenderPool（None の場合はこのプロセスで描画）
+        cache_dir: 部分集計の保存先
+        seg_cache_dir: 列指向キャッシュの保存先（集計し直すタイトルの読み込みに使う）
+        workers: 集計し直すタイトルの読み込みに使うプロセス数
+
+    Returns:
+        統合したコレクターのリスト（run_collectors と同じ順）
+    """
+    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+    print(f"Found {len(json_files)} JSON files")
+
+    collector_keys = {collector_class: get_collector_key(collector_class)
+                      for collector_class in collector_classes}
+
+    # タイトルごとに、キャッシュから使える部分集計と集計し直すコレクターを決める
+    current_keys = set(collector_keys.values())
+    current_names = {collector_class.__qualname__ for collector_class in collector_classes}
+    entries = {}
+    partials = {}
+    stale_files = []
+    for json_path in json_files:
+        partial_path = _get_partial_path(json_path, cache_dir)
+        cached_entry = _load_partials(partial_path)
+        entry = _get_source_entry(json_path, cached_entry)
+        entry['partials'] = {}
+        if cached_entry is not None and cached_entry.get('content_hash') == entry['content_hash']:
+            # 今回実行しないコレクターの部分集計は残し、古い版の部分集計だけを捨てる
+            entry['partials'] = {
+                key: collector for key, collector in cached_entry['partials'].items()
+                if key in current_keys or key.split(':')[1] not in current_names
+            }
+        entries[json_path] = (partial_path, entry)
+        partials[json_path] = {
+            collector_class: entry['partials'][key]
+            for collector_class, key in collector_keys.items() if key in entry['partials']
+        }
+        if len(partials[json_path]) < len(collector_classes):
+            stale_files.append(json_path)
+
+    print(f"Reusing cached partial aggregates for {len(json_files) - len(stale_files)} titles, "
+          f"recomputing {len(stale_files)} titles")
+
+    # 変更されたタイトルだけを読み込み、不足しているコレクターで集計する
+    failed_files = set(stale_files)
+    with profile_stage("ingest"):
+        results = read_json_files(stale_files, seg_cache_dir, workers)
+    for json_path, (columns, _) in results:
+        failed_files.discard(json_path)
+        dataset = MangaSegDataset(annotations_dir, [json_path])
+        dataset.add_columns(columns)
+        missing_classes = [collector_class for collector_class in collector_classes
+                           if collector_class not in partials[json_path]]
+        collectors = create_collectors(dataset, missing_classes)
+        collect_annotations(dataset, collectors)
+
+        partial_path, entry = entries[json_path]
+        for collector_class, collector in zip(missing_classes, collectors):
+            partials[json_path][collector_class] = collector
+            entry['partials'][collector_keys[collector_class]] = collector
+        try:
+            _save_partials(partial_path, entry)
+        except OSError as e:
+            print(f"Warning: Failed to write partial aggregates for {json_path}: {e}")
+
+    # 読み込みに失敗したタイトルは load_manga_seg_dataset と同様に読み飛ばす
+    json_files = [json_path for json_path in json_files if json_path not in failed_files]
+
+    # タイトルの部分集計をファイル順に統合して保存する
+    merged_collectors = []
+    for collector_class in collector_classes:
+        if json_files:
+            title_partials = [partials[json_path][collector_class] for json_path in json_files]
+            collector = title_partials[0]
+            for partial in title_partials[1:]:
+                collector.merge(partial)
+        else:
+            collector = collector_class(MangaSegDataset(annotations_dir, []))
+        collector.render_pool = render_pool
+        merged_collectors.append(collector)
+
+    save_collectors(merged_collectors, output_dir)
+
+    return merged_collectors
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日本語フォントの解決（キャッシュ付き）
+
+グラフで使う日本語（CJK）フォントのファイルパスとファミリー名を、matplotlib の
+フォントキャッシュのバージョンをキーにした小さな JSON（./cache/japanese_font.json）に保存します。
+2回目以降は fontManager.ttflist を走査せず、保存したフォントファイルを1つ登録するだけで設定できます。
+
+japanize_matplotlib 同梱の IPAexGothic があればそれを優先し（従来のグラフと同じフォント）、
+なければシステムフォントから JAPANESE_FONTS の優先順で選びます。
+matplotlib は use_japanese_font を呼んだとき（図を描くとき）に初めて import されます。
+"""
+
+import importlib.util
+import json
+import os
+
+DEFAULT_FONT_CACHE_PATH = "./cache/japanese_font.json"
+
+# 日本語フォントのリスト（優先順）
+JAPANESE_FONTS = [
+    'Hiragino Sans',
+    'Hiragino Kaku Gothic Pro',
+    'Yu Gothic',
+    'Meiryo',
+    'MS Gothic',
+    'Takao PGothic',
+    'IPAexGothic',
+    'IPAPGothic',
+    'VL PGothic',
+    'Noto Sans CJK JP',
+]
+
+# このプロセスで登録済みのフォント（None: 未解決、'': 日本語フォントなし）
+_configured_font = None
+
+
+def _font_cache_key() -> dict:
+    """キャッシュのキー（matplotlib とそのフォントキャッシュのバージョン）"""
+    import matplotlib
+    from matplotlib import font_manager
+    return {
+        'matplotlib_version': matplotlib.__version__,
+        'font_cache_version': font_manager.FontManager.__version__,
+    }
+
+
+def _bundled_font_path():
+    """japanize_matplotlib 同梱フォントのパス（import せずに探す。なければ None）"""
+    spec = importlib.util.find_spec('japanize_matplotlib')
+    if spec is None or spec.origin is None:
+        return None
+    font_path = os.path.join(os.path.dirname(spec.origin), 'fonts', 'ipaexg.ttf')
+    return font_path if os.path.exists(font_path) else None
+
+
+def find_japanese_font():
+    """
+    日本語フォントを探す（キャッシュを使わない）
+
+    Returns:
+        {"family": ファミリー名, "path": フォントファイルのパス}、見つからない場合は None
+    """
+    bundled_path = _bundled_font_path()
+    if bundled_path is not None:
+        return {'family': 'IPAexGothic', 'path': bundled_path}
+
+    from matplotlib import font_manager
+    font_paths = {}
+    for font in font_manager.fontManager.ttflist:
+        font_paths.setdefault(font.name, font.fname)
+    for family in JAPANESE_FONTS:
+        if family in font_paths:
+            return {'family': family, 'path': font_paths[family]}
+    return None
+
+
+def resolve_japanese_font(cache_path: str = DEFAULT_FONT_CACHE_PATH, refresh: bool = False):
+    """
+    日本語フォントをキャッシュから取得する（キャッシュがない・古い場合は探して保存する）
+
+    Args:
+        cache_path: キャッシュファイルのパス。None の場合はキャッシュを使わない
+        refresh: True の場合はキャッシュを無視して探し直す
+
+    Returns:
+        {"family": ファミリー名, "path": フォントファイルのパス}、見つからない場合は None
+    """
+    if cache_path is None:
+        return find_japanese_font()
+
+    key = _font_cache_key()
+    if not refresh and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            font = cached.get('font')
+            if cached.get('key') == key and (font is None or os.path.exists(font['path'])):
+                return font
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    font = find_japanese_font()
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'font': font}, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"Warning: Failed to write font cache {cache_path}: {e}")
+    return font
+
+
+def use_japanese_font(cache_path: str = DEFAULT_FONT_CACHE_PATH):
+    """
+    日本語フォントを matplotlib の代替フォントとして設定する
+
+    フォントの解決と登録はプロセスにつき1回だけ行う。plt.style.use（seaborn-v0_8 など）は
+    font.family を上書きするため、スタイルを適用した後、図を描く直前に呼ぶ。
+    英数字はスタイルのフォントのまま、そのフォントにない文字（日本語）だけをこのフォントで描く。
+
+    Args:
+        cache_path: キャッシュファイルのパス。None の場合はキャッシュを使わない
+
+    Returns:
+        設定したファミリー名（日本語フォントが見つからない場合は None）
+    """
+    global _configured_font
+    import matplotlib
+
+    if _configured_font is None:
+        from matplotlib import font_manager
+        font = resolve_japanese_font(cache_path)
+        if font is not None:
+            font_manager.fontManager.addfont(font['path'])
+        _configured_font = font['family'] if font is not None else ''
+    if not _configured_font:
+        return None
+
+    families = list(matplotlib.rcParams['font.family'])
+    if _configured_font not in families:
+        matplotlib.rcParams['font.family'] = families + [_configured_font]
+    return _configured_font
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重いライブラリの遅延 import
+
+matplotlib・seaborn・pandas・pycocotools は import するだけで数百ミリ秒〜数秒かかるため、
+集計モジュールはモジュールの先頭で import せず、lazy_import が返すプロキシを使います。
+プロキシは属性に初めてアクセスしたとき（plt.subplots(...) を呼んだときなど）に
+実際のモジュールを import し、以降はそのモジュールの属性をそのまま返します。
+
+    plt = lazy_import('matplotlib.pyplot')
+    pd = lazy_import('pandas')
+
+これにより、レポート（.txt / .csv）だけを出力する実行（--no-plots）では
+matplotlib・seaborn は一度も import されず、NumPy だけで起動します。
+"""
+
+import importlib
+
+
+class LazyModule:
+    """属性に初めてアクセスしたときにモジュールを import するプロキシ"""
+
+    def __init__(self, module_name: str):
+        self.__dict__['_module_name'] = module_name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_module_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_module_name']}' ({state})>"
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    """
+    モジュールを遅延 import する
+
+    Args:
+        module_name: モジュール名（'matplotlib.pyplot' のようなサブモジュールも可）
+
+    Returns:
+        初めて属性にアクセスしたときに import されるモジュールのプロキシ
+    """
+    return LazyModule(module_name)
+
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+manga_seg_jsons 共通ローダー
+
+manga_seg_jsons/*.json を1ファイルにつき1回だけ読み込み、
+画像・カテゴリ・アノテーションをまとめたデータセットを作成します。
+各 plot_* 関数は annotations_dir の代わりにこのデータセットを受け取れます。
+
+読み込んだ内容は列指向のバイナリキャッシュ（seg_json_cache）に保存され、
+2回目以降はメモリマップで読み込まれます。
+"""
+
+import glob
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from packages.seg_json_cache import DEFAULT_CACHE_DIR, read_seg_json_columns
+from packages.rle_store import RLEStore
+from packages.run_profile import profile_stage
+
+
+class AnnotationList:
+    """
+    列指向のアノテーションを、JSON と同じ形式の辞書として
+    インデックスアクセスできるようにするシーケンス
+    """
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+
+    def __len__(self):
+        return len(self._dataset.ann_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._dataset.get_annotation(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._dataset.get_annotation(i)
+
+
+class MangaSegDataset:
+    """
+    manga_seg_jsons を読み込んだ結果を保持するデータセット
+
+    Attributes:
+        annotations_dir: 読み込んだJSONアノテーションディレクトリ
+        json_files: 読み込んだJSONファイルのパス（読み込み順）
+        images: 画像ID → {'file_name', 'width', 'height', 'area'}
+        categories: カテゴリID → クラス名
+        annotations: アノテーション（JSONファイル順・ファイル内順）
+        anns_by_image: 画像ID → annotations のインデックス配列
+        anns_by_category: カテゴリID → annotations のインデックス配列
+        ann_ids, ann_image_ids, ann_category_ids, ann_bboxes:
+            アノテーションの列（NumPy 配列）
+        ann_seg_areas: セグメンテーションのピクセル数（ない・計算失敗は -1）
+        fact_table: アノテーションのファクトテーブル（AnnotationFactTable、初回アクセス時に作成）
+        rle_store: タイトルごとにメモリマップした RLE（RLEStore、初回アクセス時に作成）
+    """
+
+    def __init__(self, annotations_dir: str, json_files: list):
+        self.annotations_dir = annotations_dir
+        self.json_files = json_files
+        self.images = {}
+        self.categories = {}
+        self.annotations = AnnotationList(self)
+        self._file_columns = []
+        self._concatenate_columns()
+
+    def add_columns(self, *file_columns):
+        """JSONファイルごとの列をデータセットに追加する（連結は1回だけ行う）"""
+        for columns in file_columns:
+            # 画像情報を収集
+            self.images.update(_get_image_info(columns))
+
+            # カテゴリID → クラス名のマッピング
+            self.categories.update(zip(columns['category_ids'].tolist(),
+                                       columns['category_names'].tolist()))
+
+            self._file_columns.append(columns)
+
+        self._concatenate_columns()
+
+    def _concatenate_columns(self):
+        """ファイルごとの列を連結し、索引を作り直す"""
+        files = self._file_columns
+
+        def concat(name, dtype, shape=(0,)):
+            if not files:
+                return np.zeros(shape, dtype=dtype)
+            return np.concatenate([columns[name] for columns in files])
+
+        self.ann_ids = concat('ann_ids', np.int64)
+        self.ann_image_ids = concat('ann_image_ids', np.int64)
+        self.ann_category_ids = concat('ann_category_ids', np.int64)
+        self.ann_bboxes = concat('ann_bboxes', np.float64, (0, 4))
+        self.ann_seg_kinds = concat('ann_seg_kinds', np.int8)
+        self.ann_seg_areas = concat('ann_seg_areas', np.int64)
+
+        # アノテーション → (ファイル番号, ファイル内番号)
+        file_sizes = [len(columns['ann_ids']) for columns in files]
+        self._ann_file_index = np.repeat(np.arange(len(files)), file_sizes)
+        self._ann_file_starts = np.concatenate([[0], np.cumsum(file_sizes)]).astype(np.int64)
+
+        self._anns_by_image = None
+        self._anns_by_category = None
+        self._fact_table = None
+        self._rle_store = None
+
+    @staticmethod
+    def _group_indices(keys: np.ndarray) -> dict:
+        """キー配列をキー → インデックス配列（昇順）の辞書にまとめる"""
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        groups = np.split(order, starts[1:])
+        return {key: group for key, group in zip(unique_keys.tolist(), groups)}
+
+    @property
+    def anns_by_image(self) -> dict:
+        if self._anns_by_image is None:
+            self._anns_by_image = defaultdict(list, self._group_indices(self.ann_image_ids))
+        return self._anns_by_image
+
+    @property
+    def anns_by_category(self) -> dict:
+        if self._anns_by_category is None:
+            self._anns_by_category = defaultdict(list, self._group_indices(self.ann_category_ids))
+        return self._anns_by_category
+
+    @property
+    def fact_table(self):
+        if self._fact_table is None:
+            from packages.annotation_fact_table import AnnotationFactTable
+            self._fact_table = AnnotationFactTable(self)
+        return self._fact_table
+
+    @property
+    def rle_store(self):
+        if self._rle_store is None:
+            self._rle_store = RLEStore(self)
+        return self._rle_store
+
+    def iter_file_columns(self, release_rle: bool = False):
+        """
+        JSONファイルごとの列を読み込み順に返す（RLE をファイル単位でまとめて扱う処理用）
+
+        rle_counts は rle_store のメモリマップを指す。
+
+        Args:
+            release_rle: True の場合、次のファイルに進むときに前のファイルの RLE のページを手放す
+                         （RLE の常駐メモリを1ファイル分に抑える）
+
+        Yields:
+            (そのファイルの最初のアノテーション番号, 列)
+        """
+        store = self.rle_store
+        for file_index, (start, columns) in enumerate(zip(self._ann_file_starts[:-1].tolist(), self._file_columns)):
+            yield start, dict(columns, rle_counts=store.rle_counts(file_index))
+            if release_rle:
+                store.release(file_index)
+
+    def get_segmentation(self, index: int):
+        """
+        アノテーションのセグメンテーション（RLE）を返す
+
+        Returns:
+            {'size': [h, w], 'counts': bytes} またはそのリスト。ない場合は None
+        """
+        return self.rle_store.segmentation(index)
+
+    def get_seg_area(self, index: int):
+        """
+        アノテーションのセグメンテーション面積（ピクセル数）を返す
+
+        Returns:
+            ピクセル数。セグメンテーションがない・計算に失敗した場合は None
+        """
+        area = self.ann_seg_areas[index]
+        return int(area) if area >= 0 else None
+
+    def get_annotation(self, index: int, with_segmentation: bool = True) -> dict:
+        """
+        アノテーションを JSON と同じ形式の辞書で返す
+
+        Args:
+            index: アノテーション番号
+            with_segmentation: False の場合は RLE を取り出さない
+                               （面積は get_seg_area で取得できる）
+        """
+        if index < 0:
+            index += len(self.ann_ids)
+        ann = {
+            'id': int(self.ann_ids[index]),
+            'image_id': int(self.ann_image_ids[index]),
+            'category_id': int(self.ann_category_ids[index]),
+        }
+        bbox = self.ann_bboxes[index]
+        if not np.isnan(bbox[0]):
+            ann['bbox'] = bbox.tolist()
+        if with_segmentation:
+            segmentation = self.get_segmentation(index)
+            if segmentation is not None:
+                ann['segmentation'] = segmentation
+        return ann
+
+    def get_annotation_indices(self, category_ids) -> np.ndarray:
+        """
+        指定カテゴリのアノテーションのインデックスを読み込み順で返す
+
+        Args:
+            category_ids: カテゴリIDまたはカテゴリIDのリスト
+        """
+        if isinstance(category_ids, int):
+            category_ids = [category_ids]
+        return np.flatnonzero(np.isin(self.ann_category_ids, list(category_ids)))
+
+    def get_annotations(self, category_ids, with_segmentation: bool = True) -> list:
+        """
+        指定カテゴリのアノテーションを読み込み順で返す
+
+        Args:
+            category_ids: カテゴリIDまたはカテゴリIDのリスト
+            with_segmentation: False の場合は RLE を取り出さない
+        """
+        return [self.get_annotation(i, with_segmentation)
+                for i in self.get_annotation_indices(category_ids).tolist()]
+
+    def find_category_ids(self, keywords) -> list:
+        """クラス名にキーワードのいずれかを含むカテゴリIDを返す"""
+        return [
+            category_id for category_id, name in self.categories.items()
+            if any(keyword in name.lower() for keyword in keywords)
+        ]
+
+    def get_balloon_category_ids(self) -> list:
+        """吹き出し（balloon）クラスのカテゴリIDを返す"""
+        return self.find_category_ids(('balloon', 'speech'))
+
+    def get_balloon_annotations(self, with_segmentation: bool = True) -> list:
+        """吹き出し（balloon）クラスのアノテーションを返す"""
+        return self.get_annotations(self.get_balloon_category_ids(), with_segmentation)
+
+
+def get_manga_title(file_name: str) -> str:
+    """画像ファイル名からマンガタイトルを取得する"""
+    return file_name.split("/")[0] if "/" in file_name else "unknown"
+
+
+def read_json_file(json_path: str, cache_dir: str = DEFAULT_CACHE_DIR):
+    """
+    1つのJSONファイルを読み込み、列とセグメンテーション面積を返す
+    （ProcessPoolExecutor のワーカーからも呼ばれる）
+
+    Returns:
+        (列名 → NumPy 配列 の辞書, キャッシュから読み込んだかどうか)
+    """
+    with profile_stage("read_columns"):
+        # 面積は JSON を変換するときに計算してキャッシュに保存される（キャッシュから読む場合は計算しない）
+        columns, from_cache = read_seg_json_columns(json_path, cache_dir)
+    return dict(columns), from_cache
+
+
+def load_manga_seg_dataset(annotations_dir: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                           workers: int = 1) -> MangaSegDataset:
+    """
+    manga_seg_jsons の全JSONファイルを1回ずつ読み込む
+
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
+        cache_dir: 列指向キャッシュの保存先。None の場合はキャッシュを使わない
+        workers: 並列に読み込むプロセス数。1 の場合は逐次処理
+                 （結果はファイル順に連結されるため、並列でも逐次と同じになる）
+
+    Returns:
+        MangaSegDataset
+    """
+
+    with profile_stage("ingest"):
+        # JSONファイルを取得
+        json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
+
+        print(f"Found {len(json_files)} JSON files")
+
+        results = read_json_files(json_files, cache_dir, workers)
+
+        dataset = MangaSegDataset(annotations_dir, [])
+        file_columns = []
+        cached_files = 0
+        for json_path, (columns, from_cache) in results:
+            file_columns.append(columns)
+            dataset.json_files.append(json_path)
+            cached_files += from_cache
+
+        with profile_stage("build_dataset"):
+            dataset.add_columns(*file_columns)
+
+    print(f"Successfully processed {len(dataset.json_files)} JSON files ({cached_files} from cache)")
+    print(f"Total images found: {len(dataset.images)}")
+
+    return dataset
+
+
+def read_json_files(json_files: list, cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 1) -> list:
+    """
+    JSONファイルを読み込み、列とセグメンテーション面積をファイル順に返す
+
+    Args:
+        json_files: JSONファイルのパスのリスト
+        cache_dir: 列指向キャッシュの保存先。None の場合はキャッシュを使わない
+        workers: 並列に読み込むプロセス数。1 の場合は逐次処理
+
+    Returns:
+        (JSONファイルのパス, (列, キャッシュから読み込んだかどうか)) のリスト
+        （読み込みに失敗したファイルは含まない）
+    """
+    if workers > 1 and len(json_files) > 1:
+        print(f"Reading JSON files with {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if cache_dir is None:
+                futures = [executor.submit(read_json_file, json_path, cache_dir)
+                           for json_path in json_files]
+                return _collect_results(json_files, lambda i: futures[i].result())
+            # ワーカーはキャッシュを作るだけで、列はこのプロセスでメモリマップで開く
+            # （列を pickle で受け取ると、RLE のバイト列がすべてメモリに載るため）
+            futures = [executor.submit(_read_json_file_cached, json_path, cache_dir)
+                       for json_path in json_files]
+            return _collect_results(json_files, lambda i: _open_cached_columns(
+                json_files[i], cache_dir, *futures[i].result()))
+    return _collect_results(json_files, lambda i: read_json_file(json_files[i], cache_dir))
+
+
+def _read_json_file_cached(json_path: str, cache_dir: str):
+    """
+    read_json_file でキャッシュを作り、キャッシュに書けなかった場合だけ列を返す（ワーカー用）
+
+    Returns:
+        (キャッシュに書けなかった場合の列（書けた場合は None）, キャッシュから読み込んだかどうか)
+    """
+    columns, from_cache = read_json_file(json_path, cache_dir)
+    # キャッシュから開いた列はメモリマップになる（書けなかった場合は変換した配列のまま）
+    cached = all(isinstance(values, np.memmap) for values in columns.values())
+    return (None if cached else columns), from_cache
+
+
+def _open_cached_columns(json_path: str, cache_dir: str, columns, from_cache: bool):
+    """
+    ワーカーが作ったキャッシュの列をメモリマップで開く
+    （キャッシュに書けなかった場合（読み取り専用のキャッシュディレクトリなど）は、
+    このプロセスで JSON を変換し直さずにワーカーの列をそのまま使う）
+    """
+    if columns is None:
+        columns, _ = read_seg_json_columns(json_path, cache_dir)
+    return dict(columns), from_cache
+
+
+def _collect_results(json_files: list, read) -> list:
+    """読み込み結果をファイル順に集め、失敗したファイルは読み飛ばす"""
+    collected = []
+    for i, json_path in enumerate(json_files):
+        print(f"Processing: {os.path.basename(json_path)}")
+        try:
+            collected.append((json_path, read(i)))
+        except Exception as e:
+            print(f"Error reading {json_path}: {e}")
+    return collected
+
+
+def _get_image_info(columns: dict) -> dict:
+    """画像の列を 画像ID → 画像情報 の辞書にする"""
+    return {
+        image_id: {
+            'file_name': file_name,
+            'width': width,
+            'height': height,
+            'area': width * height
+        }
+        for image_id, file_name, width, height in zip(
+            columns['image_ids'].tolist(), columns['image_file_names'].tolist(),
+            columns['image_widths'].tolist(), columns['image_heights'].tolist())
+    }
+
+
+def as_manga_seg_dataset(annotations) -> MangaSegDataset:
+    """
+    annotations_dir（文字列）または読み込み済みデータセットを受け取り、
+    データセットを返す
+    """
+    if isinstance(annotations, MangaSegDataset):
+        return annotations
+    return load_manga_seg_dataset(annotations)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+言語切り替え対応の図
+
+英語版・日本語版で同じデータを描く図を、骨格（ヒストグラム・線・ボックスプロットなど）
+として1回だけ作り、タイトル・軸ラベル・凡例などの文字列だけを言語ごとに差し替えて保存します。
+ヒストグラムの度数とビン境界は compute_histogram で1回だけ計算し、draw_histogram で描きます。
+点の多い散布図は compute_histogram2d で2次元ヒストグラムに集約し、draw_density で
+対数カラースケールの画像1枚として描きます（描画コストは点数ではなくグリッドの大きさで決まる）。
+同じ内容の画像（後方互換用のファイル名など）は再描画せず copy_figure でコピーします。
+"""
+
+import shutil
+import numpy as np
+from packages.run_profile import profile_stage
+
+
+def compute_histogram(values, bins=50):
+    """
+    ax.hist と同じビン分けで度数とビン境界を計算する
+
+    Args:
+        values: 値の配列
+        bins: ビン数またはビン境界（ax.hist の bins と同じ）
+
+    Returns:
+        (度数の配列, ビン境界の配列)
+    """
+    return np.histogram(np.asarray(values), bins=bins)
+
+
+def draw_histogram(ax, histogram, **kwargs):
+    """
+    compute_histogram の結果を ax.hist と同じ見た目で描く
+
+    Args:
+        ax: 描画先の Axes
+        histogram: compute_histogram の戻り値
+        **kwargs: ax.hist に渡すスタイル（color, alpha, edgecolor など）
+    """
+    counts, edges = histogram
+    return ax.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
+
+
+def compute_histogram2d(x, y, bins=200):
+    """
+    散布図の点を2次元ヒストグラム（グリッドごとの点数）に集約する
+
+    Args:
+        x, y: 点の座標の配列
+        bins: グリッドの分割数（np.histogram2d の bins と同じ）
+
+    Returns:
+        (点数の配列 (nx, ny), x のビン境界, y のビン境界)
+    """
+    return np.histogram2d(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), bins=bins)
+
+
+def draw_density(ax, histogram2d, cmap='viridis'):
+    """
+    compute_histogram2d の結果を対数カラースケールの画像1枚として描く（点のないセルは描かない）
+
+    Args:
+        ax: 描画先の Axes
+        histogram2d: compute_histogram2d の戻り値
+        cmap: カラーマップ
+
+    Returns:
+        AxesImage（カラーバーの作成に使う）
+    """
+    from matplotlib.colors import LogNorm
+    counts, x_edges, y_edges = histogram2d
+    return ax.imshow(np.ma.masked_equal(counts.T, 0), origin='lower', aspect='auto',
+                     interpolation='nearest', cmap=cmap,
+                     extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                     norm=LogNorm(vmin=1, vmax=max(counts.max(), 2)))
+
+
+def copy_figure(source_path: str, output_path: str):
+    """保存済みの画像を別のファイル名でも保存する（再描画しない）"""
+    shutil.copyfile(source_path, output_path)
+
+
+class LocalizedFigure:
+    """
+    文字列だけを言語ごとに差し替えて保存できる図
+
+    図の骨格を作るときに、言語で変わる Text（タイトル・軸ラベル・凡例・注記など）を
+    キー付きで bind しておき、save でキー → 文字列の辞書を当てはめて保存する。
+    同じキーに複数の Text を bind した場合、値が文字列ならすべてに同じ文字列を、
+    リストなら bind した順に1つずつ当てはめる。
+    """
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.texts = {}
+        # tight_layout は現在の配置から計算するため、言語ごとに初期配置から調整し直す
+        params = fig.subplotpars
+        self._subplot_params = dict(left=params.left, right=params.right, bottom=params.bottom,
+                                    top=params.top, wspace=params.wspace, hspace=params.hspace)
+
+    def bind(self, key: str, *artists):
+        """言語で変わる Text をキーに登録する"""
+        self.texts.setdefault(key, []).extend(artists)
+
+    def set_labels(self, labels: dict):
+        """キー → 文字列（または文字列のリスト）の辞書を当てはめる"""
+        for key, artists in self.texts.items():
+            value = labels[key]
+            if isinstance(value, str):
+                value = [value] * len(artists)
+            for artist, text in zip(artists, value):
+                artist.set_text(text)
+
+    def save(self, labels: dict, output_path: str, dpi=300):
+        """
+        文字列を差し替えてレイアウトを調整し、画像を保存する
+
+        Args:
+            labels: キー → 文字列（または文字列のリスト）の辞書
+            output_path: 保存先
+            dpi: 解像度
+        """
+        self.set_labels(labels)
+        self.fig.subplots_adjust(**self._subplot_params)
+        with profile_stage("layout"):
+            self.fig.tight_layout()
+        with profile_stage("savefig"):
+            self.fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
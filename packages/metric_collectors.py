@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+メトリクスコレクター
+
+データセットのアノテーションのファクトテーブル（annotation_fact_table）を1回だけ作り、
+すべてのコレクター（frame, body, オノマトペ, 吹き出し…）に渡します。各コレクターは
+テーブルをカテゴリで絞り込み、画像・タイトルごとの集計を NumPy でまとめて行います。
+各 plot_* 関数もこの仕組みを使っているため、個別実行と一括実行の結果は同じです。
+"""
+
+from packages.load_manga_seg_dataset import as_manga_seg_dataset
+from packages.run_profile import profile_stage
+
+# 登録済みコレクタークラス（登録順に実行される）
+REGISTERED_COLLECTORS = []
+
+
+def register_collector(collector_class):
+    """コレクタークラスを一括実行（analyze_all）の対象として登録するデコレーター"""
+    REGISTERED_COLLECTORS.append(collector_class)
+    return collector_class
+
+
+class MetricCollector:
+    """
+    コレクターの基底クラス
+
+    サブクラスは以下を実装する:
+        collect_table(facts): ファクトテーブル（AnnotationFactTable）を集計する
+        save(output_dir): 集計結果からレポート・CSV・グラフを保存する
+        merge(other): 別のタイトルを集計した同じクラスのコレクターを統合する
+
+    増分実行（incremental_collectors）ではタイトルごとの集計結果を pickle でキャッシュし、
+    タイトル順に merge したコレクターで save を呼ぶ。そのため save では self.dataset を
+    使わず、必要な画像情報は __init__ / collect_table でコレクター自身に持たせる。
+
+    グラフは render_figure(self.render_pool, 描画関数, 図の仕様...) で描画すると、
+    run_collectors に FigureRenderPool を渡した場合に別プロセスで描画される。
+    """
+
+    name = ""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.render_pool = None
+
+    def collect_table(self, facts):
+        raise NotImplementedError
+
+    def save(self, output_dir: str):
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def __getstate__(self):
+        # データセットと描画プールはキャッシュしない（統合後に save する側で設定する）
+        state = dict(self.__dict__)
+        state['dataset'] = None
+        state['render_pool'] = None
+        return state
+
+
+def create_collectors(dataset, collector_classes, render_pool=None) -> list:
+    """
+    データセットのファクトテーブルを作り、コレクターを作成する
+    （コレクターの __init__ がファクトテーブルの画像の列を参照するため、テーブルは先に
+    fact_table の段階で作る。作成の時間が他の段階に紛れないようにするため）
+
+    Args:
+        dataset: MangaSegDataset
+        collector_classes: コレクタークラスのリスト
+        render_pool: グラフを描画する FigureRenderPool（None の場合はこのプロセスで描画）
+
+    Returns:
+        コレクターのリスト
+    """
+    with profile_stage("metrics"):
+        with profile_stage("fact_table"):
+            dataset.fact_table
+        collectors = [collector_class(dataset) for collector_class in collector_classes]
+    for collector in collectors:
+        collector.render_pool = render_pool
+    return collectors
+
+
+def collect_annotations(dataset, collectors):
+    """
+    データセットのファクトテーブルを各コレクターに渡して集計する
+
+    Args:
+        dataset: MangaSegDataset
+        collectors: create_collectors で作成したコレクターのリスト
+    """
+    with profile_stage("metrics"):
+        facts = dataset.fact_table
+        for collector in collectors:
+            with profile_stage(collector.name):
+                collector.collect_table(facts)
+
+
+def save_collectors(collectors, output_dir: str):
+    """
+    各コレクターのレポート・CSV・グラフを保存する
+
+    Args:
+        collectors: 集計済みのコレクターのリスト
+        output_dir: 結果の保存先ディレクトリ
+    """
+    with profile_stage("report"):
+        for collector in collectors:
+            with profile_stage(collector.name):
+                collector.save(output_dir)
+
+
+def run_collectors(annotations_dir, collector_classes, output_dir: str = "./", render_pool=None):
+    """
+    アノテーションを1回だけ走査して、すべてのコレクターに配る
+
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        collector_classes: 実行するコレクタークラスのリスト
+        output_dir: 結果の保存先ディレクトリ
+        render_pool: グラフを描画する FigureRenderPool（None の場合はこのプロセスで描画）
+
+    Returns:
+        実行したコレクターのリスト
+    """
+    dataset = as_manga_seg_dataset(annotations_dir)
+    # ファクトテーブルを1回だけ作り、すべてのコレクターで集計する
+    collectors = create_collectors(dataset, collector_classes, render_pool)
+    collect_annotations(dataset, collectors)
+
+    save_collectors(collectors, output_dir)
+
+    return collectors
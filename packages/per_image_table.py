@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+画像ごとの統合テーブル（列指向出力）
+
+各 plot_* の CSV（frame_count_per_image.csv など）は分析ごとに別々の表で、
+読み込むたびに文字列をパースし直す必要があります。このモジュールは全カテゴリの
+画像ごとの集計を1つの表にまとめ、型付きの列として保存します。
+
+列（画像1枚につき1行、データセットの画像順）:
+    image_id, manga_title, file_name, width, height, area
+    <カテゴリ名>_count       アノテーション数（int64）
+    <カテゴリ名>_seg_area    セグメンテーション面積の合計（int64、ピクセル）
+    <カテゴリ名>_bbox_area   バウンディングボックス面積の合計（float64）
+
+保存形式:
+    arrow: Arrow IPC ファイル（per_image_table.arrow）。pyarrow.memory_map で
+           パースなしにメモリマップで読み込める。manga_title は辞書エンコード
+    parquet: Parquet ファイル（per_image_table.parquet）。圧縮されるが読み込み時にデコードが必要
+    npy: 列ごとの .npy（per_image_table/）。np.load(mmap_mode='r') でメモリマップできる
+
+arrow / parquet には pyarrow が必要です（初めて保存するときに import する）。
+pyarrow がない場合は警告を出して npy で保存します。
+"""
+
+import json
+import os
+import numpy as np
+from packages.lazy_import import lazy_import
+from packages.metric_collectors import MetricCollector
+
+pa = lazy_import('pyarrow')
+
+TABLE_NAME = "per_image_table"
+TABLE_FORMATS = ('arrow', 'parquet', 'npy')
+
+
+def category_column_prefix(name: str) -> str:
+    """カテゴリ名を列名・ファイル名に使う形にする（小文字、空白・ハイフンは _）"""
+    return name.strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def build_per_image_table(dataset) -> dict:
+    """
+    ファクトテーブル（dataset.fact_table）から画像ごとの統合テーブルを作る
+
+    Args:
+        dataset: MangaSegDataset
+
+    Returns:
+        列名 → NumPy 配列 の辞書（列の順序はテーブルの列順）
+    """
+    facts = dataset.fact_table
+    images = facts.image_table()
+    columns = {name: images[name] for name in ('image_id', 'manga_title', 'file_name', 'width', 'height', 'area')}
+
+    bbox_areas = facts.bbox_w * facts.bbox_h
+    for category_id in sorted(dataset.categories):
+        prefix = category_column_prefix(dataset.categories[category_id])
+        selected = facts.category_mask(category_id)
+        with_seg = selected & (facts.seg_area >= 0)
+        with_bbox = selected & ~np.isnan(bbox_areas)
+        columns[f'{prefix}_count'] = facts.image_counts(selected)
+        columns[f'{prefix}_seg_area'] = np.bincount(
+            facts.image_idx[with_seg], weights=facts.seg_area[with_seg], minlength=facts.num_images).astype(np.int64)
+        columns[f'{prefix}_bbox_area'] = np.bincount(
+            facts.image_idx[with_bbox], weights=bbox_areas[with_bbox], minlength=facts.num_images)
+
+    return columns
+
+
+def concatenate_tables(tables: list) -> dict:
+    """
+    テーブルを行方向に連結する（片方にしかないカテゴリの列は 0 で埋める）
+
+    Args:
+        tables: build_per_image_table の戻り値のリスト
+
+    Returns:
+        連結したテーブル
+    """
+    names = []
+    for table in tables:
+        names.extend(name for name in table if name not in names)
+    columns = {}
+    for name in names:
+        parts = []
+        for table in tables:
+            if name in table:
+                parts.append(table[name])
+            else:
+                dtype = np.float64 if name.endswith('_bbox_area') else np.int64
+                parts.append(np.zeros(len(table['image_id']), dtype=dtype))
+        columns[name] = np.concatenate(parts)
+    return columns
+
+
+def _to_arrow_table(columns: dict):
+    arrays = []
+    for name, values in columns.items():
+        if name == 'manga_title':
+            arrays.append(pa.array(values.tolist()).dictionary_encode())
+        elif values.dtype.kind == 'U':
+            arrays.append(pa.array(values.tolist(), type=pa.string()))
+        else:
+            arrays.append(pa.array(values))
+    return pa.Table.from_arrays(arrays, names=list(columns))
+
+
+def save_per_image_table(columns: dict, output_dir: str, table_format: str = 'arrow') -> str:
+    """
+    画像ごとの統合テーブルを保存する
+
+    Args:
+        columns: build_per_image_table / concatenate_tables の戻り値
+        output_dir: 保存先ディレクトリ
+        table_format: 'arrow'、'parquet' または 'npy'
+
+    Returns:
+        保存したファイル（npy の場合はディレクトリ）のパス
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format: {table_format}")
+
+    if table_format != 'npy':
+        try:
+            table = _to_arrow_table(columns)
+        except ImportError:
+            print(f"Warning: pyarrow is not installed; saving {TABLE_NAME} as .npy columns instead of {table_format}")
+            table_format = 'npy'
+
+    if table_format == 'arrow':
+        path = os.path.join(output_dir, f"{TABLE_NAME}.arrow")
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    elif table_format == 'parquet':
+        import pyarrow.parquet as pq
+        path = os.path.join(output_dir, f"{TABLE_NAME}.parquet")
+        pq.write_table(table, path)
+    else:
+        path = os.path.join(output_dir, TABLE_NAME)
+        os.makedirs(path, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), values)
+        with open(os.path.join(path, 'columns.json'), 'w', encoding='utf-8') as f:
+            json.dump(list(columns), f)
+
+    print(f"Per-image table saved to: {path} ({len(columns['image_id'])} images, {len(columns)} columns)")
+    return path
+
+
+def load_per_image_table(path: str):
+    """
+    保存した統合テーブルを読み込む（arrow と npy はメモリマップ）
+
+    Args:
+        path: save_per_image_table が返したパス
+
+    Returns:
+        arrow / parquet: pyarrow.Table、npy: 列名 → NumPy 配列（memmap）の辞書
+    """
+    if path.endswith('.arrow'):
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    with open(os.path.join(path, 'columns.json'), 'r', encoding='utf-8') as f:
+        names = json.load(f)
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in names}
+
+
+class PerImageTableCollector(MetricCollector):
+    """
+    画像ごとの統合テーブルを作るコレクター
+
+    ファクトテーブルの列から画像ごとの合計を np.bincount でまとめて作る。
+    analyze_all の --per-image-table 指定時だけ実行する（table_format に形式を設定する）。
+    """
+
+    name = "per_image_table"
+    table_format = 'arrow'
+
+    def __init__(self, dataset):
+        super().__init__(dataset)
+        self.columns = build_per_image_table(dataset)
+
+    def collect_table(self, facts):
+        # 列は __init__ でファクトテーブルからまとめて作る
+        pass
+
+    def merge(self, other):
+        self.columns = concatenate_tables([self.columns, other.columns])
+        return self
+
+    def save(self, output_dir):
+        save_per_image_table(self.columns, output_dir, self.table_format)
@@ -1,236 +1,186 @@
-import json
-import glob
 import os
 import numpy as np
-import matplotlib.pyplot as plt
-import japanize_matplotlib
-import seaborn as sns
-from pycocotools import mask as maskUtils
+from packages.lazy_import import lazy_import
+plt = lazy_import('matplotlib.pyplot')
+from packages.metric_collectors import MetricCollector, register_collector, run_collectors
+from packages.streaming_stats import summarize
+from packages.annotation_fact_table import ColumnParts
+from packages.figure_renderer import render_figure
+from packages.japanese_font import use_japanese_font
+from packages.localized_figure import LocalizedFigure, compute_histogram, draw_histogram, copy_figure
 
-def plot_balloon_size_ratio(annotations_dir: str, output_dir: str = "./"):
+@register_collector
+class BalloonSizeRatioCollector(MetricCollector):
+    """吹き出し領域のサイズ比率を集計するコレクター"""
+    
+    name = "balloon_size_ratio"
+    
+    def __init__(self, dataset):
+        super().__init__(dataset)
+        
+        # 吹き出し（balloon）クラスのカテゴリID
+        self.category_ids = dataset.get_balloon_category_ids()
+        
+        # タイトル名の配列のリスト（title_idx は連結した配列の番号。merge で連結するので重複してよい）
+        self.titles = []
+        self.num_titles = 0
+        
+        # 吹き出しサイズの比率・面積・タイトル番号（アノテーション順の列）
+        self.balloons = ColumnParts({
+            'balloon_ratio': np.empty(0, dtype=np.float64),
+            'balloon_area': np.empty(0, dtype=np.int64),
+            'title_idx': np.empty(0, dtype=np.int32),
+        })
+        
+        # 画像ごとの吹き出し個数
+        self.balloon_counts = ColumnParts({'balloon_count': np.zeros(len(dataset.images), dtype=np.int64)})
+    
+    def collect_table(self, facts):
+        # 吹き出し（balloon）クラスのアノテーションを処理
+        rows = facts.category_mask(self.category_ids)
+        
+        # 吹き出しカウント
+        self.balloon_counts.columns()['balloon_count'] += facts.image_counts(rows)
+        
+        # 吹き出し領域のピクセル数（読み込み時にRLEから計算済み）
+        with_seg = rows & (facts.seg_area >= 0)
+        for row in np.flatnonzero(rows & ~with_seg):
+            print(f"Warning: No segmentation area for balloon in image {facts.image_ids[facts.image_idx[row]]}")
+        
+        # 実際の画像サイズに対する比率を計算して保存
+        balloon_areas = facts.seg_area[with_seg]
+        offset = self.num_titles
+        self.titles.append(np.asarray(facts.titles, dtype=np.str_))
+        self.num_titles += len(facts.titles)
+        self.balloons.append({
+            'balloon_ratio': balloon_areas / facts.image_area[with_seg],
+            'balloon_area': balloon_areas,
+            'title_idx': (facts.title_idx[with_seg] + offset).astype(np.int32),
+        })
+    
+    def merge(self, other):
+        offset = self.num_titles
+        self.titles.extend(other.titles)
+        self.num_titles += other.num_titles
+        for part in other.balloons.parts:
+            self.balloons.append(dict(part, title_idx=part['title_idx'] + offset))
+        self.balloon_counts.extend(other.balloon_counts)
+        return self
+    
+    def save(self, output_dir):
+        # 同じ名前のタイトルに同じ番号を振り直す
+        titles, title_map = np.unique(np.concatenate(self.titles or [np.empty(0, dtype=np.str_)]),
+                                      return_inverse=True)
+        balloons = self.balloons.columns()
+        _save_balloon_size_ratio_results(
+            balloons['balloon_ratio'], balloons['balloon_area'],
+            title_map[balloons['title_idx']], titles,
+            self.balloon_counts.columns()['balloon_count'], output_dir, self.render_pool
+        )
+
+
+def plot_balloon_size_ratio(annotations_dir: str, output_dir: str = "./", render_pool=None):
     """
     吹き出し領域のサイズと画像全体のサイズの比をプロットする
     （吹き出しがある画像のみを対象とする）
     
     Args:
-        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
         output_dir: グラフの保存先ディレクトリ
+        render_pool: グラフを描画する FigureRenderPool（None の場合はこのプロセスで描画）
     """
+    run_collectors(annotations_dir, [BalloonSizeRatioCollector], output_dir, render_pool)
+
+
+def _group_by_title(balloon_ratios, title_codes, titles, limit=10):
+    """
+    吹き出しの多いタイトルから順に、タイトルごとの吹き出しサイズ比率をまとめる
+    （同数のタイトルは先に現れた順）
     
-    # 吹き出しサイズの比率を格納するリスト
-    balloon_ratios = []
-    balloon_areas = []
-    manga_titles = []
-    
-    # 画像情報を格納する辞書
-    image_info = {}
-    images_with_balloons = []
-    
-    # JSONファイルを取得
-    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
-    
-    print(f"Found {len(json_files)} JSON files")
+    Args:
+        balloon_ratios: 吹き出しサイズ比率（アノテーション順）
+        title_codes: 吹き出しごとのタイトル番号（titles の番号）
+        titles: タイトル名の配列
+        limit: まとめるタイトル数の上限
     
-    # 最初に全画像情報を収集
-    for json_path in json_files:
-        print(f"Processing: {os.path.basename(json_path)}")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 画像情報を収集
-        for img in data['images']:
-            image_id = img['id']
-            file_name = img['file_name']
-            width = img['width']
-            height = img['height']
-            
-            image_info[image_id] = {
-                'file_name': file_name,
-                'width': width,
-                'height': height,
-                'area': width * height,
-                'balloon_count': 0
-            }
+    Returns:
+        tuple: (タイトルごとの比率の配列のリスト, タイトル名のリスト)
+    """
+    counts = np.bincount(title_codes, minlength=len(titles))
+    present, first_index = np.unique(title_codes, return_index=True)
+    top = present[np.lexsort((first_index, -counts[present]))[:limit]]
     
-    # 次に吹き出しアノテーションを処理
-    for json_path in json_files:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # カテゴリID → クラス名のマッピング
-        category_map = {cat['id']: cat['name'] for cat in data.get("categories", [])}
-        
-        # 各アノテーションを処理
-        for ann in data['annotations']:
-            category_id = ann['category_id']
-            class_name = category_map.get(category_id, f"category_{category_id}")
-            
-            # 吹き出し（balloon）クラスのみを対象とする
-            if 'balloon' in class_name.lower() or 'speech' in class_name.lower():
-                image_id = ann['image_id']
-                
-                if image_id in image_info:
-                    img_info = image_info[image_id]
-                    
-                    # 吹き出しカウント
-                    img_info['balloon_count'] += 1
-                    
-                    segmentation = ann['segmentation']
-                    
-                    # RLEデコードしてマスクを取得
-                    mask = maskUtils.decode(segmentation)
-                    if len(mask.shape) == 3:
-                        mask = np.any(mask, axis=2).astype(np.uint8)
-                    
-                    # 吹き出し領域のピクセル数を計算
-                    balloon_area = np.sum(mask)
-                    
-                    # 実際の画像サイズに対する比率を計算
-                    ratio = balloon_area / img_info['area']
-                    
-                    # データを保存
-                    balloon_ratios.append(ratio)
-                    balloon_areas.append(balloon_area)
-                    
-                    # マンガタイトルを取得
-                    file_name = img_info['file_name']
-                    manga_title = file_name.split("/")[0] if "/" in file_name else "unknown"
-                    manga_titles.append(manga_title)
+    # タイトル番号順に並べ替えて、タイトルごとに切り分ける（同じタイトル内はアノテーション順のまま）
+    groups = np.split(balloon_ratios[np.argsort(title_codes, kind='stable')], np.cumsum(counts)[:-1])
+    return [groups[code] for code in top], titles[top].tolist()
+
+
+def _save_balloon_size_ratio_results(balloon_ratios, balloon_areas, title_codes, titles, balloon_counts,
+                                     output_dir, render_pool=None):
+    """吹き出しサイズ比率のグラフと統計レポートを保存（title_codes は吹き出しごとの titles の番号）"""
     
-    # 吹き出しがある画像を抽出
-    images_with_balloons = [info for info in image_info.values() if info['balloon_count'] > 0]
+    # 吹き出しがある画像を数える
+    images_with_balloons = int(np.count_nonzero(balloon_counts))
     
     print(f"Found {len(balloon_ratios)} balloon annotations")
-    print(f"Total images: {len(image_info)}")
-    print(f"Images with balloons: {len(images_with_balloons)}")
-    print(f"Images without balloons: {len(image_info) - len(images_with_balloons)}")
+    print(f"Total images: {len(balloon_counts)}")
+    print(f"Images with balloons: {images_with_balloons}")
+    print(f"Images without balloons: {len(balloon_counts) - images_with_balloons}")
     
     if len(balloon_ratios) == 0:
         print("No balloon annotations found!")
         return
     
-    def create_graphs(language='english'):
-        """グラフを作成する関数（言語切り替え対応）"""
-        # 日本語フォント設定
-        # if language == 'japanese':
-        #     plt.rcParams['font.family'] = ['DejaVu Sans', 'Hiragino Sans', 'Yu Gothic', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic', 'VL PGothic', 'Noto Sans CJK JP']
-        
-        # グラフのスタイル設定
-        plt.style.use('seaborn-v0_8')
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        
-        # 言語別のタイトルとラベル
-        if language == 'japanese':
-            fig.suptitle('吹き出しサイズ分析', fontsize=16, fontweight='bold')
-            xlabel_ratio = '吹き出しサイズ比率 (吹き出し面積 / 画像面積)'
-            ylabel_frequency = '頻度'
-            title_ratio_dist = '吹き出しサイズ比率の分布'
-            xlabel_area = '吹き出し面積 (ピクセル)'
-            title_area_dist = '吹き出し面積の分布'
-            xlabel_manga = 'マンガタイトル'
-            ylabel_ratio = '吹き出しサイズ比率'
-            title_boxplot = 'マンガタイトル別吹き出しサイズ比率 (上位10作品)'
-            ylabel_cumulative = '累積確率'
-            title_cumulative = '吹き出しサイズ比率の累積分布'
-            mean_label = f'平均: {mean_ratio:.4f}'
-            median_label = f'中央値: {median_ratio:.4f}'
-            no_titles_text = 'マンガタイトル数が\n不足しています'
-        else:
-            fig.suptitle('Balloon Size Analysis', fontsize=16, fontweight='bold')
-            xlabel_ratio = 'Balloon Size Ratio (Balloon Area / Image Area)'
-            ylabel_frequency = 'Frequency'
-            title_ratio_dist = 'Distribution of Balloon Size Ratios'
-            xlabel_area = 'Balloon Area (pixels)'
-            title_area_dist = 'Distribution of Balloon Areas'
-            xlabel_manga = 'Manga Title'
-            ylabel_ratio = 'Balloon Size Ratio'
-            title_boxplot = 'Balloon Size Ratios by Manga Title (Top 10)'
-            ylabel_cumulative = 'Cumulative Probability'
-            title_cumulative = 'Cumulative Distribution of Balloon Size Ratios'
-            mean_label = f'Mean: {mean_ratio:.4f}'
-            median_label = f'Median: {median_ratio:.4f}'
-            no_titles_text = 'Not enough manga titles\nfor comparison'
-        
-        # 1. 吹き出しサイズ比率のヒストグラム
-        axes[0, 0].hist(balloon_ratios, bins=50, alpha=0.7, color='skyblue', edgecolor='black')
-        axes[0, 0].set_xlabel(xlabel_ratio)
-        axes[0, 0].set_ylabel(ylabel_frequency)
-        axes[0, 0].set_title(title_ratio_dist)
-        axes[0, 0].grid(True, alpha=0.3)
-        
-        # 統計情報を追加
-        axes[0, 0].axvline(mean_ratio, color='red', linestyle='--', label=mean_label)
-        axes[0, 0].axvline(median_ratio, color='orange', linestyle='--', label=median_label)
-        axes[0, 0].legend()
-        
-        # 2. 吹き出し面積のヒストグラム
-        axes[0, 1].hist(balloon_areas, bins=50, alpha=0.7, color='lightgreen', edgecolor='black')
-        axes[0, 1].set_xlabel(xlabel_area)
-        axes[0, 1].set_ylabel(ylabel_frequency)
-        axes[0, 1].set_title(title_area_dist)
-        axes[0, 1].grid(True, alpha=0.3)
-        
-        # 3. 吹き出しサイズ比率のボックスプロット（マンガタイトル別）
-        if len(set(manga_titles)) > 1:
-            # マンガタイトル別のデータを準備
-            title_ratios = {}
-            for title, ratio in zip(manga_titles, balloon_ratios):
-                if title not in title_ratios:
-                    title_ratios[title] = []
-                title_ratios[title].append(ratio)
-            
-            # 上位10タイトルのみ表示（データが多い場合）
-            sorted_titles = sorted(title_ratios.items(), key=lambda x: len(x[1]), reverse=True)[:10]
-            
-            box_data = [ratios for _, ratios in sorted_titles]
-            box_labels = [title for title, _ in sorted_titles]
-            
-            axes[1, 0].boxplot(box_data, labels=box_labels)
-            axes[1, 0].set_xlabel(xlabel_manga)
-            axes[1, 0].set_ylabel(ylabel_ratio)
-            axes[1, 0].set_title(title_boxplot)
-            axes[1, 0].tick_params(axis='x', rotation=45)
-            axes[1, 0].grid(True, alpha=0.3)
-        else:
-            axes[1, 0].text(0.5, 0.5, no_titles_text, 
-                           ha='center', va='center', transform=axes[1, 0].transAxes)
-            axes[1, 0].set_title(title_boxplot)
-        
-        # 4. 累積分布関数
-        sorted_ratios = np.sort(balloon_ratios)
-        cumulative = np.arange(1, len(sorted_ratios) + 1) / len(sorted_ratios)
-        axes[1, 1].plot(sorted_ratios, cumulative, linewidth=2, color='purple')
-        axes[1, 1].set_xlabel(xlabel_ratio)
-        axes[1, 1].set_ylabel(ylabel_cumulative)
-        axes[1, 1].set_title(title_cumulative)
-        axes[1, 1].grid(True, alpha=0.3)
-        
-        # レイアウトの調整
-        plt.tight_layout()
-        
-        return fig
-
-    # 統計情報を事前に計算
-    mean_ratio = np.mean(balloon_ratios)
-    median_ratio = np.median(balloon_ratios)
+    # 統計情報を事前に1回だけ計算（グラフと英語版・日本語版レポートで共有）
+    ratio_stats = summarize(balloon_ratios)
+    area_stats = summarize(balloon_areas)
+    mean_ratio = ratio_stats['mean']
+    median_ratio = ratio_stats['median']
     
-    # 英語版グラフを作成・保存
-    fig_en = create_graphs('english')
-    output_path_en = os.path.join(output_dir, 'balloon_size_ratio_analysis_en.png')
-    fig_en.savefig(output_path_en, dpi=300, bbox_inches='tight')
-    print(f"English graph saved to: {output_path_en}")
+    # ボックスプロット用に上位10タイトルの比率をまとめる（描画プロセスにはタイトルごとの配列だけを渡す）
+    box_data, box_labels = _group_by_title(balloon_ratios, title_codes, titles)
     
-    # 日本語版グラフを作成・保存
-    fig_jp = create_graphs('japanese')
-    output_path_jp = os.path.join(output_dir, 'balloon_size_ratio_analysis_jp.png')
-    fig_jp.savefig(output_path_jp, dpi=300, bbox_inches='tight')
-    print(f"Japanese graph saved to: {output_path_jp}")
+    # 言語別のタイトルとラベル
+    graph_labels = {
+        'japanese': {
+            'suptitle': '吹き出しサイズ分析',
+            'xlabel_ratio': '吹き出しサイズ比率 (吹き出し面積 / 画像面積)',
+            'ylabel_frequency': '頻度',
+            'title_ratio_dist': '吹き出しサイズ比率の分布',
+            'xlabel_area': '吹き出し面積 (ピクセル)',
+            'title_area_dist': '吹き出し面積の分布',
+            'xlabel_manga': 'マンガタイトル',
+            'ylabel_ratio': '吹き出しサイズ比率',
+            'title_boxplot': 'マンガタイトル別吹き出しサイズ比率 (上位10作品)',
+            'ylabel_cumulative': '累積確率',
+            'title_cumulative': '吹き出しサイズ比率の累積分布',
+            'mean_label': f'平均: {mean_ratio:.4f}',
+            'median_label': f'中央値: {median_ratio:.4f}',
+            'no_titles_text': 'マンガタイトル数が\n不足しています',
+        },
+        'english': {
+            'suptitle': 'Balloon Size Analysis',
+            'xlabel_ratio': 'Balloon Size Ratio (Balloon Area / Image Area)',
+            'ylabel_frequency': 'Frequency',
+            'title_ratio_dist': 'Distribution of Balloon Size Ratios',
+            'xlabel_area': 'Balloon Area (pixels)',
+            'title_area_dist': 'Distribution of Balloon Areas',
+            'xlabel_manga': 'Manga Title',
+            'ylabel_ratio': 'Balloon Size Ratio',
+            'title_boxplot': 'Balloon Size Ratios by Manga Title (Top 10)',
+            'ylabel_cumulative': 'Cumulative Probability',
+            'title_cumulative': 'Cumulative Distribution of Balloon Size Ratios',
+            'mean_label': f'Mean: {mean_ratio:.4f}',
+            'median_label': f'Median: {median_ratio:.4f}',
+            'no_titles_text': 'Not enough manga titles\nfor comparison',
+        },
+    }
     
-    # 後方互換性のため、英語版を従来のファイル名でも保存
-    output_path = os.path.join(output_dir, 'balloon_size_ratio_analysis.png')
-    fig_en.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"Graph saved to: {output_path}")
+    # グラフは render_pool があれば別プロセスで描画し、その間にレポートを保存する
+    render_figure(render_pool, _render_balloon_size_ratio_figures,
+                  balloon_ratios, balloon_areas, box_data, box_labels,
+                  ratio_stats, graph_labels, output_dir)
     
     # 統計情報をテキストファイルに保存（英語版）
     stats_path = os.path.join(output_dir, 'balloon_size_statistics.txt')
@@ -238,23 +188,23 @@ def plot_balloon_size_ratio(annotations_dir: str, output_dir: str = "./"):
         f.write("Balloon Size Ratio Statistics (Images with Balloons Only)\n")
         f.write("=" * 60 + "\n")
         f.write(f"Total balloon annotations: {len(balloon_ratios)}\n")
-        f.write(f"Images with balloons: {len(images_with_balloons)}\n\n")
+        f.write(f"Images with balloons: {images_with_balloons}\n\n")
         
         f.write("Ratio Statistics:\n")
-        f.write(f"Mean: {np.mean(balloon_ratios):.6f}\n")
-        f.write(f"Median: {np.median(balloon_ratios):.6f}\n")
-        f.write(f"Standard deviation: {np.std(balloon_ratios):.6f}\n")
-        f.write(f"Min: {np.min(balloon_ratios):.6f}\n")
-        f.write(f"Max: {np.max(balloon_ratios):.6f}\n")
-        f.write(f"25th percentile: {np.percentile(balloon_ratios, 25):.6f}\n")
-        f.write(f"75th percentile: {np.percentile(balloon_ratios, 75):.6f}\n\n")
+        f.write(f"Mean: {ratio_stats['mean']:.6f}\n")
+        f.write(f"Median: {ratio_stats['median']:.6f}\n")
+        f.write(f"Standard deviation: {ratio_stats['std']:.6f}\n")
+        f.write(f"Min: {ratio_stats['min']:.6f}\n")
+        f.write(f"Max: {ratio_stats['max']:.6f}\n")
+        f.write(f"25th percentile: {ratio_stats['p25']:.6f}\n")
+        f.write(f"75th percentile: {ratio_stats['p75']:.6f}\n\n")
         
         f.write("Area Statistics (pixels):\n")
-        f.write(f"Mean: {np.mean(balloon_areas):.2f}\n")
-        f.write(f"Median: {np.median(balloon_areas):.2f}\n")
-        f.write(f"Standard deviation: {np.std(balloon_areas):.2f}\n")
-        f.write(f"Min: {np.min(balloon_areas):.2f}\n")
-        f.write(f"Max: {np.max(balloon_areas):.2f}\n")
+        f.write(f"Mean: {area_stats['mean']:.2f}\n")
+        f.write(f"Median: {area_stats['median']:.2f}\n")
+        f.write(f"Standard deviation: {area_stats['std']:.2f}\n")
+        f.write(f"Min: {area_stats['min']:.2f}\n")
+        f.write(f"Max: {area_stats['max']:.2f}\n")
     
     print(f"Statistics saved to: {stats_path}")
     
@@ -264,28 +214,104 @@ def plot_balloon_size_ratio(annotations_dir: str, output_dir: str = "./"):
         f.write("吹き出しサイズ比率統計（吹き出しがある画像のみ）\n")
         f.write("=" * 60 + "\n")
         f.write(f"吹き出しアノテーション総数: {len(balloon_ratios)}\n")
-        f.write(f"吹き出しがある画像数: {len(images_with_balloons)}\n\n")
+        f.write(f"吹き出しがある画像数: {images_with_balloons}\n\n")
         
         f.write("比率統計:\n")
-        f.write(f"平均: {np.mean(balloon_ratios):.6f}\n")
-        f.write(f"中央値: {np.median(balloon_ratios):.6f}\n")
-        f.write(f"標準偏差: {np.std(balloon_ratios):.6f}\n")
-        f.write(f"最小値: {np.min(balloon_ratios):.6f}\n")
-        f.write(f"最大値: {np.max(balloon_ratios):.6f}\n")
-        f.write(f"25パーセンタイル: {np.percentile(balloon_ratios, 25):.6f}\n")
-        f.write(f"75パーセンタイル: {np.percentile(balloon_ratios, 75):.6f}\n\n")
+        f.write(f"平均: {ratio_stats['mean']:.6f}\n")
+        f.write(f"中央値: {ratio_stats['median']:.6f}\n")
+        f.write(f"標準偏差: {ratio_stats['std']:.6f}\n")
+        f.write(f"最小値: {ratio_stats['min']:.6f}\n")
+        f.write(f"最大値: {ratio_stats['max']:.6f}\n")
+        f.write(f"25パーセンタイル: {ratio_stats['p25']:.6f}\n")
+        f.write(f"75パーセンタイル: {ratio_stats['p75']:.6f}\n\n")
         
         f.write("面積統計 (ピクセル):\n")
-        f.write(f"平均: {np.mean(balloon_areas):.2f}\n")
-        f.write(f"中央値: {np.median(balloon_areas):.2f}\n")
-        f.write(f"標準偏差: {np.std(balloon_areas):.2f}\n")
-        f.write(f"最小値: {np.min(balloon_areas):.2f}\n")
-        f.write(f"最大値: {np.max(balloon_areas):.2f}\n")
+        f.write(f"平均: {area_stats['mean']:.2f}\n")
+        f.write(f"中央値: {area_stats['median']:.2f}\n")
+        f.write(f"標準偏差: {area_stats['std']:.2f}\n")
+        f.write(f"最小値: {area_stats['min']:.2f}\n")
+        f.write(f"最大値: {area_stats['max']:.2f}\n")
     
     print(f"Japanese statistics saved to: {stats_path_jp}")
+
+
+def _render_balloon_size_ratio_figures(balloon_ratios, balloon_areas, box_data, box_labels,
+                                       ratio_stats, graph_labels, output_dir):
+    """吹き出しサイズ比率のグラフ（英語版・日本語版）を描画して保存（FigureRenderPool の別プロセスからも呼ばれる）"""
+    # 日本語フォント設定
+    # if language == 'japanese':
+    #     plt.rcParams['font.family'] = ['DejaVu Sans', 'Hiragino Sans', 'Yu Gothic', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic', 'VL PGothic', 'Noto Sans CJK JP']
+    
+    # グラフのスタイル設定
+    plt.style.use('seaborn-v0_8')
+    use_japanese_font()
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    figure = LocalizedFigure(fig)
+    figure.bind('suptitle', fig.suptitle('', fontsize=16, fontweight='bold'))
+    
+    # 1. 吹き出しサイズ比率のヒストグラム
+    draw_histogram(axes[0, 0], compute_histogram(balloon_ratios, bins=50),
+                   alpha=0.7, color='skyblue', edgecolor='black')
+    figure.bind('xlabel_ratio', axes[0, 0].set_xlabel(''))
+    figure.bind('ylabel_frequency', axes[0, 0].set_ylabel(''))
+    figure.bind('title_ratio_dist', axes[0, 0].set_title(''))
+    axes[0, 0].grid(True, alpha=0.3)
+    
+    # 統計情報を追加
+    axes[0, 0].axvline(ratio_stats['mean'], color='red', linestyle='--', label='mean')
+    axes[0, 0].axvline(ratio_stats['median'], color='orange', linestyle='--', label='median')
+    mean_text, median_text = axes[0, 0].legend().get_texts()
+    figure.bind('mean_label', mean_text)
+    figure.bind('median_label', median_text)
+    
+    # 2. 吹き出し面積のヒストグラム
+    draw_histogram(axes[0, 1], compute_histogram(balloon_areas, bins=50),
+                   alpha=0.7, color='lightgreen', edgecolor='black')
+    figure.bind('xlabel_area', axes[0, 1].set_xlabel(''))
+    figure.bind('ylabel_frequency', axes[0, 1].set_ylabel(''))
+    figure.bind('title_area_dist', axes[0, 1].set_title(''))
+    axes[0, 1].grid(True, alpha=0.3)
+    
+    # 3. 吹き出しサイズ比率のボックスプロット（マンガタイトル別）
+    if len(box_labels) > 1:
+        # 上位10タイトルのみ表示（box_data は _group_by_title でまとめたもの）
+        axes[1, 0].boxplot(box_data, labels=box_labels)
+        figure.bind('xlabel_manga', axes[1, 0].set_xlabel(''))
+        figure.bind('ylabel_ratio', axes[1, 0].set_ylabel(''))
+        figure.bind('title_boxplot', axes[1, 0].set_title(''))
+        axes[1, 0].tick_params(axis='x', rotation=45)
+        axes[1, 0].grid(True, alpha=0.3)
+    else:
+        figure.bind('no_titles_text', axes[1, 0].text(0.5, 0.5, '', 
+                                                      ha='center', va='center', transform=axes[1, 0].transAxes))
+        figure.bind('title_boxplot', axes[1, 0].set_title(''))
+    
+    # 4. 累積分布関数
+    sorted_ratios = np.sort(balloon_ratios)
+    cumulative = np.arange(1, len(sorted_ratios) + 1) / len(sorted_ratios)
+    axes[1, 1].plot(sorted_ratios, cumulative, linewidth=2, color='purple')
+    figure.bind('xlabel_ratio', axes[1, 1].set_xlabel(''))
+    figure.bind('ylabel_cumulative', axes[1, 1].set_ylabel(''))
+    figure.bind('title_cumulative', axes[1, 1].set_title(''))
+    axes[1, 1].grid(True, alpha=0.3)
+    
+    # 英語版グラフを保存
+    output_path_en = os.path.join(output_dir, 'balloon_size_ratio_analysis_en.png')
+    figure.save(graph_labels['english'], output_path_en)
+    print(f"English graph saved to: {output_path_en}")
+    
+    # 日本語版グラフを保存（骨格はそのままで文字列だけ差し替え）
+    output_path_jp = os.path.join(output_dir, 'balloon_size_ratio_analysis_jp.png')
+    figure.save(graph_labels['japanese'], output_path_jp)
+    print(f"Japanese graph saved to: {output_path_jp}")
+    
+    # 後方互換性のため、英語版を従来のファイル名でも保存
+    output_path = os.path.join(output_dir, 'balloon_size_ratio_analysis.png')
+    copy_figure(output_path_en, output_path)
+    print(f"Graph saved to: {output_path}")
     
-    # 日本語版グラフを表示
-    plt.show()
+    # 描画済みの図を閉じてメモリを解放する
+    plt.close(figure.fig)
 
 
 if __name__ == "__main__":
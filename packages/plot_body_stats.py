@@ -7,140 +7,103 @@ Manga109データセットのアノテーションからキャラクター（id=
 個数とサイズ比の統計を分析します。
 """
 
-import json
-import glob
 import os
 import numpy as np
-import pandas as pd
-from pycocotools import mask as maskUtils
-from collections import defaultdict, Counter
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+from packages.metric_collectors import MetricCollector, register_collector, run_collectors
+from packages.streaming_stats import FloatStats, IntegerCounts
+from packages.annotation_fact_table import ColumnParts
 
 
-def plot_body_stats(annotations_dir: str, output_dir: str = "./"):
-    """
-    キャラクター（body）の統計情報を分析する
-    
-    Args:
-        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
-        output_dir: 結果の保存先ディレクトリ
-    """
-    
-    # 統計情報を格納する辞書
-    stats = {
-        'count_per_image': [],
-        'size_ratios': [],
-        'areas': [],
-        'bbox_areas': [],
-        'bbox_ratios': [],
-        'manga_titles': [],
-        'total_annotations': 0,
-        'images_with_annotations': 0
-    }
+@register_collector
+class BodyStatsCollector(MetricCollector):
+    """キャラクター（body, id=4）の統計を集計するコレクター"""
     
-    # 画像情報を格納する辞書
-    image_info = {}
+    name = "body"
     
-    # JSONファイルを取得
-    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
-    
-    print(f"Found {len(json_files)} JSON files")
-    
-    # 最初に全画像情報を収集
-    for json_path in json_files:
-        print(f"Processing: {os.path.basename(json_path)}")
+    def __init__(self, dataset):
+        super().__init__(dataset)
         
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 統計情報を格納する辞書
+        self.stats = {
+            'count_per_image': IntegerCounts(),
+            'size_ratios': FloatStats(),
+            'areas': FloatStats(),
+            'bbox_areas': FloatStats(),
+            'bbox_ratios': FloatStats(),
+            'total_annotations': 0,
+            'images_with_annotations': 0
+        }
         
-        # 画像情報を収集
-        for img in data['images']:
-            image_id = img['id']
-            file_name = img['file_name']
-            width = img['width']
-            height = img['height']
-            
-            image_info[image_id] = {
-                'file_name': file_name,
-                'width': width,
-                'height': height,
-                'area': width * height,
-                'body_count': 0
-            }
+        # 画像ごとの列（個数は collect_table で数える）
+        images = dataset.fact_table.image_table()
+        images['body_count'] = np.zeros(len(images['image_id']), dtype=np.int64)
+        self.images = ColumnParts(images)
     
-    # アノテーションを処理
-    for json_path in json_files:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    def collect_table(self, facts):
+        stats = self.stats
         
-        # カテゴリID → クラス名のマッピング
-        category_map = {cat['id']: cat['name'] for cat in data.get("categories", [])}
+        # キャラクター（body） (id=4, body) のアノテーションを処理
+        rows = facts.category_mask(4)
+        stats['total_annotations'] += int(np.count_nonzero(rows))
+        self.images.columns()['body_count'] += facts.image_counts(rows)
         
-        # 各アノテーションを処理
-        for ann in data['annotations']:
-            image_id = ann['image_id']
-            category_id = ann['category_id']
-            class_name = category_map.get(category_id, f"category_{category_id}")
-            
-            if image_id not in image_info:
-                continue
-            
-            img_info = image_info[image_id]
-            
-            # キャラクター（body） (id=4, body) の処理
-            if category_id == 4:
-                stats['total_annotations'] += 1
-                img_info['body_count'] += 1
-                
-                # セグメンテーションマスクからサイズ比を計算
-                if 'segmentation' in ann:
-                    segmentation = ann['segmentation']
-                    try:
-                        mask = maskUtils.decode(segmentation)
-                        if len(mask.shape) == 3:
-                            mask = np.any(mask, axis=2).astype(np.uint8)
-                        
-                        # セグメンテーション領域のピクセル数を計算
-                        seg_area = np.sum(mask)
-                        size_ratio = seg_area / img_info['area']
-                        
-                        stats['size_ratios'].append(size_ratio)
-                        stats['areas'].append(seg_area)
-                    except Exception as e:
-                        print(f"Warning: Failed to decode segmentation for body: {e}")
-                
-                # バウンディングボックスからサイズを計算
-                if 'bbox' in ann:
-                    bbox = ann['bbox']  # [x, y, width, height]
-                    bbox_area = bbox[2] * bbox[3]
-                    bbox_ratio = bbox_area / img_info['area']
-                    
-                    stats['bbox_areas'].append(bbox_area)
-                    stats['bbox_ratios'].append(bbox_ratio)
-                
-                # マンガタイトルを取得
-                file_name = img_info['file_name']
-                manga_title = file_name.split("/")[0] if "/" in file_name else "unknown"
-                stats['manga_titles'].append(manga_title)
-    
-    # 画像ごとの個数統計を集計（該当アノテーションがある画像のみ）
-    for img_info in image_info.values():
-        if img_info['body_count'] > 0:
-            stats['count_per_image'].append(img_info['body_count'])
-            stats['images_with_annotations'] += 1
-    
-    # 統計情報を出力
-    print(f"\nBody Statistics:")
-    print(f"Total annotations: {stats['total_annotations']}")
-    print(f"Images with body: {stats['images_with_annotations']}")
-    print(f"Size ratios count: {len(stats['size_ratios'])}")
-    
-    # 統計レポートを生成
-    _save_body_reports(stats, output_dir, len(image_info))
-    
-    # CSVファイルも生成
-    _save_body_csv_report(image_info, output_dir)
+        # セグメンテーション領域のピクセル数からサイズ比を計算（読み込み時にRLEから計算済み）
+        with_seg = rows & (facts.seg_area >= 0)
+        seg_areas = facts.seg_area[with_seg]
+        stats['size_ratios'].update(seg_areas / facts.image_area[with_seg])
+        stats['areas'].update(seg_areas)
+        
+        # バウンディングボックスからサイズを計算
+        with_bbox = rows & ~np.isnan(facts.bbox_x)
+        bbox_areas = facts.bbox_w[with_bbox] * facts.bbox_h[with_bbox]
+        stats['bbox_areas'].update(bbox_areas)
+        stats['bbox_ratios'].update(bbox_areas / facts.image_area[with_bbox])
+    
+    def merge(self, other):
+        stats, other_stats = self.stats, other.stats
+        for key in ('count_per_image', 'size_ratios', 'areas', 'bbox_areas', 'bbox_ratios'):
+            stats[key].merge(other_stats[key])
+        stats['total_annotations'] += other_stats['total_annotations']
+        stats['images_with_annotations'] += other_stats['images_with_annotations']
+        self.images.extend(other.images)
+        return self
+    
+    def save(self, output_dir):
+        stats = self.stats
+        images = self.images.columns()
+        counts = images['body_count']
+        
+        # 画像ごとの個数統計を集計（該当アノテーションがある画像のみ）
+        stats['count_per_image'].update(counts[counts > 0])
+        stats['images_with_annotations'] += int(np.count_nonzero(counts))
+        
+        # 統計情報を出力
+        print(f"\nBody Statistics:")
+        print(f"Total annotations: {stats['total_annotations']}")
+        print(f"Images with body: {stats['images_with_annotations']}")
+        print(f"Size ratios count: {len(stats['size_ratios'])}")
+        
+        # 統計レポートを生成
+        _save_body_reports(stats, output_dir, len(counts))
+        
+        # CSVファイルも生成
+        _save_body_csv_report(images, output_dir)
+        
+        print(f"\nBody statistics saved to {output_dir}")
+
+
+def plot_body_stats(annotations_dir: str, output_dir: str = "./"):
+    """
+    キャラクター（body）の統計情報を分析する
     
-    print(f"\nBody statistics saved to {output_dir}")
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ
+    """
+    run_collectors(annotations_dir, [BodyStatsCollector], output_dir)
 
 
 def _save_body_reports(stats, output_dir, total_images):
@@ -158,46 +121,46 @@ def _save_body_reports(stats, output_dir, total_images):
         f.write(f"Images without body: {total_images - stats['images_with_annotations']}\n\n")
         
         if stats['count_per_image']:
-            counts = stats['count_per_image']
+            counts = stats['count_per_image'].summary()
             f.write("Count per Image Statistics (Images with Body Only):\n")
-            f.write(f"Mean: {np.mean(counts):.6f}\n")
-            f.write(f"Median: {np.median(counts):.6f}\n")
-            f.write(f"Standard deviation: {np.std(counts):.6f}\n")
-            f.write(f"Min: {np.min(counts)}\n")
-            f.write(f"Max: {np.max(counts)}\n")
-            f.write(f"25th percentile: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"Mean: {counts['mean']:.6f}\n")
+            f.write(f"Median: {counts['median']:.6f}\n")
+            f.write(f"Standard deviation: {counts['std']:.6f}\n")
+            f.write(f"Min: {counts['min']}\n")
+            f.write(f"Max: {counts['max']}\n")
+            f.write(f"25th percentile: {counts['p25']:.2f}\n")
+            f.write(f"75th percentile: {counts['p75']:.2f}\n\n")
         
         if stats['size_ratios']:
-            ratios = stats['size_ratios']
+            ratios = stats['size_ratios'].summary()
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(ratios):.6f}\n")
-            f.write(f"Median: {np.median(ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(ratios):.6f}\n")
-            f.write(f"Min: {np.min(ratios):.6f}\n")
-            f.write(f"Max: {np.max(ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {ratios['mean']:.6f}\n")
+            f.write(f"Median: {ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {ratios['std']:.6f}\n")
+            f.write(f"Min: {ratios['min']:.6f}\n")
+            f.write(f"Max: {ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {ratios['p75']:.6f}\n\n")
         
         if stats['bbox_ratios']:
-            bbox_ratios = stats['bbox_ratios']
+            bbox_ratios = stats['bbox_ratios'].summary()
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"Median: {bbox_ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {bbox_ratios['std']:.6f}\n")
+            f.write(f"Min: {bbox_ratios['min']:.6f}\n")
+            f.write(f"Max: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {bbox_ratios['p75']:.6f}\n\n")
         
         if stats['areas']:
-            areas = stats['areas']
+            areas = stats['areas'].summary()
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(areas):.2f}\n")
-            f.write(f"Median: {np.median(areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(areas):.2f}\n")
-            f.write(f"Min: {np.min(areas):.2f}\n")
-            f.write(f"Max: {np.max(areas):.2f}\n")
+            f.write(f"Mean: {areas['mean']:.2f}\n")
+            f.write(f"Median: {areas['median']:.2f}\n")
+            f.write(f"Standard deviation: {areas['std']:.2f}\n")
+            f.write(f"Min: {areas['min']:.2f}\n")
+            f.write(f"Max: {areas['max']:.2f}\n")
     
     print(f"Body statistics saved to: {body_stats_path}")
     
@@ -213,69 +176,56 @@ def _save_body_reports(stats, output_dir, total_images):
         f.write(f"キャラクターがない画像数: {total_images - stats['images_with_annotations']}\n\n")
         
         if stats['count_per_image']:
-            counts = stats['count_per_image']
+            counts = stats['count_per_image'].summary()
             f.write("個数統計（キャラクターがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(counts):.6f}\n")
-            f.write(f"中央値: {np.median(counts):.6f}\n")
-            f.write(f"標準偏差: {np.std(counts):.6f}\n")
-            f.write(f"最小値: {np.min(counts)}\n")
-            f.write(f"最大値: {np.max(counts)}\n")
-            f.write(f"25パーセンタイル: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"平均: {counts['mean']:.6f}\n")
+            f.write(f"中央値: {counts['median']:.6f}\n")
+            f.write(f"標準偏差: {counts['std']:.6f}\n")
+            f.write(f"最小値: {counts['min']}\n")
+            f.write(f"最大値: {counts['max']}\n")
+            f.write(f"25パーセンタイル: {counts['p25']:.2f}\n")
+            f.write(f"75パーセンタイル: {counts['p75']:.2f}\n\n")
         
         if stats['size_ratios']:
-            ratios = stats['size_ratios']
+            ratios = stats['size_ratios'].summary()
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(ratios):.6f}\n")
-            f.write(f"中央値: {np.median(ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(ratios):.6f}\n")
-            f.write(f"最小値: {np.min(ratios):.6f}\n")
-            f.write(f"最大値: {np.max(ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"平均: {ratios['mean']:.6f}\n")
+            f.write(f"中央値: {ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {ratios['std']:.6f}\n")
+            f.write(f"最小値: {ratios['min']:.6f}\n")
+            f.write(f"最大値: {ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {ratios['p75']:.6f}\n\n")
         
         if stats['bbox_ratios']:
-            bbox_ratios = stats['bbox_ratios']
+            bbox_ratios = stats['bbox_ratios'].summary()
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"中央値: {bbox_ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {bbox_ratios['std']:.6f}\n")
+            f.write(f"最小値: {bbox_ratios['min']:.6f}\n")
+            f.write(f"最大値: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {bbox_ratios['p75']:.6f}\n\n")
         
         if stats['areas']:
-            areas = stats['areas']
+            areas = stats['areas'].summary()
             f.write("面積統計（ピクセル）:\n")
-            f.write(f"平均: {np.mean(areas):.2f}\n")
-            f.write(f"中央値: {np.median(areas):.2f}\n")
-            f.write(f"標準偏差: {np.std(areas):.2f}\n")
-            f.write(f"最小値: {np.min(areas):.2f}\n")
-            f.write(f"最大値: {np.max(areas):.2f}\n")
+            f.write(f"平均: {areas['mean']:.2f}\n")
+            f.write(f"中央値: {areas['median']:.2f}\n")
+            f.write(f"標準偏差: {areas['std']:.2f}\n")
+            f.write(f"最小値: {areas['min']:.2f}\n")
+            f.write(f"最大値: {areas['max']:.2f}\n")
     
     print(f"Japanese body statistics saved to: {body_stats_path_jp}")
 
 
-def _save_body_csv_report(image_info, output_dir):
+def _save_body_csv_report(images, output_dir):
     """キャラクター統計CSVレポートを保存"""
     
-    # データフレーム用のデータを準備
-    csv_data = []
-    for image_id, info in image_info.items():
-        manga_title = info['file_name'].split("/")[0] if "/" in info['file_name'] else "unknown"
-        csv_data.append({
-            'image_id': image_id,
-            'file_name': info['file_name'],
-            'manga_title': manga_title,
-            'width': info['width'],
-            'height': info['height'],
-            'area': info['area'],
-            'body_count': info['body_count']
-        })
-    
-    # CSVファイルとして保存
-    df = pd.DataFrame(csv_data)
+    # CSVファイルとして保存（画像ごとの列からそのまま作る）
+    df = pd.DataFrame({name: images[name] for name in
+                       ('image_id', 'file_name', 'manga_title', 'width', 'height', 'area', 'body_count')})
     csv_path = os.path.join(output_dir, "body_per_image.csv")
     df = df.sort_values(['manga_title', 'file_name'])
     df.to_csv(csv_path, index=False, encoding='utf-8')
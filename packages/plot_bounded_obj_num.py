@@ -1,7 +1,9 @@
-import matplotlib.pyplot as plt
-import japanize_matplotlib
+from packages.lazy_import import lazy_import
+plt = lazy_import('matplotlib.pyplot')
 import numpy as np
 from collections import Counter
+from packages.figure_renderer import show_figure
+from packages.japanese_font import use_japanese_font
 
 def plot_bounded_obj_num(bouded_obj_num: list, title: str, file_name: str):
     frame_sum = len(bouded_obj_num)
@@ -15,8 +17,9 @@ def plot_bounded_obj_num(bouded_obj_num: list, title: str, file_name: str):
     sorted_keys = sorted(int(k) if isinstance(k, str) else k for k in counter.keys())
     values = [counter[k] for k in sorted_keys]
 
-    # プロットの準備
-    plt.figure(figsize=(12, 6))
+    # プロットの準備（日本語フォントは描画時に設定）
+    use_japanese_font()
+    fig = plt.figure(figsize=(12, 6))
     bars = plt.bar(range(len(sorted_keys)), values)
 
     # グラフの設定
@@ -35,7 +38,7 @@ def plot_bounded_obj_num(bouded_obj_num: list, title: str, file_name: str):
     # グリッドの追加
     plt.grid(axis='y', linestyle='--', alpha=0.7)
 
-    # プロットの表示
+    # プロットの保存（対話実行のときだけ表示し、図を閉じる）
     plt.tight_layout()
     plt.savefig(f'{file_name}.png')
-    plt.show()
\ No newline at end of file
+    show_figure(fig)
\ No newline at end of file
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コマ内のキャラクタ（顔）とテキストの位置関係の分析（JSON 版）
+
+2_text_and_a_character.py はテキスト2つ・顔1つのコマだけを選び、コマごとに
+classify_face_text_layout を呼んでいます。このモジュールは assign_objects_to_frames の
+コマ × オブジェクトの組（データセット全体）から、テキスト k 個・顔 m 個のすべての組み合わせの
+コマの配置（中心の x 座標の順に t=テキスト, c=キャラクタ を並べた "tct" など）を
+classify_face_text_layouts で1回のソートで求め、組み合わせごとの配置の割合をまとめて出力します。
+
+出力:
+    face_text_layout_per_frame.csv    テキストか顔を含むコマごとの個数と配置
+    face_text_layout_counts.csv       (テキスト数, 顔数, 配置) ごとのコマ数と組み合わせ内の割合
+    face_text_layout_statistics.txt   組み合わせごとのコマ数と主な配置
+    face_text_layout_<k>t<m>c.png     コマ数の多い組み合わせの配置の分布（plot_layout）
+"""
+
+import os
+import numpy as np
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+from packages.load_manga_seg_dataset import as_manga_seg_dataset
+from packages.rle_frame_containment import FRAME_CATEGORY_ID, DEFAULT_OVERLAP_THRESHOLD, assign_objects_to_frames
+from packages.classify_face_text_layout import classify_face_text_layouts
+from packages.plot_layout import plot_layout
+from packages.figure_renderer import render_figure
+
+# 図を描く組み合わせの数（テキスト・顔を1つ以上含む組み合わせのうちコマ数の多い順）
+MAX_PLOTTED_CONFIGURATIONS = 6
+
+# レポートに書く組み合わせごとの配置の数
+MAX_REPORTED_LAYOUTS = 5
+
+
+def build_face_text_layout_table(dataset, threshold: float = DEFAULT_OVERLAP_THRESHOLD, use_masks: bool = True) -> dict:
+    """
+    テキストか顔を含むコマごとの個数と配置の表を作る
+    
+    Args:
+        dataset: MangaSegDataset
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        use_masks: False の場合はバウンディングボックスで判定する
+    
+    Returns:
+        列名 → 配列 の辞書（コマのアノテーション番号順）:
+            ann_id, image_id, manga_title, file_name, text_count, face_count,
+            layout（pandas.Categorical）
+    """
+    face_ids = dataset.find_category_ids(('face',))
+    text_ids = dataset.find_category_ids(('text',))
+    assignment = assign_objects_to_frames(dataset, face_ids + text_ids, threshold,
+                                          frame_category_id=FRAME_CATEGORY_ID, use_masks=use_masks)
+    
+    objects = assignment['object']
+    is_face = np.isin(dataset.ann_category_ids[objects], face_ids)
+    bboxes = dataset.ann_bboxes[objects]
+    center_x = bboxes[:, 0] + bboxes[:, 2] / 2
+    frames, layouts = classify_face_text_layouts(assignment['frame'], center_x, is_face)
+    
+    # コマごとの個数（frames は昇順なので searchsorted で行番号に直す）
+    rows = np.searchsorted(frames, assignment['frame'])
+    face_counts = np.bincount(rows[is_face], minlength=len(frames))
+    text_counts = np.bincount(rows[~is_face], minlength=len(frames))
+    
+    facts = dataset.fact_table
+    image_idx = facts.image_idx[frames]
+    has_image = image_idx >= 0
+    manga_titles = np.full(len(frames), 'unknown', dtype=object)
+    file_names = np.full(len(frames), '', dtype=object)
+    manga_titles[has_image] = facts.titles[facts.image_title_idx[image_idx[has_image]]]
+    file_names[has_image] = facts.image_file_names[image_idx[has_image]]
+    
+    return {
+        'ann_id': dataset.ann_ids[frames],
+        'image_id': dataset.ann_image_ids[frames],
+        'manga_title': manga_titles,
+        'file_name': file_names,
+        'text_count': text_counts,
+        'face_count': face_counts,
+        'layout': layouts,
+    }
+
+
+def plot_face_text_layout_stats(annotations_dir, output_dir: str = "./", threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+                                use_masks: bool = True, render_pool=None):
+    """
+    コマ内のテキストと顔の位置関係を、テキスト数・顔数の組み合わせごとに分析する
+    
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        use_masks: False の場合はバウンディングボックスで判定する（XML 版と同じ判定）
+        render_pool: FigureRenderPool（None の場合はこのプロセスで描画）
+    """
+    dataset = as_manga_seg_dataset(annotations_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    total_frames = int(np.count_nonzero(dataset.ann_category_ids == FRAME_CATEGORY_ID))
+    df = pd.DataFrame(build_face_text_layout_table(dataset, threshold, use_masks))
+    print(f"Total frames: {total_frames}")
+    print(f"Frames with texts or faces: {len(df)}")
+    
+    if len(df) == 0:
+        print("Warning: No frames with texts or faces found!")
+        return
+    
+    # (テキスト数, 顔数, 配置) ごとのコマ数と、組み合わせの中での割合
+    counts = (df.groupby(['text_count', 'face_count', 'layout'], observed=True)
+              .size().rename('frames').reset_index())
+    configuration_frames = counts.groupby(['text_count', 'face_count'])['frames'].transform('sum')
+    counts['share'] = counts['frames'] / configuration_frames
+    counts['layout'] = counts['layout'].astype(str)
+    counts = counts.sort_values(['text_count', 'face_count', 'frames', 'layout'],
+                                ascending=[True, True, False, True], kind='stable')
+    
+    _save_face_text_layout_csv_reports(df, counts, output_dir)
+    _save_face_text_layout_statistics_report(counts, total_frames, len(df), threshold, use_masks, output_dir)
+    
+    # テキスト・顔を1つ以上含む、コマ数の多い組み合わせの配置の分布
+    configurations = (counts[(counts['text_count'] > 0) & (counts['face_count'] > 0)]
+                      .groupby(['text_count', 'face_count'])['frames'].sum()
+                      .sort_values(ascending=False, kind='stable'))
+    for text_count, face_count in configurations.index[:MAX_PLOTTED_CONFIGURATIONS]:
+        selected = (df['text_count'] == text_count) & (df['face_count'] == face_count)
+        render_figure(render_pool, plot_layout, df.loc[selected, 'layout'].astype(str).tolist(),
+                      f'コマ内キャラクタと吹き出しの位置関係（テキスト{text_count}つ・キャラ{face_count}人）',
+                      os.path.join(output_dir, f'face_text_layout_{text_count}t{face_count}c'))
+    
+    print(f"Face/text layout statistics saved to {output_dir}")
+
+
+def _save_face_text_layout_csv_reports(df, counts, output_dir):
+    """コマごと・配置ごとの CSV レポートを保存"""
+    
+    per_frame_path = os.path.join(output_dir, 'face_text_layout_per_frame.csv')
+    df.sort_values(['manga_title', 'file_name', 'ann_id'], kind='stable').to_csv(
+        per_frame_path, index=False, encoding='utf-8')
+    print(f"Per-frame layout CSV saved to: {per_frame_path}")
+    
+    counts_path = os.path.join(output_dir, 'face_text_layout_counts.csv')
+    counts.to_csv(counts_path, index=False, encoding='utf-8')
+    print(f"Layout counts CSV saved to: {counts_path}")
+
+
+def _save_face_text_layout_statistics_report(counts, total_frames, layout_frames, threshold, use_masks, output_dir):
+    """組み合わせごとのコマ数と主な配置のレポートを保存"""
+    
+    stats_path = os.path.join(output_dir, 'face_text_layout_statistics.txt')
+    method = "segmentation (RLE)" if use_masks else "bounding box"
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        f.write("Face/Text Layout Statistics (t=text, c=character, ordered by center x)\n")
+        f.write("=" * 40 + "\n")
+        f.write(f"Total frames: {total_frames}\n")
+        f.write(f"Frames with texts or faces: {layout_frames}\n")
+        f.write(f"Containment: {method}, overlap ratio >= {threshold}\n\n")
+        
+        for (text_count, face_count), group in counts.groupby(['text_count', 'face_count'], sort=True):
+            frames = int(group['frames'].sum())
+            f.write(f"{text_count} text(s), {face_count} face(s): {frames} frames "
+                    f"({frames / total_frames * 100:.2f}% of all frames)\n")
+            for layout, layout_frames_count, share in group[['layout', 'frames', 'share']].head(
+                    MAX_REPORTED_LAYOUTS).itertuples(index=False):
+                f.write(f"  {layout:<16}{layout_frames_count:>8}  {share * 100:6.2f}%\n")
+            if len(group) > MAX_REPORTED_LAYOUTS:
+                f.write(f"  ... {len(group) - MAX_REPORTED_LAYOUTS} more layouts\n")
+    
+    print(f"Face/text layout statistics saved to: {stats_path}")
+
+
+if __name__ == "__main__":
+    # テスト実行
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./"
+    plot_face_text_layout_stats(annotations_dir, output_dir)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コマ（フレーム）ごとのオブジェクト数の分析（JSON 版）
+
+main.py / only_text.py のコマ内オブジェクト数は XML のバウンディングボックスで数えていますが、
+このモジュールは manga_seg_jsons の吹き出し・body・face・text・オノマトペを
+rle_frame_containment.assign_objects_to_frames でそれを含むコマに割り当て、
+コマ1つにつき1行の表と、plot_bounded_obj_num と同じ「コマ内のオブジェクト数」の分布を出力します。
+
+割り当てはデータセット全体でタイトルごとに一括して行い、コマごとの個数は
+np.bincount で数えるため、コマやページごとの Python ループはありません。
+1つのオブジェクトが重なった複数のコマに含まれる場合は、それぞれのコマで数えます。
+
+出力:
+    frame_object_counts.csv            コマごとの個数（カテゴリ別・合計）
+    frame_object_statistics.txt / _jp.txt   カテゴリ別の個数の統計
+    frame_object_num.png               コマ内のオブジェクト数の分布（全カテゴリ）
+    frame_<カテゴリ名>_num.png          カテゴリごとの分布
+"""
+
+import os
+import numpy as np
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+from packages.load_manga_seg_dataset import as_manga_seg_dataset
+from packages.rle_frame_containment import FRAME_CATEGORY_ID, DEFAULT_OVERLAP_THRESHOLD, assign_objects_to_frames
+from packages.per_image_table import category_column_prefix
+from packages.streaming_stats import IntegerCounts
+from packages.plot_bounded_obj_num import plot_bounded_obj_num
+from packages.figure_renderer import render_figure
+
+
+def build_frame_object_table(dataset, threshold: float = DEFAULT_OVERLAP_THRESHOLD, use_masks: bool = True):
+    """
+    コマ1つにつき1行の、含まれるオブジェクトの個数の表を作る
+    
+    Args:
+        dataset: MangaSegDataset
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        use_masks: False の場合はバウンディングボックスで判定する
+    
+    Returns:
+        (列名 → NumPy 配列 の辞書, カテゴリ名のリスト, 割り当ての列)
+        列: ann_id, image_id, manga_title, file_name, frame_seg_area,
+            <カテゴリ名>_count（コマ以外のカテゴリごと）, object_count
+    """
+    facts = dataset.fact_table
+    frames = np.flatnonzero(dataset.ann_category_ids == FRAME_CATEGORY_ID)
+    object_category_ids = sorted(category_id for category_id in dataset.categories
+                                 if category_id != FRAME_CATEGORY_ID)
+    assignment = assign_objects_to_frames(dataset, object_category_ids, threshold, use_masks=use_masks)
+    
+    # データセットのアノテーション番号 → 表の行番号
+    frame_rows = np.full(len(dataset.ann_category_ids), -1, dtype=np.int64)
+    frame_rows[frames] = np.arange(len(frames))
+    rows = frame_rows[assignment['frame']]
+    object_categories = dataset.ann_category_ids[assignment['object']]
+    
+    # 画像がないコマのタイトルは unknown
+    image_idx = facts.image_idx[frames]
+    has_image = image_idx >= 0
+    manga_titles = np.full(len(frames), 'unknown', dtype=object)
+    file_names = np.full(len(frames), '', dtype=object)
+    manga_titles[has_image] = facts.titles[facts.image_title_idx[image_idx[has_image]]]
+    file_names[has_image] = facts.image_file_names[image_idx[has_image]]
+    
+    table = {
+        'ann_id': dataset.ann_ids[frames],
+        'image_id': dataset.ann_image_ids[frames],
+        'manga_title': manga_titles,
+        'file_name': file_names,
+        'frame_seg_area': dataset.ann_seg_areas[frames],
+    }
+    category_names = []
+    for category_id in object_category_ids:
+        name = category_column_prefix(dataset.categories[category_id])
+        category_names.append(name)
+        table[f'{name}_count'] = np.bincount(rows[object_categories == category_id], minlength=len(frames))
+    table['object_count'] = np.bincount(rows, minlength=len(frames))
+    return table, category_names, assignment
+
+
+def plot_frame_object_stats(annotations_dir, output_dir: str = "./", threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+                            use_masks: bool = True, render_pool=None):
+    """
+    コマごとのオブジェクト数を分析する
+    - コマごとの個数の表（CSV）
+    - カテゴリ別の個数の統計（最頻値・中央値・平均・標準偏差）
+    - コマ内のオブジェクト数の分布（plot_bounded_obj_num）
+    
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        use_masks: False の場合はバウンディングボックスで判定する（XML 版と同じ判定）
+        render_pool: FigureRenderPool（None の場合はこのプロセスで描画）
+    """
+    dataset = as_manga_seg_dataset(annotations_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    table, category_names, assignment = build_frame_object_table(dataset, threshold, use_masks)
+    num_frames = len(table['ann_id'])
+    print(f"Total frames: {num_frames}")
+    print(f"Assigned object-frame pairs: {len(assignment['object'])} "
+          f"({int(np.count_nonzero(assignment['from_mask']))} by segmentation)")
+    
+    if num_frames == 0:
+        print("Warning: No frames found in any images!")
+        return
+    
+    # カテゴリ別・合計の個数の分布
+    count_columns = [f'{name}_count' for name in category_names] + ['object_count']
+    counts = {}
+    for column in count_columns:
+        counts[column] = IntegerCounts()
+        counts[column].update(table[column])
+    
+    _save_frame_object_statistics_report(counts, category_names, num_frames, threshold, use_masks, output_dir)
+    _save_frame_object_csv_report(table, output_dir)
+    
+    render_figure(render_pool, plot_bounded_obj_num, table['object_count'].tolist(), "コマ内のオブジェクト数",
+                  os.path.join(output_dir, 'frame_object_num'))
+    for name in category_names:
+        render_figure(render_pool, plot_bounded_obj_num, table[f'{name}_count'].tolist(), f"コマ内の{name}の数",
+                      os.path.join(output_dir, f'frame_{name}_num'))
+    
+    print(f"Frame object statistics saved to {output_dir}")
+
+
+def _save_frame_object_statistics_report(counts, category_names, num_frames, threshold, use_masks, output_dir):
+    """コマ内のオブジェクト数の統計レポートを保存"""
+    
+    method = "segmentation (RLE)" if use_masks else "bounding box"
+    method_jp = "セグメンテーション（RLE）" if use_masks else "バウンディングボックス"
+    labels = {f'{name}_count': name for name in category_names}
+    labels['object_count'] = 'all objects'
+    labels_jp = dict(labels, object_count='全オブジェクト')
+    
+    for file_name, header, lines in (
+        ('frame_object_statistics.txt', "Objects per Frame Statistics",
+         [f"Total frames: {num_frames}", f"Containment: {method}, overlap ratio >= {threshold}"]),
+        ('frame_object_statistics_jp.txt', "コマ内のオブジェクト数の統計",
+         [f"コマ数: {num_frames}", f"包含判定: {method_jp}、重なり率 {threshold} 以上"]),
+    ):
+        names = labels_jp if file_name.endswith('_jp.txt') else labels
+        stats_path = os.path.join(output_dir, file_name)
+        with open(stats_path, 'w', encoding='utf-8') as f:
+            f.write(f"{header}\n")
+            f.write("=" * 40 + "\n")
+            for line in lines:
+                f.write(f"{line}\n")
+            f.write("\n")
+            f.write(f"{'category':<16}{'mode':>6}{'median':>9}{'mean':>11}{'std':>11}{'max':>6}{'frames>0':>10}\n")
+            for column, values in counts.items():
+                summary = values.summary()
+                with_objects = num_frames - values.counts.get(0, 0)
+                f.write(f"{names[column]:<16}{values.mode():>6}{summary['median']:>9.1f}{summary['mean']:>11.6f}"
+                        f"{values.std(ddof=1):>11.6f}{summary['max']:>6}{with_objects:>10}\n")
+        
+        print(f"Frame object statistics saved to: {stats_path}")
+
+
+def _save_frame_object_csv_report(table, output_dir):
+    """コマごとの個数の CSV レポートを保存"""
+    
+    csv_path = os.path.join(output_dir, 'frame_object_counts.csv')
+    df = pd.DataFrame(table)
+    df = df.sort_values(['manga_title', 'file_name', 'ann_id'], kind='stable')
+    df.to_csv(csv_path, index=False, encoding='utf-8')
+    
+    print(f"Frame object counts CSV saved to: {csv_path}")
+
+
+if __name__ == "__main__":
+    # テスト実行
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./"
+    plot_frame_object_stats(annotations_dir, output_dir)
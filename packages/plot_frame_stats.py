@@ -1,13 +1,108 @@
-import json
-import glob
 import os
 import numpy as np
-import matplotlib.pyplot as plt
-import japanize_matplotlib
-import seaborn as sns
-from pycocotools import mask as maskUtils
-from collections import defaultdict, Counter
-import pandas as pd
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+from packages.metric_collectors import MetricCollector, register_collector, run_collectors
+from packages.streaming_stats import FloatStats, IntegerCounts
+from packages.annotation_fact_table import ColumnParts
+
+@register_collector
+class FrameStatsCollector(MetricCollector):
+    """フレーム（コマ, id=1）の統計を集計するコレクター"""
+    
+    name = "frame"
+    
+    def __init__(self, dataset):
+        super().__init__(dataset)
+        
+        # フレーム統計を格納するアキュムレーター・列
+        self.frame_ratios = FloatStats()
+        self.frame_bbox_ratios = FloatStats()
+        self.frame_areas = FloatStats()
+        self.frame_bbox_areas = FloatStats()
+        images = dataset.fact_table.image_table()
+        self.images = ColumnParts({
+            'manga_title': images['manga_title'],
+            'file_name': images['file_name'],
+            'frame_count': np.zeros(len(images['file_name']), dtype=np.int64),
+        })
+        
+        self.total_frame_annotations = 0
+        self.processed_frame_annotations = 0
+        self.total_images = len(dataset.images)
+    
+    def collect_table(self, facts):
+        # フレーム（id=1）のみを対象とする（画像がないアノテーションも件数には含める）
+        is_frame = facts.category_id == 1
+        self.total_frame_annotations += int(np.count_nonzero(is_frame))
+        rows = facts.category_mask(1)
+        
+        # フレームカウント
+        self.images.columns()['frame_count'] += facts.image_counts(rows)
+        
+        # フレーム領域のピクセル数（読み込み時にRLEから計算済み）と実際の画像サイズに対する比率
+        with_seg = rows & (facts.seg_area >= 0)
+        frame_areas = facts.seg_area[with_seg]
+        self.frame_ratios.update(frame_areas / facts.image_area[with_seg])
+        self.frame_areas.update(frame_areas)
+        self.processed_frame_annotations += len(frame_areas)
+        
+        # バウンディングボックスの比率を計算
+        with_bbox = rows & ~np.isnan(facts.bbox_x)
+        bbox_areas = facts.bbox_w[with_bbox] * facts.bbox_h[with_bbox]
+        self.frame_bbox_ratios.update(bbox_areas / facts.image_area[with_bbox])
+        self.frame_bbox_areas.update(bbox_areas)
+        
+        # 処理できなかった行を報告
+        for row in np.flatnonzero(rows & ~(with_seg & with_bbox)):
+            image_id = facts.image_ids[facts.image_idx[row]]
+            if not with_seg[row]:
+                print(f"Error processing segmentation for image {image_id}")
+            if not with_bbox[row]:
+                print(f"Error processing bbox for image {image_id}: 'bbox'")
+    
+    def merge(self, other):
+        self.frame_ratios.merge(other.frame_ratios)
+        self.frame_bbox_ratios.merge(other.frame_bbox_ratios)
+        self.frame_areas.merge(other.frame_areas)
+        self.frame_bbox_areas.merge(other.frame_bbox_areas)
+        self.images.extend(other.images)
+        self.total_frame_annotations += other.total_frame_annotations
+        self.processed_frame_annotations += other.processed_frame_annotations
+        self.total_images += other.total_images
+        return self
+    
+    def save(self, output_dir):
+        total_images = self.total_images
+        images = self.images.columns()
+        frame_counts = images['frame_count']
+        
+        print(f"Total frame annotations found: {self.total_frame_annotations}")
+        print(f"Successfully processed frame annotations: {self.processed_frame_annotations}")
+        
+        # フレームがある画像のみの個数統計を計算
+        frame_counts_only = IntegerCounts()
+        frame_counts_only.update(frame_counts[frame_counts > 0])
+        
+        print(f"Total images: {total_images}")
+        print(f"Images with frames: {len(frame_counts_only)}")
+        print(f"Images without frames: {total_images - len(frame_counts_only)}")
+        
+        if len(frame_counts_only) == 0:
+            print("Warning: No frames found in any images!")
+            return
+        
+        # 統計レポートを生成
+        _save_frame_statistics_report(
+            self.frame_ratios, self.frame_bbox_ratios, self.frame_areas, self.frame_bbox_areas,
+            frame_counts_only, total_images, output_dir
+        )
+        
+        # CSVファイルを生成
+        _save_frame_csv_report(images, output_dir)
+        
+        print(f"Frame statistics saved to {output_dir}")
+
 
 def plot_frame_stats(annotations_dir: str, output_dir: str = "./"):
     """
@@ -17,147 +112,11 @@ def plot_frame_stats(annotations_dir: str, output_dir: str = "./"):
     - フレームのサイズ比率（バウンディングボックスベース）
     
     Args:
-        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
         output_dir: 結果の保存先ディレクトリ
     """
-    
-    # フレーム統計を格納するリスト・辞書
-    frame_ratios = []
-    frame_bbox_ratios = []
-    frame_areas = []
-    frame_bbox_areas = []
-    image_frame_counts = defaultdict(int)
-    
-    # 画像情報を格納する辞書
-    image_info = {}
-    
-    # JSONファイルを取得
-    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
-    
-    print(f"Found {len(json_files)} JSON files")
-    
-    # 最初に全画像情報を収集
-    total_processed_files = 0
-    for json_path in json_files:
-        print(f"Processing: {os.path.basename(json_path)}")
-        
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"Error reading {json_path}: {e}")
-            continue
-        
-        # 画像情報を収集
-        for img in data['images']:
-            image_id = img['id']
-            file_name = img['file_name']
-            width = img['width']
-            height = img['height']
-            
-            image_info[image_id] = {
-                'file_name': file_name,
-                'width': width,
-                'height': height,
-                'area': width * height
-            }
-        
-        total_processed_files += 1
-    
-    print(f"Successfully processed {total_processed_files} JSON files")
-    print(f"Total images found: {len(image_info)}")
-    
-    # 次にフレームアノテーションを処理
-    total_frame_annotations = 0
-    processed_frame_annotations = 0
-    
-    for json_path in json_files:
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            continue
-        
-        # カテゴリID → クラス名のマッピング
-        category_map = {cat['id']: cat['name'] for cat in data.get("categories", [])}
-        
-        # 各アノテーションを処理
-        for ann in data['annotations']:
-            category_id = ann['category_id']
-            
-            # フレーム（id=1）のみを対象とする
-            if category_id == 1:
-                total_frame_annotations += 1
-                image_id = ann['image_id']
-                
-                if image_id in image_info:
-                    img_info = image_info[image_id]
-                    file_name = img_info['file_name']
-                    
-                    # フレームカウント
-                    image_frame_counts[file_name] += 1
-                    
-                    try:
-                        # セグメンテーションマスクの処理
-                        segmentation = ann['segmentation']
-                        mask = maskUtils.decode(segmentation)
-                        if len(mask.shape) == 3:
-                            mask = np.any(mask, axis=2).astype(np.uint8)
-                        
-                        # フレーム領域のピクセル数を計算
-                        frame_area = np.sum(mask)
-                        
-                        # 実際の画像サイズに対する比率を計算
-                        ratio = frame_area / img_info['area']
-                        
-                        # データを保存
-                        frame_ratios.append(ratio)
-                        frame_areas.append(frame_area)
-                        
-                        processed_frame_annotations += 1
-                        
-                    except Exception as e:
-                        print(f"Error processing segmentation for image {image_id}: {e}")
-                    
-                    try:
-                        # バウンディングボックスの処理
-                        bbox = ann['bbox']
-                        bbox_width, bbox_height = bbox[2], bbox[3]
-                        bbox_area = bbox_width * bbox_height
-                        
-                        # バウンディングボックスの比率を計算
-                        bbox_ratio = bbox_area / img_info['area']
-                        
-                        frame_bbox_ratios.append(bbox_ratio)
-                        frame_bbox_areas.append(bbox_area)
-                        
-                    except Exception as e:
-                        print(f"Error processing bbox for image {image_id}: {e}")
-    
-    print(f"Total frame annotations found: {total_frame_annotations}")
-    print(f"Successfully processed frame annotations: {processed_frame_annotations}")
-    
-    # フレームがある画像のみの個数統計を計算
-    frame_counts_only = [count for count in image_frame_counts.values() if count > 0]
-    
-    print(f"Total images: {len(image_info)}")
-    print(f"Images with frames: {len(frame_counts_only)}")
-    print(f"Images without frames: {len(image_info) - len(frame_counts_only)}")
-    
-    if len(frame_counts_only) == 0:
-        print("Warning: No frames found in any images!")
-        return
-    
-    # 統計レポートを生成
-    _save_frame_statistics_report(
-        frame_ratios, frame_bbox_ratios, frame_areas, frame_bbox_areas,
-        frame_counts_only, len(image_info), output_dir
-    )
-    
-    # CSVファイルを生成
-    _save_frame_csv_report(image_frame_counts, output_dir)
-    
-    print(f"Frame statistics saved to {output_dir}")
+    run_collectors(annotations_dir, [FrameStatsCollector], output_dir)
 
 
 def _save_frame_statistics_report(frame_ratios, frame_bbox_ratios, frame_areas, frame_bbox_areas, 
@@ -176,41 +135,41 @@ def _save_frame_statistics_report(frame_ratios, frame_bbox_ratios, frame_areas,
         
         if frame_counts:
             f.write("Count per Image Statistics (Images with Frames Only):\n")
-            f.write(f"Mean: {np.mean(frame_counts):.6f}\n")
-            f.write(f"Median: {np.median(frame_counts):.6f}\n")
-            f.write(f"Standard deviation: {np.std(frame_counts):.6f}\n")
-            f.write(f"Min: {np.min(frame_counts)}\n")
-            f.write(f"Max: {np.max(frame_counts)}\n")
-            f.write(f"25th percentile: {np.percentile(frame_counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(frame_counts, 75):.2f}\n\n")
+            f.write(f"Mean: {frame_counts.summary()['mean']:.6f}\n")
+            f.write(f"Median: {frame_counts.summary()['median']:.6f}\n")
+            f.write(f"Standard deviation: {frame_counts.summary()['std']:.6f}\n")
+            f.write(f"Min: {frame_counts.summary()['min']}\n")
+            f.write(f"Max: {frame_counts.summary()['max']}\n")
+            f.write(f"25th percentile: {frame_counts.summary()['p25']:.2f}\n")
+            f.write(f"75th percentile: {frame_counts.summary()['p75']:.2f}\n\n")
         
         if frame_ratios:
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(frame_ratios):.6f}\n")
-            f.write(f"Median: {np.median(frame_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(frame_ratios):.6f}\n")
-            f.write(f"Min: {np.min(frame_ratios):.6f}\n")
-            f.write(f"Max: {np.max(frame_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(frame_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(frame_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {frame_ratios.summary()['mean']:.6f}\n")
+            f.write(f"Median: {frame_ratios.summary()['median']:.6f}\n")
+            f.write(f"Standard deviation: {frame_ratios.summary()['std']:.6f}\n")
+            f.write(f"Min: {frame_ratios.summary()['min']:.6f}\n")
+            f.write(f"Max: {frame_ratios.summary()['max']:.6f}\n")
+            f.write(f"25th percentile: {frame_ratios.summary()['p25']:.6f}\n")
+            f.write(f"75th percentile: {frame_ratios.summary()['p75']:.6f}\n\n")
         
         if frame_bbox_ratios:
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(frame_bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(frame_bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(frame_bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(frame_bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(frame_bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(frame_bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(frame_bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {frame_bbox_ratios.summary()['mean']:.6f}\n")
+            f.write(f"Median: {frame_bbox_ratios.summary()['median']:.6f}\n")
+            f.write(f"Standard deviation: {frame_bbox_ratios.summary()['std']:.6f}\n")
+            f.write(f"Min: {frame_bbox_ratios.summary()['min']:.6f}\n")
+            f.write(f"Max: {frame_bbox_ratios.summary()['max']:.6f}\n")
+            f.write(f"25th percentile: {frame_bbox_ratios.summary()['p25']:.6f}\n")
+            f.write(f"75th percentile: {frame_bbox_ratios.summary()['p75']:.6f}\n\n")
         
         if frame_areas:
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(frame_areas):.2f}\n")
-            f.write(f"Median: {np.median(frame_areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(frame_areas):.2f}\n")
-            f.write(f"Min: {np.min(frame_areas):.2f}\n")
-            f.write(f"Max: {np.max(frame_areas):.2f}\n")
+            f.write(f"Mean: {frame_areas.summary()['mean']:.2f}\n")
+            f.write(f"Median: {frame_areas.summary()['median']:.2f}\n")
+            f.write(f"Standard deviation: {frame_areas.summary()['std']:.2f}\n")
+            f.write(f"Min: {frame_areas.summary()['min']:.2f}\n")
+            f.write(f"Max: {frame_areas.summary()['max']:.2f}\n")
     
     print(f"Frame statistics saved to: {stats_path}")
     
@@ -226,62 +185,53 @@ def _save_frame_statistics_report(frame_ratios, frame_bbox_ratios, frame_areas,
         
         if frame_counts:
             f.write("個数統計（フレームがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(frame_counts):.6f}\n")
-            f.write(f"中央値: {np.median(frame_counts):.6f}\n")
-            f.write(f"標準偏差: {np.std(frame_counts):.6f}\n")
-            f.write(f"最小値: {np.min(frame_counts)}\n")
-            f.write(f"最大値: {np.max(frame_counts)}\n")
-            f.write(f"25パーセンタイル: {np.percentile(frame_counts, 25):.2f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(frame_counts, 75):.2f}\n\n")
+            f.write(f"平均: {frame_counts.summary()['mean']:.6f}\n")
+            f.write(f"中央値: {frame_counts.summary()['median']:.6f}\n")
+            f.write(f"標準偏差: {frame_counts.summary()['std']:.6f}\n")
+            f.write(f"最小値: {frame_counts.summary()['min']}\n")
+            f.write(f"最大値: {frame_counts.summary()['max']}\n")
+            f.write(f"25パーセンタイル: {frame_counts.summary()['p25']:.2f}\n")
+            f.write(f"75パーセンタイル: {frame_counts.summary()['p75']:.2f}\n\n")
         
         if frame_ratios:
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(frame_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(frame_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(frame_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(frame_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(frame_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(frame_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(frame_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {frame_ratios.summary()['mean']:.6f}\n")
+            f.write(f"中央値: {frame_ratios.summary()['median']:.6f}\n")
+            f.write(f"標準偏差: {frame_ratios.summary()['std']:.6f}\n")
+            f.write(f"最小値: {frame_ratios.summary()['min']:.6f}\n")
+            f.write(f"最大値: {frame_ratios.summary()['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {frame_ratios.summary()['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {frame_ratios.summary()['p75']:.6f}\n\n")
         
         if frame_bbox_ratios:
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(frame_bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(frame_bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(frame_bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(frame_bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(frame_bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(frame_bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(frame_bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {frame_bbox_ratios.summary()['mean']:.6f}\n")
+            f.write(f"中央値: {frame_bbox_ratios.summary()['median']:.6f}\n")
+            f.write(f"標準偏差: {frame_bbox_ratios.summary()['std']:.6f}\n")
+            f.write(f"最小値: {frame_bbox_ratios.summary()['min']:.6f}\n")
+            f.write(f"最大値: {frame_bbox_ratios.summary()['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {frame_bbox_ratios.summary()['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {frame_bbox_ratios.summary()['p75']:.6f}\n\n")
         
         if frame_areas:
             f.write("面積統計（ピクセル）:\n")
-            f.write(f"平均: {np.mean(frame_areas):.2f}\n")
-            f.write(f"中央値: {np.median(frame_areas):.2f}\n")
-            f.write(f"標準偏差: {np.std(frame_areas):.2f}\n")
-            f.write(f"最小値: {np.min(frame_areas):.2f}\n")
-            f.write(f"最大値: {np.max(frame_areas):.2f}\n")
+            f.write(f"平均: {frame_areas.summary()['mean']:.2f}\n")
+            f.write(f"中央値: {frame_areas.summary()['median']:.2f}\n")
+            f.write(f"標準偏差: {frame_areas.summary()['std']:.2f}\n")
+            f.write(f"最小値: {frame_areas.summary()['min']:.2f}\n")
+            f.write(f"最大値: {frame_areas.summary()['max']:.2f}\n")
     
     print(f"Japanese frame statistics saved to: {stats_path_jp}")
 
 
-def _save_frame_csv_report(image_frame_counts, output_dir):
+def _save_frame_csv_report(images, output_dir):
     """フレーム統計CSVレポートを保存"""
     
     csv_path = os.path.join(output_dir, 'frame_count_per_image.csv')
     
-    # CSVデータを準備
-    csv_data = []
-    for file_name, count in image_frame_counts.items():
-        manga_title = file_name.split("/")[0] if "/" in file_name else "unknown"
-        csv_data.append({
-            'manga_title': manga_title,
-            'file_name': file_name,
-            'frame_count': count
-        })
-    
-    # DataFrameに変換して保存
-    df = pd.DataFrame(csv_data)
+    # フレームがある画像の行だけをDataFrameに変換して保存
+    has_frames = images['frame_count'] > 0
+    df = pd.DataFrame({name: values[has_frames] for name, values in images.items()})
     df = df.sort_values(['manga_title', 'file_name'])
     df.to_csv(csv_path, index=False, encoding='utf-8')
     
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タイトル別・カテゴリ別の統計分析
+
+各 plot_* のレポートはデータセット全体の平均・中央値・標準偏差だけですが、
+このモジュールは次の指標をマンガタイトル別・カテゴリ別・タイトル×カテゴリ別に集計し、
+表（CSV）と、カテゴリごとの図を並べてタイトル別の分布を描いた図（small multiples）を保存します。
+
+    size_ratio:       セグメンテーション面積 / 画像面積（アノテーションごと）
+    bbox_ratio:       バウンディングボックス面積 / 画像面積（アノテーションごと）
+    count_per_image:  1画像あたりの個数（そのカテゴリが1個以上ある画像ごと）
+
+集計は grouped_stats（1回のソートと np.add.reduceat）で行うため、109 タイトル分の
+表も全体の統計とほぼ同じ時間で作れます。
+"""
+
+import os
+import numpy as np
+from packages.lazy_import import lazy_import
+plt = lazy_import('matplotlib.pyplot')
+pd = lazy_import('pandas')
+from packages.metric_collectors import MetricCollector, register_collector, run_collectors
+from packages.grouped_stats import grouped_summary, grouped_histogram, summary_rows
+from packages.figure_renderer import render_figure
+from packages.japanese_font import use_japanese_font
+from packages.localized_figure import LocalizedFigure
+
+# 集計する指標
+METRICS = ('size_ratio', 'bbox_ratio', 'count_per_image')
+
+# タイトル別ヒストグラムのビン数
+HIST_BINS = 40
+
+METRIC_LABELS = {
+    'english': {
+        'size_ratio': 'Segmentation area ratio (area / image area)',
+        'bbox_ratio': 'BBox area ratio (bbox area / image area)',
+        'count_per_image': 'Annotations per image (images with at least one)',
+    },
+    'japanese': {
+        'size_ratio': 'セグメンテーション面積比 (面積 / 画像面積)',
+        'bbox_ratio': 'BBox面積比 (BBox面積 / 画像面積)',
+        'count_per_image': '1画像あたりの個数（1個以上ある画像）',
+    },
+}
+
+
+@register_collector
+class GroupedStatsCollector(MetricCollector):
+    """タイトル別・カテゴリ別・タイトル×カテゴリ別の統計を集計するコレクター"""
+    
+    name = "grouped_stats"
+    
+    def __init__(self, dataset):
+        super().__init__(dataset)
+        
+        # カテゴリID → カテゴリ名
+        self.category_names = dict(dataset.categories)
+        
+        # タイトル名の配列のリスト（行のタイトル番号は連結した配列の番号。merge で連結するので重複してよい）
+        self.titles = []
+        self.num_titles = 0
+        
+        # 指標ごとの行（タイトル番号・カテゴリID・値）。collect_table・merge のたびに連結し直すと
+        # タイトル数の2乗に比例してコピーが増えるため、配列のリストとして持ち、save で1回だけ連結する
+        self.rows = {metric: {'title': [], 'category': [], 'value': []} for metric in METRICS}
+    
+    def _append(self, metric, title_codes, category_ids, values):
+        rows = self.rows[metric]
+        rows['title'].append(np.asarray(title_codes, dtype=np.int32))
+        rows['category'].append(np.asarray(category_ids, dtype=np.int16))
+        rows['value'].append(np.asarray(values, dtype=np.float64))
+    
+    def _append_titles(self, titles):
+        """タイトル名を追加し、追加したタイトルの番号の始まりを返す"""
+        offset = self.num_titles
+        self.titles.append(np.asarray(titles, dtype=np.str_))
+        self.num_titles += len(titles)
+        return offset
+    
+    def _concatenated_rows(self, metric):
+        """指標の行の列を連結する"""
+        rows = self.rows[metric]
+        return (np.concatenate(rows['title'] or [np.empty(0, dtype=np.int32)]),
+                np.concatenate(rows['category'] or [np.empty(0, dtype=np.int16)]),
+                np.concatenate(rows['value'] or [np.empty(0, dtype=np.float64)]))
+    
+    def collect_table(self, facts):
+        offset = self._append_titles(facts.titles)
+        
+        # categories にないカテゴリIDのアノテーションは集計しない（カテゴリの番号を振れないため）
+        category_ids = np.array(sorted(self.category_names), dtype=np.int64)
+        known = np.isin(facts.category_id, category_ids)
+        if not known.all():
+            unknown_ids = np.unique(facts.category_id[~known]).tolist()
+            print(f"Warning: Skipping {np.count_nonzero(~known)} annotations with unknown category ids: {unknown_ids}")
+        valid = (facts.image_idx >= 0) & known
+        
+        # アノテーションごとのサイズ比（セグメンテーション・バウンディングボックス）
+        with_seg = valid & (facts.seg_area >= 0)
+        self._append('size_ratio', facts.title_idx[with_seg] + offset, facts.category_id[with_seg],
+                     facts.seg_area[with_seg] / facts.image_area[with_seg])
+        with_bbox = valid & ~np.isnan(facts.bbox_x)
+        self._append('bbox_ratio', facts.title_idx[with_bbox] + offset, facts.category_id[with_bbox],
+                     facts.bbox_w[with_bbox] * facts.bbox_h[with_bbox] / facts.image_area[with_bbox])
+        
+        # 画像×カテゴリごとの個数（1個以上ある組だけ）
+        category_codes = np.searchsorted(category_ids, facts.category_id[valid])
+        counts = np.bincount(facts.image_idx[valid].astype(np.int64) * len(category_ids) + category_codes,
+                             minlength=facts.num_images * len(category_ids))
+        image_idx, category_codes = np.divmod(np.flatnonzero(counts), len(category_ids))
+        self._append('count_per_image', facts.image_title_idx[image_idx] + offset,
+                     category_ids[category_codes], counts[counts > 0])
+    
+    def merge(self, other):
+        offset = self.num_titles
+        self.titles.extend(other.titles)
+        self.num_titles += other.num_titles
+        self.category_names.update(other.category_names)
+        for metric in METRICS:
+            rows, other_rows = self.rows[metric], other.rows[metric]
+            rows['title'].extend(title_codes + offset for title_codes in other_rows['title'])
+            rows['category'].extend(other_rows['category'])
+            rows['value'].extend(other_rows['value'])
+        return self
+    
+    def save(self, output_dir):
+        # タイトルは名前順、カテゴリはID順に番号を振り直す
+        titles, title_map = np.unique(np.concatenate(self.titles or [np.empty(0, dtype=np.str_)]),
+                                      return_inverse=True)
+        title_map = title_map.ravel()
+        category_ids = np.array(sorted(self.category_names), dtype=np.int64)
+        category_labels = np.array([self.category_names[category_id] for category_id in category_ids.tolist()],
+                                   dtype=np.str_)
+        num_titles, num_categories = len(titles), len(category_ids)
+        
+        tables = {'title': [], 'category': [], 'title_category': []}
+        for metric in METRICS:
+            title_rows, category_rows, values = self._concatenated_rows(metric)
+            title_codes = title_map[title_rows]
+            # 行のカテゴリIDは collect_table で category_names にあるものに絞ってある
+            category_codes = np.searchsorted(category_ids, category_rows)
+            
+            # タイトル別（全カテゴリ）・カテゴリ別（全タイトル）・タイトル×カテゴリ別
+            by_title = grouped_summary(values, title_codes, num_titles)
+            tables['title'].append(summary_rows(by_title, {
+                'metric': np.full(num_titles, metric), 'manga_title': titles}))
+            by_category = grouped_summary(values, category_codes, num_categories)
+            tables['category'].append(summary_rows(by_category, {
+                'metric': np.full(num_categories, metric), 'category_id': category_ids,
+                'category': category_labels}))
+            pair_codes = title_codes.astype(np.int64) * num_categories + category_codes
+            by_pair = grouped_summary(values, pair_codes, num_titles * num_categories)
+            tables['title_category'].append(summary_rows(by_pair, {
+                'metric': np.full(num_titles * num_categories, metric),
+                'manga_title': np.repeat(titles, num_categories),
+                'category_id': np.tile(category_ids, num_titles),
+                'category': np.tile(category_labels, num_titles)}))
+            
+            print(f"{metric}: {len(values)} values, {np.count_nonzero(by_title['count'])} titles, "
+                  f"{np.count_nonzero(by_pair['count'])} title x category groups")
+            
+            # タイトルごとのヒストグラム（カテゴリ別、全タイトル共通のビン）
+            if len(values) > 0:
+                histograms, edges = grouped_histogram(values, pair_codes, num_titles * num_categories,
+                                                      bins=_histogram_bins(metric, values))
+                histograms = histograms.reshape(num_titles, num_categories, -1)
+                shown = histograms.sum(axis=(0, 2)) > 0
+                render_figure(self.render_pool, _render_grouped_small_multiples, metric,
+                              histograms[:, shown], edges, titles, category_labels[shown], output_dir)
+        
+        _save_grouped_csv_reports(tables, output_dir)
+        
+        print(f"\nGrouped statistics saved to {output_dir}")
+
+
+def plot_grouped_stats(annotations_dir: str, output_dir: str = "./", render_pool=None):
+    """
+    サイズ比・1画像あたりの個数をタイトル別・カテゴリ別・タイトル×カテゴリ別に集計する
+    
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ
+        render_pool: グラフを描画する FigureRenderPool（None の場合はこのプロセスで描画）
+    """
+    run_collectors(annotations_dir, [GroupedStatsCollector], output_dir, render_pool)
+
+
+def _histogram_bins(metric, values):
+    """ヒストグラムのビン（個数は値の種類が少なければ整数ごと、それ以外は HIST_BINS 等分）"""
+    if metric == 'count_per_image':
+        low, high = int(values.min()), int(values.max())
+        if high - low < HIST_BINS:
+            return np.arange(low - 0.5, high + 1.5)
+    return HIST_BINS
+
+
+def _save_grouped_csv_reports(tables, output_dir):
+    """グループ別の統計表をCSVファイルに保存"""
+    
+    for level, parts in tables.items():
+        df = pd.concat([pd.DataFrame(part) for part in parts], ignore_index=True)
+        csv_path = os.path.join(output_dir, f"grouped_stats_by_{level}.csv")
+        df.to_csv(csv_path, index=False, encoding='utf-8')
+        print(f"Grouped statistics CSV saved to: {csv_path}")
+
+
+def _render_grouped_small_multiples(metric, histograms, edges, titles, category_labels, output_dir):
+    """
+    カテゴリごとの図を並べ、各図にタイトル×ビンの割合を画像として描く（英語版・日本語版）
+    （FigureRenderPool の別プロセスからも呼ばれる）
+    
+    タイトルごとに Axes を作るとタイトル数に比例して描画・レイアウト調整が重くなるため、
+    1カテゴリ1枚の画像（行: タイトル、列: ビン）にまとめ、109 タイトルでも図の数を一定にする。
+    """
+    
+    # グラフのスタイル設定
+    plt.style.use('seaborn-v0_8')
+    use_japanese_font()
+    num_columns = min(3, len(category_labels))
+    num_rows = -(-len(category_labels) // num_columns)
+    fig, axes = plt.subplots(num_rows, num_columns, squeeze=False,
+                             figsize=(5.5 * num_columns, max(3.0, 0.08 * len(titles) + 1.5) * num_rows))
+    figure = LocalizedFigure(fig)
+    
+    # タイトル・カテゴリごとに値の数で正規化した割合（値のない組は描かない）
+    totals = histograms.sum(axis=2, keepdims=True)
+    fractions = np.ma.masked_where(np.broadcast_to(totals == 0, histograms.shape),
+                                   histograms / np.maximum(totals, 1))
+    title_ticks = np.arange(len(titles))
+    title_fontsize = 7 if len(titles) <= 40 else 4
+    
+    for category_index, ax in enumerate(axes.flat):
+        if category_index >= len(category_labels):
+            ax.set_visible(False)
+            continue
+        image = ax.imshow(fractions[:, category_index], aspect='auto', interpolation='nearest',
+                          cmap='viridis', extent=(edges[0], edges[-1], len(titles) - 0.5, -0.5))
+        fig.colorbar(image, ax=ax)
+        ax.set_title(str(category_labels[category_index]))
+        # タイトル名は左端の列の図だけに付ける（目盛りの数がタイトル数になるため、他の図には付けない）
+        if category_index % num_columns == 0:
+            ax.set_yticks(title_ticks, [str(title) for title in titles])
+            ax.tick_params(axis='y', labelsize=title_fontsize)
+        else:
+            ax.set_yticks([])
+        ax.grid(False)
+        figure.bind('xlabel', ax.set_xlabel(''))
+    
+    figure.bind('suptitle', fig.suptitle('', y=1.01))
+    
+    for language, suffix in (('english', 'en'), ('japanese', 'jp')):
+        metric_label = METRIC_LABELS[language][metric]
+        if language == 'english':
+            labels = {'suptitle': f'{metric_label} by manga title (fraction per title and category)',
+                      'xlabel': metric_label}
+        else:
+            labels = {'suptitle': f'マンガタイトル別の{metric_label}（タイトル・カテゴリごとの割合）',
+                      'xlabel': metric_label}
+        output_path = os.path.join(output_dir, f'grouped_{metric}_by_title_{suffix}.png')
+        figure.save(labels, output_path, dpi=100)
+        print(f"Grouped graph saved to: {output_path}")
+    
+    # 描画済みの図を閉じてメモリを解放する
+    plt.close(figure.fig)
+
+
+if __name__ == "__main__":
+    # テスト実行
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./"
+    plot_grouped_stats(annotations_dir, output_dir)
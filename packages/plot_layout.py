@@ -1,5 +1,7 @@
-from matplotlib import pyplot as plt
-import japanize_matplotlib
+from packages.lazy_import import lazy_import
+plt = lazy_import('matplotlib.pyplot')
+from packages.figure_renderer import show_figure
+from packages.japanese_font import use_japanese_font
 
 def plot_layout(layout_list, title: str, file_name: str):
     frame_num = len(layout_list)
@@ -14,7 +16,8 @@ def plot_layout(layout_list, title: str, file_name: str):
     layouts = list(layout_counts.keys())
     counts = list(layout_counts.values())
     
-    # 図とサブプロットを作成
+    # 図とサブプロットを作成（日本語フォントは描画時に設定）
+    use_japanese_font()
     fig, ax = plt.subplots(figsize=(8, 6))
     
     # 棒グラフを描画
@@ -39,6 +42,6 @@ def plot_layout(layout_list, title: str, file_name: str):
     # レイアウトの調整
     plt.tight_layout()
     
-    # プロットを表示
+    # プロットを保存し、対話実行のときだけ表示する（表示後に図を閉じる）
     plt.savefig(f'{file_name}.png')
-    plt.show()
\ No newline at end of file
+    show_figure(fig)
\ No newline at end of file
@@ -7,198 +7,123 @@ Manga109データセットのアノテーションからオノマトペ（id=6,
 キャラクター（id=4, body）の個数とサイズ比の統計を分析します。
 """
 
-import json
-import glob
 import os
 import numpy as np
-import pandas as pd
-from pycocotools import mask as maskUtils
-from collections import defaultdict, Counter
+from packages.lazy_import import lazy_import
+pd = lazy_import('pandas')
+from packages.metric_collectors import MetricCollector, register_collector, run_collectors
+from packages.streaming_stats import FloatStats, IntegerCounts
+from packages.annotation_fact_table import ColumnParts
 
 
-def plot_onomatopoeia_body_stats(annotations_dir: str, output_dir: str = "./"):
-    """
-    オノマトペとキャラクター（body）の統計情報を分析する
-    
-    Args:
-        annotations_dir: JSONアノテーションファイルがあるディレクトリパス
-        output_dir: 結果の保存先ディレクトリ
-    """
+@register_collector
+class OnomatopoeiaBodyStatsCollector(MetricCollector):
+    """オノマトペ（id=6）とキャラクター（body, id=4）の統計を集計するコレクター"""
     
-    # 統計情報を格納する辞書
-    stats = {
-        'onomatopoeia': {
-            'count_per_image': [],
-            'size_ratios': [],
-            'areas': [],
-            'bbox_areas': [],
-            'bbox_ratios': [],
-            'manga_titles': [],
-            'total_annotations': 0,
-            'images_with_annotations': 0
-        },
-        'body': {
-            'count_per_image': [],
-            'size_ratios': [],
-            'areas': [],
-            'bbox_areas': [],
-            'bbox_ratios': [],
-            'manga_titles': [],
-            'total_annotations': 0,
-            'images_with_annotations': 0
-        }
-    }
-    
-    # 画像情報を格納する辞書
-    image_info = {}
-    
-    # JSONファイルを取得
-    json_files = glob.glob(os.path.join(annotations_dir, "*.json"))
-    
-    print(f"Found {len(json_files)} JSON files")
+    name = "onomatopoeia_body"
     
-    # 最初に全画像情報を収集
-    for json_path in json_files:
-        print(f"Processing: {os.path.basename(json_path)}")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 画像情報を収集
-        for img in data['images']:
-            image_id = img['id']
-            file_name = img['file_name']
-            width = img['width']
-            height = img['height']
-            
-            image_info[image_id] = {
-                'file_name': file_name,
-                'width': width,
-                'height': height,
-                'area': width * height,
-                'onomatopoeia_count': 0,
-                'body_count': 0
+    def __init__(self, dataset):
+        super().__init__(dataset)
+        
+        # 統計情報を格納する辞書
+        self.stats = {
+            'onomatopoeia': {
+                'count_per_image': IntegerCounts(),
+                'size_ratios': FloatStats(),
+                'areas': FloatStats(),
+                'bbox_areas': FloatStats(),
+                'bbox_ratios': FloatStats(),
+                'total_annotations': 0,
+                'images_with_annotations': 0
+            },
+            'body': {
+                'count_per_image': IntegerCounts(),
+                'size_ratios': FloatStats(),
+                'areas': FloatStats(),
+                'bbox_areas': FloatStats(),
+                'bbox_ratios': FloatStats(),
+                'total_annotations': 0,
+                'images_with_annotations': 0
             }
+        }
+        
+        # 画像ごとの列（個数は collect_table で数える）
+        images = dataset.fact_table.image_table()
+        for kind in ('onomatopoeia', 'body'):
+            images[f'{kind}_count'] = np.zeros(len(images['image_id']), dtype=np.int64)
+        self.images = ColumnParts(images)
     
-    # アノテーションを処理
-    for json_path in json_files:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # カテゴリID → クラス名のマッピング
-        category_map = {cat['id']: cat['name'] for cat in data.get("categories", [])}
-        
-        # 各アノテーションを処理
-        for ann in data['annotations']:
-            image_id = ann['image_id']
-            category_id = ann['category_id']
-            class_name = category_map.get(category_id, f"category_{category_id}")
+    def collect_table(self, facts):
+        # オノマトペ (id=6, onomatopoeia) とキャラクター（body） (id=4, body) を同じ手順で処理
+        images = self.images.columns()
+        for kind, category_id in (('onomatopoeia', 6), ('body', 4)):
+            stats = self.stats[kind]
+            rows = facts.category_mask(category_id)
+            stats['total_annotations'] += int(np.count_nonzero(rows))
+            images[f'{kind}_count'] += facts.image_counts(rows)
             
-            if image_id not in image_info:
-                continue
+            # セグメンテーション領域のピクセル数からサイズ比を計算（読み込み時にRLEから計算済み）
+            with_seg = rows & (facts.seg_area >= 0)
+            seg_areas = facts.seg_area[with_seg]
+            stats['size_ratios'].update(seg_areas / facts.image_area[with_seg])
+            stats['areas'].update(seg_areas)
             
-            img_info = image_info[image_id]
-            
-            # オノマトペ (id=6, onomatopoeia) の処理
-            if category_id == 6:
-                stats['onomatopoeia']['total_annotations'] += 1
-                img_info['onomatopoeia_count'] += 1
-                
-                # セグメンテーションマスクからサイズ比を計算
-                if 'segmentation' in ann:
-                    segmentation = ann['segmentation']
-                    try:
-                        mask = maskUtils.decode(segmentation)
-                        if len(mask.shape) == 3:
-                            mask = np.any(mask, axis=2).astype(np.uint8)
-                        
-                        # セグメンテーション領域のピクセル数を計算
-                        seg_area = np.sum(mask)
-                        size_ratio = seg_area / img_info['area']
-                        
-                        stats['onomatopoeia']['size_ratios'].append(size_ratio)
-                        stats['onomatopoeia']['areas'].append(seg_area)
-                    except Exception as e:
-                        print(f"Warning: Failed to decode segmentation for onomatopoeia: {e}")
-                
-                # バウンディングボックスからサイズを計算
-                if 'bbox' in ann:
-                    bbox = ann['bbox']  # [x, y, width, height]
-                    bbox_area = bbox[2] * bbox[3]
-                    bbox_ratio = bbox_area / img_info['area']
-                    
-                    stats['onomatopoeia']['bbox_areas'].append(bbox_area)
-                    stats['onomatopoeia']['bbox_ratios'].append(bbox_ratio)
-                
-                # マンガタイトルを取得
-                file_name = img_info['file_name']
-                manga_title = file_name.split("/")[0] if "/" in file_name else "unknown"
-                stats['onomatopoeia']['manga_titles'].append(manga_title)
-            
-            # キャラクター（body） (id=4, body) の処理
-            elif category_id == 4:
-                stats['body']['total_annotations'] += 1
-                img_info['body_count'] += 1
-                
-                # セグメンテーションマスクからサイズ比を計算
-                if 'segmentation' in ann:
-                    segmentation = ann['segmentation']
-                    try:
-                        mask = maskUtils.decode(segmentation)
-                        if len(mask.shape) == 3:
-                            mask = np.any(mask, axis=2).astype(np.uint8)
-                        
-                        # セグメンテーション領域のピクセル数を計算
-                        seg_area = np.sum(mask)
-                        size_ratio = seg_area / img_info['area']
-                        
-                        stats['body']['size_ratios'].append(size_ratio)
-                        stats['body']['areas'].append(seg_area)
-                    except Exception as e:
-                        print(f"Warning: Failed to decode segmentation for body: {e}")
-                
-                # バウンディングボックスからサイズを計算
-                if 'bbox' in ann:
-                    bbox = ann['bbox']  # [x, y, width, height]
-                    bbox_area = bbox[2] * bbox[3]
-                    bbox_ratio = bbox_area / img_info['area']
-                    
-                    stats['body']['bbox_areas'].append(bbox_area)
-                    stats['body']['bbox_ratios'].append(bbox_ratio)
-                
-                # マンガタイトルを取得
-                file_name = img_info['file_name']
-                manga_title = file_name.split("/")[0] if "/" in file_name else "unknown"
-                stats['body']['manga_titles'].append(manga_title)
-    
-    # 画像ごとの個数統計を集計（該当アノテーションがある画像のみ）
-    for img_info in image_info.values():
-        if img_info['onomatopoeia_count'] > 0:
-            stats['onomatopoeia']['count_per_image'].append(img_info['onomatopoeia_count'])
-            stats['onomatopoeia']['images_with_annotations'] += 1
-        
-        if img_info['body_count'] > 0:
-            stats['body']['count_per_image'].append(img_info['body_count'])
-            stats['body']['images_with_annotations'] += 1
-    
-    # 統計情報を出力
-    print(f"\nOnomatopoeia Statistics:")
-    print(f"Total annotations: {stats['onomatopoeia']['total_annotations']}")
-    print(f"Images with onomatopoeia: {stats['onomatopoeia']['images_with_annotations']}")
-    print(f"Size ratios count: {len(stats['onomatopoeia']['size_ratios'])}")
+            # バウンディングボックスからサイズを計算
+            with_bbox = rows & ~np.isnan(facts.bbox_x)
+            bbox_areas = facts.bbox_w[with_bbox] * facts.bbox_h[with_bbox]
+            stats['bbox_areas'].update(bbox_areas)
+            stats['bbox_ratios'].update(bbox_areas / facts.image_area[with_bbox])
     
-    print(f"\nBody Statistics:")
-    print(f"Total annotations: {stats['body']['total_annotations']}")
-    print(f"Images with body: {stats['body']['images_with_annotations']}")
-    print(f"Size ratios count: {len(stats['body']['size_ratios'])}")
+    def merge(self, other):
+        for kind in ('onomatopoeia', 'body'):
+            stats, other_stats = self.stats[kind], other.stats[kind]
+            for key in ('count_per_image', 'size_ratios', 'areas', 'bbox_areas', 'bbox_ratios'):
+                stats[key].merge(other_stats[key])
+            stats['total_annotations'] += other_stats['total_annotations']
+            stats['images_with_annotations'] += other_stats['images_with_annotations']
+        self.images.extend(other.images)
+        return self
     
-    # 統計レポートを個別に生成（吹き出し分析と同じ形式）
-    _save_separate_reports(stats, output_dir, len(image_info))
-    
-    # CSVファイルも生成
-    _save_csv_reports(image_info, output_dir)
+    def save(self, output_dir):
+        stats = self.stats
+        images = self.images.columns()
+        
+        # 画像ごとの個数統計を集計（該当アノテーションがある画像のみ）
+        for kind in ('onomatopoeia', 'body'):
+            counts = images[f'{kind}_count']
+            stats[kind]['count_per_image'].update(counts[counts > 0])
+            stats[kind]['images_with_annotations'] += int(np.count_nonzero(counts))
+        
+        # 統計情報を出力
+        print(f"\nOnomatopoeia Statistics:")
+        print(f"Total annotations: {stats['onomatopoeia']['total_annotations']}")
+        print(f"Images with onomatopoeia: {stats['onomatopoeia']['images_with_annotations']}")
+        print(f"Size ratios count: {len(stats['onomatopoeia']['size_ratios'])}")
+        
+        print(f"\nBody Statistics:")
+        print(f"Total annotations: {stats['body']['total_annotations']}")
+        print(f"Images with body: {stats['body']['images_with_annotations']}")
+        print(f"Size ratios count: {len(stats['body']['size_ratios'])}")
+        
+        # 統計レポートを個別に生成（吹き出し分析と同じ形式）
+        _save_separate_reports(stats, output_dir, len(images['image_id']))
+        
+        # CSVファイルも生成
+        _save_csv_reports(images, output_dir)
+        
+        print(f"\nStatistics saved to {output_dir}")
+
+
+def plot_onomatopoeia_body_stats(annotations_dir: str, output_dir: str = "./"):
+    """
+    オノマトペとキャラクター（body）の統計情報を分析する
     
-    print(f"\nStatistics saved to {output_dir}")
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ
+    """
+    run_collectors(annotations_dir, [OnomatopoeiaBodyStatsCollector], output_dir)
 
 
 def _save_separate_reports(stats, output_dir, total_images):
@@ -217,46 +142,46 @@ def _save_separate_reports(stats, output_dir, total_images):
         f.write(f"Images without onomatopoeia: {total_images - onomatopoeia['images_with_annotations']}\n\n")
         
         if onomatopoeia['count_per_image']:
-            counts = onomatopoeia['count_per_image']
+            counts = onomatopoeia['count_per_image'].summary()
             f.write("Count per Image Statistics (Images with Onomatopoeia Only):\n")
-            f.write(f"Mean: {np.mean(counts):.6f}\n")
-            f.write(f"Median: {np.median(counts):.6f}\n")
-            f.write(f"Standard deviation: {np.std(counts):.6f}\n")
-            f.write(f"Min: {np.min(counts)}\n")
-            f.write(f"Max: {np.max(counts)}\n")
-            f.write(f"25th percentile: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"Mean: {counts['mean']:.6f}\n")
+            f.write(f"Median: {counts['median']:.6f}\n")
+            f.write(f"Standard deviation: {counts['std']:.6f}\n")
+            f.write(f"Min: {counts['min']}\n")
+            f.write(f"Max: {counts['max']}\n")
+            f.write(f"25th percentile: {counts['p25']:.2f}\n")
+            f.write(f"75th percentile: {counts['p75']:.2f}\n\n")
         
         if onomatopoeia['size_ratios']:
-            ratios = onomatopoeia['size_ratios']
+            ratios = onomatopoeia['size_ratios'].summary()
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(ratios):.6f}\n")
-            f.write(f"Median: {np.median(ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(ratios):.6f}\n")
-            f.write(f"Min: {np.min(ratios):.6f}\n")
-            f.write(f"Max: {np.max(ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {ratios['mean']:.6f}\n")
+            f.write(f"Median: {ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {ratios['std']:.6f}\n")
+            f.write(f"Min: {ratios['min']:.6f}\n")
+            f.write(f"Max: {ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['bbox_ratios']:
-            bbox_ratios = onomatopoeia['bbox_ratios']
+            bbox_ratios = onomatopoeia['bbox_ratios'].summary()
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"Median: {bbox_ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {bbox_ratios['std']:.6f}\n")
+            f.write(f"Min: {bbox_ratios['min']:.6f}\n")
+            f.write(f"Max: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {bbox_ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['areas']:
-            areas = onomatopoeia['areas']
+            areas = onomatopoeia['areas'].summary()
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(areas):.2f}\n")
-            f.write(f"Median: {np.median(areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(areas):.2f}\n")
-            f.write(f"Min: {np.min(areas):.2f}\n")
-            f.write(f"Max: {np.max(areas):.2f}\n")
+            f.write(f"Mean: {areas['mean']:.2f}\n")
+            f.write(f"Median: {areas['median']:.2f}\n")
+            f.write(f"Standard deviation: {areas['std']:.2f}\n")
+            f.write(f"Min: {areas['min']:.2f}\n")
+            f.write(f"Max: {areas['max']:.2f}\n")
     
     print(f"Onomatopoeia statistics saved to: {onomatopoeia_stats_path}")
     
@@ -273,46 +198,46 @@ def _save_separate_reports(stats, output_dir, total_images):
         f.write(f"オノマトペがない画像数: {total_images - onomatopoeia['images_with_annotations']}\n\n")
         
         if onomatopoeia['count_per_image']:
-            counts = onomatopoeia['count_per_image']
+            counts = onomatopoeia['count_per_image'].summary()
             f.write("個数統計（オノマトペがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(counts):.6f}\n")
-            f.write(f"中央値: {np.median(counts):.6f}\n")
-            f.write(f"標準偏差: {np.std(counts):.6f}\n")
-            f.write(f"最小値: {np.min(counts)}\n")
-            f.write(f"最大値: {np.max(counts)}\n")
-            f.write(f"25パーセンタイル: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"平均: {counts['mean']:.6f}\n")
+            f.write(f"中央値: {counts['median']:.6f}\n")
+            f.write(f"標準偏差: {counts['std']:.6f}\n")
+            f.write(f"最小値: {counts['min']}\n")
+            f.write(f"最大値: {counts['max']}\n")
+            f.write(f"25パーセンタイル: {counts['p25']:.2f}\n")
+            f.write(f"75パーセンタイル: {counts['p75']:.2f}\n\n")
         
         if onomatopoeia['size_ratios']:
-            ratios = onomatopoeia['size_ratios']
+            ratios = onomatopoeia['size_ratios'].summary()
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(ratios):.6f}\n")
-            f.write(f"中央値: {np.median(ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(ratios):.6f}\n")
-            f.write(f"最小値: {np.min(ratios):.6f}\n")
-            f.write(f"最大値: {np.max(ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"平均: {ratios['mean']:.6f}\n")
+            f.write(f"中央値: {ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {ratios['std']:.6f}\n")
+            f.write(f"最小値: {ratios['min']:.6f}\n")
+            f.write(f"最大値: {ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['bbox_ratios']:
-            bbox_ratios = onomatopoeia['bbox_ratios']
+            bbox_ratios = onomatopoeia['bbox_ratios'].summary()
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"中央値: {bbox_ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {bbox_ratios['std']:.6f}\n")
+            f.write(f"最小値: {bbox_ratios['min']:.6f}\n")
+            f.write(f"最大値: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {bbox_ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['areas']:
-            areas = onomatopoeia['areas']
+            areas = onomatopoeia['areas'].summary()
             f.write("面積統計（ピクセル）:\n")
-            f.write(f"平均: {np.mean(areas):.2f}\n")
-            f.write(f"中央値: {np.median(areas):.2f}\n")
-            f.write(f"標準偏差: {np.std(areas):.2f}\n")
-            f.write(f"最小値: {np.min(areas):.2f}\n")
-            f.write(f"最大値: {np.max(areas):.2f}\n")
+            f.write(f"平均: {areas['mean']:.2f}\n")
+            f.write(f"中央値: {areas['median']:.2f}\n")
+            f.write(f"標準偏差: {areas['std']:.2f}\n")
+            f.write(f"最小値: {areas['min']:.2f}\n")
+            f.write(f"最大値: {areas['max']:.2f}\n")
     
     print(f"Japanese onomatopoeia statistics saved to: {onomatopoeia_stats_path_jp}")
     
@@ -329,46 +254,46 @@ def _save_separate_reports(stats, output_dir, total_images):
         f.write(f"Images without body: {total_images - body['images_with_annotations']}\n\n")
         
         if body['count_per_image']:
-            counts = body['count_per_image']
+            counts = body['count_per_image'].summary()
             f.write("Count per Image Statistics (Images with Body Only):\n")
-            f.write(f"Mean: {np.mean(counts):.6f}\n")
-            f.write(f"Median: {np.median(counts):.6f}\n")
-            f.write(f"Standard deviation: {np.std(counts):.6f}\n")
-            f.write(f"Min: {np.min(counts)}\n")
-            f.write(f"Max: {np.max(counts)}\n")
-            f.write(f"25th percentile: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"Mean: {counts['mean']:.6f}\n")
+            f.write(f"Median: {counts['median']:.6f}\n")
+            f.write(f"Standard deviation: {counts['std']:.6f}\n")
+            f.write(f"Min: {counts['min']}\n")
+            f.write(f"Max: {counts['max']}\n")
+            f.write(f"25th percentile: {counts['p25']:.2f}\n")
+            f.write(f"75th percentile: {counts['p75']:.2f}\n\n")
         
         if body['size_ratios']:
-            ratios = body['size_ratios']
+            ratios = body['size_ratios'].summary()
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(ratios):.6f}\n")
-            f.write(f"Median: {np.median(ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(ratios):.6f}\n")
-            f.write(f"Min: {np.min(ratios):.6f}\n")
-            f.write(f"Max: {np.max(ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {ratios['mean']:.6f}\n")
+            f.write(f"Median: {ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {ratios['std']:.6f}\n")
+            f.write(f"Min: {ratios['min']:.6f}\n")
+            f.write(f"Max: {ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {ratios['p75']:.6f}\n\n")
         
         if body['bbox_ratios']:
-            bbox_ratios = body['bbox_ratios']
+            bbox_ratios = body['bbox_ratios'].summary()
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"Median: {bbox_ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {bbox_ratios['std']:.6f}\n")
+            f.write(f"Min: {bbox_ratios['min']:.6f}\n")
+            f.write(f"Max: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {bbox_ratios['p75']:.6f}\n\n")
         
         if body['areas']:
-            areas = body['areas']
+            areas = body['areas'].summary()
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(areas):.2f}\n")
-            f.write(f"Median: {np.median(areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(areas):.2f}\n")
-            f.write(f"Min: {np.min(areas):.2f}\n")
-            f.write(f"Max: {np.max(areas):.2f}\n")
+            f.write(f"Mean: {areas['mean']:.2f}\n")
+            f.write(f"Median: {areas['median']:.2f}\n")
+            f.write(f"Standard deviation: {areas['std']:.2f}\n")
+            f.write(f"Min: {areas['min']:.2f}\n")
+            f.write(f"Max: {areas['max']:.2f}\n")
     
     print(f"Body statistics saved to: {body_stats_path}")
     
@@ -385,46 +310,46 @@ def _save_separate_reports(stats, output_dir, total_images):
         f.write(f"キャラクターがない画像数: {total_images - body['images_with_annotations']}\n\n")
         
         if body['count_per_image']:
-            counts = body['count_per_image']
+            counts = body['count_per_image'].summary()
             f.write("個数統計（キャラクターがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(counts):.6f}\n")
-            f.write(f"中央値: {np.median(counts):.6f}\n")
-            f.write(f"標準偏差: {np.std(counts):.6f}\n")
-            f.write(f"最小値: {np.min(counts)}\n")
-            f.write(f"最大値: {np.max(counts)}\n")
-            f.write(f"25パーセンタイル: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"平均: {counts['mean']:.6f}\n")
+            f.write(f"中央値: {counts['median']:.6f}\n")
+            f.write(f"標準偏差: {counts['std']:.6f}\n")
+            f.write(f"最小値: {counts['min']}\n")
+            f.write(f"最大値: {counts['max']}\n")
+            f.write(f"25パーセンタイル: {counts['p25']:.2f}\n")
+            f.write(f"75パーセンタイル: {counts['p75']:.2f}\n\n")
         
         if body['size_ratios']:
-            ratios = body['size_ratios']
+            ratios = body['size_ratios'].summary()
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(ratios):.6f}\n")
-            f.write(f"中央値: {np.median(ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(ratios):.6f}\n")
-            f.write(f"最小値: {np.min(ratios):.6f}\n")
-            f.write(f"最大値: {np.max(ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"平均: {ratios['mean']:.6f}\n")
+            f.write(f"中央値: {ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {ratios['std']:.6f}\n")
+            f.write(f"最小値: {ratios['min']:.6f}\n")
+            f.write(f"最大値: {ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {ratios['p75']:.6f}\n\n")
         
         if body['bbox_ratios']:
-            bbox_ratios = body['bbox_ratios']
+            bbox_ratios = body['bbox_ratios'].summary()
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"中央値: {bbox_ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {bbox_ratios['std']:.6f}\n")
+            f.write(f"最小値: {bbox_ratios['min']:.6f}\n")
+            f.write(f"最大値: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {bbox_ratios['p75']:.6f}\n\n")
         
         if body['areas']:
-            areas = body['areas']
+            areas = body['areas'].summary()
             f.write("面積統計（ピクセル）:\n")
-            f.write(f"平均: {np.mean(areas):.2f}\n")
-            f.write(f"中央値: {np.median(areas):.2f}\n")
-            f.write(f"標準偏差: {np.std(areas):.2f}\n")
-            f.write(f"最小値: {np.min(areas):.2f}\n")
-            f.write(f"最大値: {np.max(areas):.2f}\n")
+            f.write(f"平均: {areas['mean']:.2f}\n")
+            f.write(f"中央値: {areas['median']:.2f}\n")
+            f.write(f"標準偏差: {areas['std']:.2f}\n")
+            f.write(f"最小値: {areas['min']:.2f}\n")
+            f.write(f"最大値: {areas['max']:.2f}\n")
     
     print(f"Japanese body statistics saved to: {body_stats_path_jp}")
 
@@ -452,46 +377,46 @@ def _save_statistics_report(stats, output_dir, total_images):
             f.write(f"Percentage of images with onomatopoeia: {onomatopoeia['images_with_annotations']/total_images*100:.1f}%\n\n")
         
         if onomatopoeia['count_per_image']:
-            counts = onomatopoeia['count_per_image']
+            counts = onomatopoeia['count_per_image'].summary()
             f.write("Count per Image Statistics (Images with Onomatopoeia Only):\n")
-            f.write(f"Mean: {np.mean(counts):.2f}\n")
-            f.write(f"Median: {np.median(counts):.2f}\n")
-            f.write(f"Standard deviation: {np.std(counts):.2f}\n")
-            f.write(f"Min: {np.min(counts)}\n")
-            f.write(f"Max: {np.max(counts)}\n")
-            f.write(f"25th percentile: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"Mean: {counts['mean']:.2f}\n")
+            f.write(f"Median: {counts['median']:.2f}\n")
+            f.write(f"Standard deviation: {counts['std']:.2f}\n")
+            f.write(f"Min: {counts['min']}\n")
+            f.write(f"Max: {counts['max']}\n")
+            f.write(f"25th percentile: {counts['p25']:.2f}\n")
+            f.write(f"75th percentile: {counts['p75']:.2f}\n\n")
         
         if onomatopoeia['size_ratios']:
-            ratios = onomatopoeia['size_ratios']
+            ratios = onomatopoeia['size_ratios'].summary()
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(ratios):.6f}\n")
-            f.write(f"Median: {np.median(ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(ratios):.6f}\n")
-            f.write(f"Min: {np.min(ratios):.6f}\n")
-            f.write(f"Max: {np.max(ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {ratios['mean']:.6f}\n")
+            f.write(f"Median: {ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {ratios['std']:.6f}\n")
+            f.write(f"Min: {ratios['min']:.6f}\n")
+            f.write(f"Max: {ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['bbox_ratios']:
-            bbox_ratios = onomatopoeia['bbox_ratios']
+            bbox_ratios = onomatopoeia['bbox_ratios'].summary()
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"Median: {bbox_ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {bbox_ratios['std']:.6f}\n")
+            f.write(f"Min: {bbox_ratios['min']:.6f}\n")
+            f.write(f"Max: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {bbox_ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['areas']:
-            areas = onomatopoeia['areas']
+            areas = onomatopoeia['areas'].summary()
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(areas):.2f}\n")
-            f.write(f"Median: {np.median(areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(areas):.2f}\n")
-            f.write(f"Min: {np.min(areas):.2f}\n")
-            f.write(f"Max: {np.max(areas):.2f}\n\n")
+            f.write(f"Mean: {areas['mean']:.2f}\n")
+            f.write(f"Median: {areas['median']:.2f}\n")
+            f.write(f"Standard deviation: {areas['std']:.2f}\n")
+            f.write(f"Min: {areas['min']:.2f}\n")
+            f.write(f"Max: {areas['max']:.2f}\n\n")
         
         # キャラクター（body）統計
         f.write("BODY (CHARACTER) STATISTICS\n")
@@ -505,46 +430,46 @@ def _save_statistics_report(stats, output_dir, total_images):
             f.write(f"Percentage of images with body: {body['images_with_annotations']/total_images*100:.1f}%\n\n")
         
         if body['count_per_image']:
-            counts = body['count_per_image']
+            counts = body['count_per_image'].summary()
             f.write("Count per Image Statistics (Images with Body Only):\n")
-            f.write(f"Mean: {np.mean(counts):.2f}\n")
-            f.write(f"Median: {np.median(counts):.2f}\n")
-            f.write(f"Standard deviation: {np.std(counts):.2f}\n")
-            f.write(f"Min: {np.min(counts)}\n")
-            f.write(f"Max: {np.max(counts)}\n")
-            f.write(f"25th percentile: {np.percentile(counts, 25):.2f}\n")
-            f.write(f"75th percentile: {np.percentile(counts, 75):.2f}\n\n")
+            f.write(f"Mean: {counts['mean']:.2f}\n")
+            f.write(f"Median: {counts['median']:.2f}\n")
+            f.write(f"Standard deviation: {counts['std']:.2f}\n")
+            f.write(f"Min: {counts['min']}\n")
+            f.write(f"Max: {counts['max']}\n")
+            f.write(f"25th percentile: {counts['p25']:.2f}\n")
+            f.write(f"75th percentile: {counts['p75']:.2f}\n\n")
         
         if body['size_ratios']:
-            ratios = body['size_ratios']
+            ratios = body['size_ratios'].summary()
             f.write("Size Ratio Statistics (Segmentation-based):\n")
-            f.write(f"Mean: {np.mean(ratios):.6f}\n")
-            f.write(f"Median: {np.median(ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(ratios):.6f}\n")
-            f.write(f"Min: {np.min(ratios):.6f}\n")
-            f.write(f"Max: {np.max(ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {ratios['mean']:.6f}\n")
+            f.write(f"Median: {ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {ratios['std']:.6f}\n")
+            f.write(f"Min: {ratios['min']:.6f}\n")
+            f.write(f"Max: {ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {ratios['p75']:.6f}\n\n")
         
         if body['bbox_ratios']:
-            bbox_ratios = body['bbox_ratios']
+            bbox_ratios = body['bbox_ratios'].summary()
             f.write("Bounding Box Size Ratio Statistics:\n")
-            f.write(f"Mean: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"Median: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"Standard deviation: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"Min: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"Max: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25th percentile: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75th percentile: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"Mean: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"Median: {bbox_ratios['median']:.6f}\n")
+            f.write(f"Standard deviation: {bbox_ratios['std']:.6f}\n")
+            f.write(f"Min: {bbox_ratios['min']:.6f}\n")
+            f.write(f"Max: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25th percentile: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75th percentile: {bbox_ratios['p75']:.6f}\n\n")
         
         if body['areas']:
-            areas = body['areas']
+            areas = body['areas'].summary()
             f.write("Area Statistics (pixels):\n")
-            f.write(f"Mean: {np.mean(areas):.2f}\n")
-            f.write(f"Median: {np.median(areas):.2f}\n")
-            f.write(f"Standard deviation: {np.std(areas):.2f}\n")
-            f.write(f"Min: {np.min(areas):.2f}\n")
-            f.write(f"Max: {np.max(areas):.2f}\n\n")
+            f.write(f"Mean: {areas['mean']:.2f}\n")
+            f.write(f"Median: {areas['median']:.2f}\n")
+            f.write(f"Standard deviation: {areas['std']:.2f}\n")
+            f.write(f"Min: {areas['min']:.2f}\n")
+            f.write(f"Max: {areas['max']:.2f}\n\n")
     
     print(f"English statistics saved to: {report_path_en}")
     
@@ -568,37 +493,37 @@ def _save_statistics_report(stats, output_dir, total_images):
             f.write(f"オノマトペがある画像の割合: {onomatopoeia['images_with_annotations']/total_images*100:.1f}%\n\n")
         
         if onomatopoeia['count_per_image']:
-            counts = onomatopoeia['count_per_image']
+            counts = onomatopoeia['count_per_image'].summary()
             f.write("1画像あたりのオノマトペ個数統計（オノマトペがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(counts):.2f}個\n")
-            f.write(f"中央値: {np.median(counts):.2f}個\n")
-            f.write(f"標準偏差: {np.std(counts):.2f}\n")
-            f.write(f"最小値: {np.min(counts)}個\n")
-            f.write(f"最大値: {np.max(counts)}個\n")
-            f.write(f"25パーセンタイル: {np.percentile(counts, 25):.2f}個\n")
-            f.write(f"75パーセンタイル: {np.percentile(counts, 75):.2f}個\n\n")
+            f.write(f"平均: {counts['mean']:.2f}個\n")
+            f.write(f"中央値: {counts['median']:.2f}個\n")
+            f.write(f"標準偏差: {counts['std']:.2f}\n")
+            f.write(f"最小値: {counts['min']}個\n")
+            f.write(f"最大値: {counts['max']}個\n")
+            f.write(f"25パーセンタイル: {counts['p25']:.2f}個\n")
+            f.write(f"75パーセンタイル: {counts['p75']:.2f}個\n\n")
         
         if onomatopoeia['size_ratios']:
-            ratios = onomatopoeia['size_ratios']
+            ratios = onomatopoeia['size_ratios'].summary()
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(ratios):.6f}\n")
-            f.write(f"中央値: {np.median(ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(ratios):.6f}\n")
-            f.write(f"最小値: {np.min(ratios):.6f}\n")
-            f.write(f"最大値: {np.max(ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"平均: {ratios['mean']:.6f}\n")
+            f.write(f"中央値: {ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {ratios['std']:.6f}\n")
+            f.write(f"最小値: {ratios['min']:.6f}\n")
+            f.write(f"最大値: {ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {ratios['p75']:.6f}\n\n")
         
         if onomatopoeia['bbox_ratios']:
-            bbox_ratios = onomatopoeia['bbox_ratios']
+            bbox_ratios = onomatopoeia['bbox_ratios'].summary()
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"中央値: {bbox_ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {bbox_ratios['std']:.6f}\n")
+            f.write(f"最小値: {bbox_ratios['min']:.6f}\n")
+            f.write(f"最大値: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {bbox_ratios['p75']:.6f}\n\n")
         
         # キャラクター（body）統計
         f.write("キャラクター（body）統計\n")
@@ -612,61 +537,46 @@ def _save_statistics_report(stats, output_dir, total_images):
             f.write(f"キャラクターがある画像の割合: {body['images_with_annotations']/total_images*100:.1f}%\n\n")
         
         if body['count_per_image']:
-            counts = body['count_per_image']
+            counts = body['count_per_image'].summary()
             f.write("1画像あたりのキャラクター個数統計（キャラクターがある画像のみ）:\n")
-            f.write(f"平均: {np.mean(counts):.2f}個\n")
-            f.write(f"中央値: {np.median(counts):.2f}個\n")
-            f.write(f"標準偏差: {np.std(counts):.2f}\n")
-            f.write(f"最小値: {np.min(counts)}個\n")
-            f.write(f"最大値: {np.max(counts)}個\n")
-            f.write(f"25パーセンタイル: {np.percentile(counts, 25):.2f}個\n")
-            f.write(f"75パーセンタイル: {np.percentile(counts, 75):.2f}個\n\n")
+            f.write(f"平均: {counts['mean']:.2f}個\n")
+            f.write(f"中央値: {counts['median']:.2f}個\n")
+            f.write(f"標準偏差: {counts['std']:.2f}\n")
+            f.write(f"最小値: {counts['min']}個\n")
+            f.write(f"最大値: {counts['max']}個\n")
+            f.write(f"25パーセンタイル: {counts['p25']:.2f}個\n")
+            f.write(f"75パーセンタイル: {counts['p75']:.2f}個\n\n")
         
         if body['size_ratios']:
-            ratios = body['size_ratios']
+            ratios = body['size_ratios'].summary()
             f.write("サイズ比率統計（セグメンテーションベース）:\n")
-            f.write(f"平均: {np.mean(ratios):.6f}\n")
-            f.write(f"中央値: {np.median(ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(ratios):.6f}\n")
-            f.write(f"最小値: {np.min(ratios):.6f}\n")
-            f.write(f"最大値: {np.max(ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(ratios, 75):.6f}\n\n")
+            f.write(f"平均: {ratios['mean']:.6f}\n")
+            f.write(f"中央値: {ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {ratios['std']:.6f}\n")
+            f.write(f"最小値: {ratios['min']:.6f}\n")
+            f.write(f"最大値: {ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {ratios['p75']:.6f}\n\n")
         
         if body['bbox_ratios']:
-            bbox_ratios = body['bbox_ratios']
+            bbox_ratios = body['bbox_ratios'].summary()
             f.write("バウンディングボックスサイズ比率統計:\n")
-            f.write(f"平均: {np.mean(bbox_ratios):.6f}\n")
-            f.write(f"中央値: {np.median(bbox_ratios):.6f}\n")
-            f.write(f"標準偏差: {np.std(bbox_ratios):.6f}\n")
-            f.write(f"最小値: {np.min(bbox_ratios):.6f}\n")
-            f.write(f"最大値: {np.max(bbox_ratios):.6f}\n")
-            f.write(f"25パーセンタイル: {np.percentile(bbox_ratios, 25):.6f}\n")
-            f.write(f"75パーセンタイル: {np.percentile(bbox_ratios, 75):.6f}\n\n")
+            f.write(f"平均: {bbox_ratios['mean']:.6f}\n")
+            f.write(f"中央値: {bbox_ratios['median']:.6f}\n")
+            f.write(f"標準偏差: {bbox_ratios['std']:.6f}\n")
+            f.write(f"最小値: {bbox_ratios['min']:.6f}\n")
+            f.write(f"最大値: {bbox_ratios['max']:.6f}\n")
+            f.write(f"25パーセンタイル: {bbox_ratios['p25']:.6f}\n")
+            f.write(f"75パーセンタイル: {bbox_ratios['p75']:.6f}\n\n")
     
     print(f"Japanese statistics saved to: {report_path_jp}")
 
 
-def _save_csv_reports(image_info, output_dir):
+def _save_csv_reports(images, output_dir):
     """画像ごとの詳細データをCSVファイルに保存"""
     
-    # データフレーム用のデータを準備
-    csv_data = []
-    for image_id, info in image_info.items():
-        manga_title = info['file_name'].split("/")[0] if "/" in info['file_name'] else "unknown"
-        csv_data.append({
-            'image_id': image_id,
-            'file_name': info['file_name'],
-            'manga_title': manga_title,
-            'width': info['width'],
-            'height': info['height'],
-            'area': info['area'],
-            'onomatopoeia_count': info['onomatopoeia_count'],
-            'body_count': info['body_count']
-        })
-    
-    # CSVファイルとして保存
-    df = pd.DataFrame(csv_data)
+    # CSVファイルとして保存（画像ごとの列からそのまま作る）
+    df = pd.DataFrame(images)
     csv_path = os.path.join(output_dir, "onomatopoeia_body_per_image.csv")
     df.to_csv(csv_path, index=False, encoding='utf-8')
     
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+オブジェクトの配置の空間分布（ヒートマップ）
+
+吹き出し・body・オノマトペなどがページのどこに現れるかを、ページを固定のグリッド
+（既定 256 行 × 362 列。見開き 1654×1170 の縦横比）に縮小した占有率の地図として集計します。
+各セルの値は「そのセルの面積のうち、そのカテゴリのオブジェクトに覆われている割合」の
+ページ平均（0〜1）です。ページの大きさが違っても、座標はページの幅・高さで正規化します。
+
+    mask: セグメンテーション（RLE）の前景ラン（rle_runs）を、ページをデコードせずにそのまま
+          縮小したグリッドへ積算する。ランは1列分の縦の区間なので、セルの行方向の被覆を
+          1次元の差分配列（両端の重みを隣のセルに按分）で求め、列ごとの累積和で戻す
+    bbox: バウンディングボックスを2次元の差分配列（summed-area table の逆）の4隅に積み、
+          2回の累積和でセルごとの被覆面積にする（セグメンテーションは読まない）
+
+どちらもタイトル（JSON ファイル）ごとに np.bincount 1回で積算し、データセット全体は
+カテゴリ数 × グリッドの小さな float 配列になります。mask はページの1列がグリッドの1列より
+細い（ページの幅がグリッドの列数以上の）ときは隣り合う2つのセルに按分し、それより狭いページでは
+ランを幅1ピクセルの矩形として bbox と同じ2次元の差分配列に積みます。
+
+出力（output_dir/spatial_heatmaps/）:
+    heatmap_<カテゴリ名>.npy        カテゴリごとの占有率のグリッド（float64, (行, 列)）
+    heatmap_meta.json               グリッドの大きさ・方法・カテゴリ・ページ数
+    spatial_heatmaps_en.png / _jp.png   カテゴリごとのヒートマップを並べた図
+    titles/<タイトル>.npy / .png     タイトルごとのヒートマップ（per_title=True のとき、(カテゴリ, 行, 列) float32）
+"""
+
+import json
+import os
+import numpy as np
+from packages.lazy_import import lazy_import
+plt = lazy_import('matplotlib.pyplot')
+from packages.load_manga_seg_dataset import as_manga_seg_dataset
+from packages.rle_runs import column_mask_runs, concatenate_ranges
+from packages.per_image_table import category_column_prefix
+from packages.figure_renderer import render_figure
+from packages.japanese_font import use_japanese_font
+from packages.localized_figure import LocalizedFigure
+from packages.run_profile import profile_stage
+
+# グリッドの大きさ（行, 列）
+GRID_SHAPE = (256, 362)
+
+HEATMAP_METHODS = ('mask', 'bbox')
+
+HEATMAP_DIR_NAME = "spatial_heatmaps"
+
+
+def _interval_deltas(low, high, size: int):
+    """
+    区間 [low, high)（グリッド座標）のセルごとの長さを、差分配列への4つの (位置, 重み) にする
+    （端のセルには区間が覆う割合だけを足し、残りを隣のセルに回す。累積和でセルごとの長さに戻る）
+    """
+    low = np.clip(low, 0, size)
+    high = np.clip(high, 0, size)
+    low_cells = np.floor(low).astype(np.int64)
+    high_cells = np.floor(high).astype(np.int64)
+    low_fractions = low - low_cells
+    high_fractions = high - high_cells
+    positions = np.stack([low_cells, low_cells + 1, high_cells, high_cells + 1])
+    weights = np.stack([1 - low_fractions, low_fractions, high_fractions - 1, -high_fractions])
+    return positions, weights
+
+
+def _accumulate_boxes(slots, y0, y1, x0, x1, num_slots: int, grid_shape) -> np.ndarray:
+    """
+    グリッド座標の矩形を2次元の差分配列に積み、スロット（カテゴリ）ごとのセルの被覆面積を返す
+
+    Returns:
+        (スロット, 行, 列) の float64 配列
+    """
+    rows, cols = grid_shape
+    y_positions, y_weights = _interval_deltas(y0, y1, rows)
+    x_positions, x_weights = _interval_deltas(x0, x1, cols)
+    # 縦4 × 横4 の組（矩形の4隅とその按分）
+    index = ((slots[None, None, :] * (rows + 2) + y_positions[:, None, :]) * (cols + 2) + x_positions[None, :, :])
+    weights = y_weights[:, None, :] * x_weights[None, :, :]
+    deltas = np.bincount(index.ravel(), weights=weights.ravel(), minlength=num_slots * (rows + 2) * (cols + 2))
+    deltas = deltas.reshape(num_slots, rows + 2, cols + 2)
+    return np.cumsum(np.cumsum(deltas, axis=1), axis=2)[:, :rows, :cols]
+
+
+def _accumulate_runs(slots, columns_x, y0, y1, page_heights, page_widths, num_slots: int, grid_shape) -> np.ndarray:
+    """
+    1列分の縦のラン（ページの列 columns_x の行 [y0, y1)）を縮小したグリッドに積む
+
+    Returns:
+        (スロット, 行, 列) の float64 配列
+    """
+    rows, cols = grid_shape
+    top = y0 * rows / page_heights
+    bottom = y1 * rows / page_heights
+    left = columns_x * cols / page_widths
+    right = (columns_x + 1) * cols / page_widths
+
+    # ページの幅がグリッドの列数より狭いと、ページの1列が3つ以上のセルにまたがることがあるので、
+    # そのページのランは矩形として2次元の差分配列に積む
+    wide = page_widths < cols
+    heatmaps = np.zeros((num_slots, rows, cols), dtype=np.float64)
+    if wide.any():
+        heatmaps += _accumulate_boxes(slots[wide], top[wide], bottom[wide], left[wide], right[wide],
+                                      num_slots, grid_shape)
+        narrow = ~wide
+        slots, top, bottom, left, right = slots[narrow], top[narrow], bottom[narrow], left[narrow], right[narrow]
+    y_positions, y_weights = _interval_deltas(top, bottom, rows)
+
+    # ページの1列はグリッドの1列より細いので、またがる2つのセルに按分する
+    left_cells = np.minimum(np.floor(left).astype(np.int64), cols - 1)
+    left_weights = np.minimum(right, left_cells + 1) - left
+    right_weights = (right - left) - left_weights
+    right_cells = np.minimum(left_cells + 1, cols - 1)
+
+    # 列ごとに行方向の差分配列を持ち、行方向の累積和だけで戻す
+    index = []
+    weights = []
+    for cells, column_weights in ((left_cells, left_weights), (right_cells, right_weights)):
+        index.append((slots * cols + cells)[None, :] * (rows + 2) + y_positions)
+        weights.append(y_weights * column_weights[None, :])
+    deltas = np.bincount(np.concatenate(index, axis=None), weights=np.concatenate(weights, axis=None),
+                         minlength=num_slots * cols * (rows + 2))
+    deltas = deltas.reshape(num_slots, cols, rows + 2)
+    heatmaps += np.cumsum(deltas, axis=2)[:, :, :rows].transpose(0, 2, 1)
+    return heatmaps
+
+
+def _title_mask_heatmaps(columns, slots, num_slots: int, grid_shape) -> np.ndarray:
+    """1ファイル分のセグメンテーションを積んだ (スロット, 行, 列) の被覆面積"""
+    selected = np.flatnonzero((slots >= 0) & (columns['ann_seg_kinds'] > 0))
+    runs = column_mask_runs(columns, selected)
+    page_sizes = columns['rle_sizes'][columns['ann_part_offsets'][selected]]
+    owners = np.repeat(np.arange(len(selected)), runs.run_counts)
+    heights = page_sizes[owners, 0]
+
+    # 列優先の区間は複数の列にまたがることがあるので、1列ずつに分ける
+    first_columns = runs.starts // heights
+    last_columns = (runs.ends - 1) // heights
+    pieces = last_columns - first_columns + 1
+    columns_x = concatenate_ranges(first_columns, pieces)
+    piece_runs = np.repeat(np.arange(len(runs.starts)), pieces)
+    piece_heights = heights[piece_runs]
+    column_starts = columns_x * piece_heights
+    y0 = np.maximum(runs.starts[piece_runs] - column_starts, 0)
+    y1 = np.minimum(runs.ends[piece_runs] - column_starts, piece_heights)
+
+    piece_owners = owners[piece_runs]
+    return _accumulate_runs(slots[selected][piece_owners], columns_x, y0, y1, piece_heights,
+                            page_sizes[piece_owners, 1], num_slots, grid_shape)
+
+
+def _title_bbox_heatmaps(columns, slots, num_slots: int, grid_shape) -> np.ndarray:
+    """1ファイル分のバウンディングボックスを積んだ (スロット, 行, 列) の被覆面積"""
+    image_ids = columns['image_ids']
+    ann_image_ids = columns['ann_image_ids']
+    order = np.argsort(image_ids, kind='stable')
+    positions = np.zeros(len(ann_image_ids), dtype=np.int64)
+    has_image = np.zeros(len(ann_image_ids), dtype=bool)
+    if len(image_ids):
+        positions = np.minimum(np.searchsorted(image_ids[order], ann_image_ids), len(image_ids) - 1)
+        has_image = image_ids[order][positions] == ann_image_ids
+    bboxes = columns['ann_bboxes']
+    selected = np.flatnonzero((slots >= 0) & has_image & ~np.isnan(bboxes).any(axis=1))
+
+    image_rows = order[positions[selected]]
+    widths = columns['image_widths'][image_rows]
+    heights = columns['image_heights'][image_rows]
+    rows, cols = grid_shape
+    x, y, w, h = bboxes[selected].T
+    return _accumulate_boxes(slots[selected], y * rows / heights, (y + h) * rows / heights,
+                             x * cols / widths, (x + w) * cols / widths, num_slots, grid_shape)
+
+
+def iter_title_heatmaps(dataset, category_ids, method: str = 'mask', grid_shape=GRID_SHAPE):
+    """
+    タイトル（JSON ファイル）ごとに、カテゴリごとのセルの被覆面積の合計を求める
+
+    Args:
+        dataset: MangaSegDataset
+        category_ids: 集計するカテゴリID（この順にスロットになる）
+        method: 'mask'（セグメンテーション）または 'bbox'（バウンディングボックス）
+        grid_shape: グリッドの大きさ（行, 列）
+
+    Yields:
+        (タイトル名, (カテゴリ, 行, 列) の被覆面積の合計（セル単位の float64）, ページ数)
+    """
+    if method not in HEATMAP_METHODS:
+        raise ValueError(f"Unknown heatmap method: {method}")
+    category_ids = np.asarray(category_ids, dtype=np.int64)
+    order = np.argsort(category_ids)
+    accumulate = _title_mask_heatmaps if method == 'mask' else _title_bbox_heatmaps
+
+    for json_path, (_, columns) in zip(dataset.json_files, dataset.iter_file_columns(release_rle=True)):
+        # カテゴリID → スロット（集計しないカテゴリは -1）
+        ann_category_ids = columns['ann_category_ids']
+        positions = np.minimum(np.searchsorted(category_ids[order], ann_category_ids), len(category_ids) - 1)
+        slots = np.where(category_ids[order][positions] == ann_category_ids, order[positions], -1)
+        with profile_stage(f"heatmap_{method}"):
+            heatmaps = accumulate(columns, slots, len(category_ids), grid_shape)
+        title = os.path.splitext(os.path.basename(json_path))[0]
+        yield title, heatmaps, len(columns['image_ids'])
+
+
+def plot_spatial_heatmaps(annotations_dir, output_dir: str = "./", method: str = 'mask', grid_shape=GRID_SHAPE,
+                          category_ids=None, per_title: bool = False, render_pool=None):
+    """
+    カテゴリごと（とタイトルごと）のオブジェクトの配置のヒートマップを作る
+    
+    Args:
+        annotations_dir: JSONアノテーションファイルがあるディレクトリパス、
+                         または読み込み済みの MangaSegDataset
+        output_dir: 結果の保存先ディレクトリ（spatial_heatmaps/ を作る）
+        method: 'mask'（セグメンテーション）または 'bbox'（バウンディングボックス）
+        grid_shape: グリッドの大きさ（行, 列）
+        category_ids: 集計するカテゴリID（None の場合はすべてのカテゴリ）
+        per_title: タイトルごとのヒートマップも保存する
+        render_pool: FigureRenderPool（None の場合はこのプロセスで描画）
+    """
+    dataset = as_manga_seg_dataset(annotations_dir)
+    if category_ids is None:
+        category_ids = sorted(dataset.categories)
+    category_ids = list(category_ids)
+    category_names = [category_column_prefix(dataset.categories.get(category_id, str(category_id)))
+                      for category_id in category_ids]
+    heatmap_dir = os.path.join(output_dir, HEATMAP_DIR_NAME)
+    title_dir = os.path.join(heatmap_dir, 'titles')
+    os.makedirs(title_dir if per_title else heatmap_dir, exist_ok=True)
+    
+    totals = np.zeros((len(category_ids),) + tuple(grid_shape), dtype=np.float64)
+    total_pages = 0
+    title_pages = {}
+    for title, heatmaps, num_pages in iter_title_heatmaps(dataset, category_ids, method, grid_shape):
+        totals += heatmaps
+        total_pages += num_pages
+        title_pages[title] = num_pages
+        if per_title and num_pages > 0:
+            occupancy = (heatmaps / num_pages).astype(np.float32)
+            np.save(os.path.join(title_dir, f"{title}.npy"), occupancy)
+            render_figure(render_pool, _render_spatial_heatmaps, occupancy, category_names,
+                          {'english': f'{title}: object occupancy ({num_pages} pages, {method})',
+                           'japanese': f'{title}: オブジェクトの占有率（{num_pages}ページ, {method}）'},
+                          os.path.join(title_dir, title), False)
+    
+    print(f"Total pages: {total_pages}")
+    if total_pages == 0:
+        print("Warning: No pages found!")
+        return
+    
+    occupancy = totals / total_pages
+    for name, grid in zip(category_names, occupancy):
+        np.save(os.path.join(heatmap_dir, f"heatmap_{name}.npy"), grid)
+    meta = {
+        'method': method,
+        'grid_shape': list(grid_shape),
+        'categories': dict(zip(category_names, category_ids)),
+        'pages': total_pages,
+        'title_pages': title_pages,
+    }
+    with open(os.path.join(heatmap_dir, 'heatmap_meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    
+    print(f"Heatmap grids saved to: {heatmap_dir}")
+    for name, grid in zip(category_names, occupancy):
+        print(f"  {name:<16} mean occupancy {grid.mean():.6f}  max {grid.max():.6f}")
+    
+    render_figure(render_pool, _render_spatial_heatmaps, occupancy, category_names,
+                  {'english': f'Object occupancy on the page ({total_pages} pages, {method})',
+                   'japanese': f'ページ上のオブジェクトの占有率（{total_pages}ページ, {method}）'},
+                  os.path.join(heatmap_dir, 'spatial_heatmaps'), True)
+
+
+def _render_spatial_heatmaps(occupancy, category_names, suptitles, output_base, localized):
+    """
+    カテゴリごとのヒートマップを並べて保存する（localized が True の場合は英語版・日本語版）
+    （FigureRenderPool の別プロセスからも呼ばれる）
+    """
+    use_japanese_font()
+    num_columns = min(3, len(category_names))
+    num_rows = -(-len(category_names) // num_columns)
+    rows, cols = occupancy.shape[1:]
+    fig, axes = plt.subplots(num_rows, num_columns, squeeze=False,
+                             figsize=(4.5 * num_columns, 4.5 * rows / cols * num_rows + 1.0))
+    figure = LocalizedFigure(fig)
+    
+    for category_index, ax in enumerate(axes.flat):
+        if category_index >= len(category_names):
+            ax.set_visible(False)
+            continue
+        # 座標はページの幅・高さで正規化（左上が原点）
+        image = ax.imshow(occupancy[category_index], cmap='magma', interpolation='nearest',
+                          extent=(0, 1, 1, 0), aspect=rows / cols)
+        fig.colorbar(image, ax=ax, fraction=0.046, pad=0.05)
+        ax.set_title(category_names[category_index])
+        ax.set_xticks([0, 0.5, 1])
+        ax.set_yticks([0, 0.5, 1])
+        ax.grid(False)
+    
+    figure.bind('suptitle', fig.suptitle(''))
+    
+    if localized:
+        for language, suffix in (('english', 'en'), ('japanese', 'jp')):
+            output_path = f"{output_base}_{suffix}.png"
+            figure.save({'suptitle': suptitles[language]}, output_path, dpi=100)
+            print(f"Heatmap saved to: {output_path}")
+    else:
+        figure.save({'suptitle': suptitles['english']}, f"{output_base}.png", dpi=100)
+    
+    # 描画済みの図を閉じてメモリを解放する
+    plt.close(figure.fig)
+
+
+if __name__ == "__main__":
+    # テスト実行
+    annotations_dir = "./../Manga109_released_2023_12_07/manga_seg_jsons/"
+    output_dir = "./"
+    plot_spatial_heatmaps(annotations_dir, output_dir)
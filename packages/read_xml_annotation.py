@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manga109 XML アノテーションリーダー
+
+annotations/*.xml を iterparse で1回だけ走査し、ページごと・タグごとの
+バウンディングボックスを NumPy 配列として返します。
+処理済みの要素はその場で clear するため、XML 全体の木をメモリに保持しません。
+get_framebbox / get_textbbox / get_facebbox / get_nonframebbox はこの結果のビューです。
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+import numpy as np
+
+# バウンディングボックスを持つタグ
+BBOX_TAGS = ("frame", "text", "face", "body")
+
+
+class PageBoxes:
+    """
+    1ページ・1タグ分のバウンディングボックス
+
+    Attributes:
+        ids: アノテーションID（文字列配列, (n,)）
+        boxes: xmin, ymin, xmax, ymax（int32 配列, (n, 4)）
+        positions: ページ内での出現順（int32 配列, (n,)）。タグをまたいだ並び替えに使う
+    """
+
+    __slots__ = ("ids", "boxes", "positions")
+
+    def __init__(self, ids, boxes, positions):
+        self.ids = ids
+        self.boxes = boxes
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def read_xml_annotation(xml_file: str) -> dict:
+    """
+    XML アノテーションを1回だけ読み込む
+
+    同じファイルを続けて読んだ場合（get_framebbox と get_textbbox を
+    順に呼ぶ場合など）は、ファイルが更新されていなければ前回の結果を返す。
+
+    Args:
+        xml_file: Manga109 の XML アノテーションファイルパス
+
+    Returns:
+        ページ番号 → {タグ名: PageBoxes} の辞書（ページは XML の出現順、
+        BBOX_TAGS のすべてのタグを含む）
+    """
+    stat = os.stat(xml_file)
+    return _read_xml_annotation_cached(os.path.abspath(xml_file), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=2)
+def _read_xml_annotation_cached(xml_path: str, mtime_ns: int, size: int) -> dict:
+    """read_xml_annotation の本体（パス・更新時刻・サイズでキャッシュ）"""
+    # ファイル全体でタグごとに値を集め、最後にまとめて配列化する
+    page_indices = []
+    tag_values = {tag: ([], [], [], []) for tag in BBOX_TAGS}
+
+    for _, elem in ET.iterparse(xml_path):
+        if elem.tag != "page":
+            continue
+
+        page_indices.append(int(elem.get("index")))
+        for position, obj in enumerate(elem):
+            values = tag_values.get(obj.tag)
+            if values is not None:
+                ids, coords, positions, _ = values
+                ids.append(obj.get("id"))
+                coords.append((obj.get("xmin"), obj.get("ymin"), obj.get("xmax"), obj.get("ymax")))
+                positions.append(position)
+        for _, _, positions, page_ends in tag_values.values():
+            page_ends.append(len(positions))
+
+        # 処理済みのページの子要素を解放する
+        elem.clear()
+
+    page_objects = {page_index: {} for page_index in page_indices}
+    for tag, (ids, coords, positions, page_ends) in tag_values.items():
+        ids = np.array(ids, dtype=np.str_)
+        boxes = np.array(coords, dtype=np.int32).reshape(-1, 4)
+        positions = np.array(positions, dtype=np.int32)
+        starts = [0] + page_ends[:-1]
+        for page_index, start, end in zip(page_indices, starts, page_ends):
+            page_objects[page_index][tag] = PageBoxes(
+                ids[start:end], boxes[start:end], positions[start:end]
+            )
+
+    return page_objects
+
+
+def get_page_bboxs(xml_file: str, tags) -> dict:
+    """
+    指定タグのバウンディングボックスを、従来の get_*bbox と同じ形式で返す
+
+    Args:
+        xml_file: Manga109 の XML アノテーションファイルパス
+        tags: 対象のタグ名のリスト（複数の場合はページ内の出現順に並べる）
+
+    Returns:
+        ページ番号 → [{"type", "id", "xmin", "ymin", "xmax", "ymax"}, ...] の辞書
+    """
+    page_objects = {}
+    for page_index, page_tags in read_xml_annotation(xml_file).items():
+        objects = []
+        for tag in tags:
+            page_boxes = page_tags[tag]
+            objects.extend(zip(page_boxes.positions.tolist(), to_bbox_dicts(tag, page_boxes)))
+        if len(tags) > 1:
+            objects.sort(key=lambda item: item[0])
+        page_objects[page_index] = [obj for _, obj in objects]
+    return page_objects
+
+
+def to_bbox_dicts(tag: str, page_boxes: PageBoxes, indices=None) -> list:
+    """
+    PageBoxes を従来の辞書のリストに変換する
+
+    Args:
+        tag: タグ名（"type" に入る）
+        page_boxes: 変換する PageBoxes
+        indices: 変換するボックスの番号（None の場合はすべて）
+
+    Returns:
+        [{"type", "id", "xmin", "ymin", "xmax", "ymax"}, ...]
+    """
+    ids = page_boxes.ids
+    boxes = page_boxes.boxes
+    if indices is not None:
+        ids = ids[indices]
+        boxes = boxes[indices]
+    return [
+        {
+            "type": tag,
+            "id": obj_id,
+            "xmin": xmin,
+            "ymin": ymin,
+            "xmax": xmax,
+            "ymax": ymax,
+        }
+        for obj_id, (xmin, ymin, xmax, ymax) in zip(ids.tolist(), boxes.tolist())
+    ]
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+セグメンテーション（RLE）によるコマの包含判定
+
+get_bboxs_inside_frame はバウンディングボックスの重なりで判定するため、斜めのコマや
+不定形のコマでは隣のコマの吹き出し・キャラクターまで含めてしまいます。
+このモジュールは manga_seg_jsons のセグメンテーションで
+
+    重なり率 = |オブジェクトのマスク ∩ コマのマスク| / |オブジェクトのマスク|
+
+を求め、閾値（既定 0.5、get_bboxs_inside_frame の iou_threshold と同じ意味）以上の組を
+そのコマに含まれるとします。
+
+マスクはビットマップにせず、rle_runs の前景ラン（列優先の区間）のまま重なりを数えます。
+同じ画像のコマ × オブジェクトの組をバウンディングボックスで絞り込み、
+コマに完全に覆われるオブジェクトや矩形のコマは面積だけで決め（_mask_overlap_ratios）、
+コマの境界をまたぐオブジェクトのマスクだけをデコードして intersection_areas に渡します。
+RLE のデコードと重なりの計算は JSON ファイル（タイトル）ごとに NumPy でまとめて行い、
+コマごとの Python ループはありません。
+
+セグメンテーションのないコマ・オブジェクトの組は、バウンディングボックスの重なり率
+（重なり面積 / オブジェクトのボックス面積）で判定します（from_mask が False）。
+"""
+
+import numpy as np
+from packages.seg_json_cache import calc_column_seg_areas
+from packages.rle_runs import MaskRuns, column_mask_runs, intersection_areas, concatenate_ranges
+from packages.run_profile import profile_stage
+
+# コマのカテゴリID
+FRAME_CATEGORY_ID = 1
+
+# オブジェクト面積のうちコマと重なる割合の閾値（get_bboxs_inside_frame と同じ既定値）
+DEFAULT_OVERLAP_THRESHOLD = 0.5
+
+# バウンディングボックスの絞り込みで見込む、マスクとボックスのずれ（ピクセル）
+BBOX_SLACK = 1.0
+
+
+def _empty_assignment() -> dict:
+    return {
+        'frame': np.empty(0, dtype=np.int64),
+        'object': np.empty(0, dtype=np.int64),
+        'overlap_ratio': np.empty(0, dtype=np.float64),
+        'from_mask': np.empty(0, dtype=bool),
+    }
+
+
+def _candidate_pairs(image_ids, frames, objects):
+    """同じ画像のコマ × オブジェクトの組（ファイル内のアノテーション番号）"""
+    order = np.argsort(image_ids[frames], kind='stable')
+    sorted_frames = frames[order]
+    sorted_images = image_ids[sorted_frames]
+    object_images = image_ids[objects]
+    low = np.searchsorted(sorted_images, object_images, side='left')
+    high = np.searchsorted(sorted_images, object_images, side='right')
+    pair_objects = np.repeat(np.arange(len(objects)), high - low)
+    pair_frames = order[concatenate_ranges(low, high - low)]
+    return pair_frames, pair_objects
+
+
+def _bbox_overlap_areas(frame_boxes, object_boxes, slack: float = 0.0) -> np.ndarray:
+    """組ごとのボックス（x, y, w, h）の重なり面積（ボックスを slack ずつ広げる。NaN は 0）"""
+    overlap_w = (np.minimum(frame_boxes[:, 0] + frame_boxes[:, 2], object_boxes[:, 0] + object_boxes[:, 2])
+                 - np.maximum(frame_boxes[:, 0], object_boxes[:, 0]) + 2 * slack)
+    overlap_h = (np.minimum(frame_boxes[:, 1] + frame_boxes[:, 3], object_boxes[:, 1] + object_boxes[:, 3])
+                 - np.maximum(frame_boxes[:, 1], object_boxes[:, 1]) + 2 * slack)
+    areas = np.maximum(overlap_w, 0) * np.maximum(overlap_h, 0)
+    return np.nan_to_num(areas, nan=0.0)
+
+
+def _pixel_boxes(columns: dict, indices, slack: float = 0.0) -> np.ndarray:
+    """
+    アノテーションのボックスを含むピクセルの範囲 xmin, ymin, xmax, ymax（ページ内に切り詰める。NaN は空）
+
+    マスクはボックスの内側にある（ボックスはマスクの外接矩形）とみなす。
+    """
+    part_offsets = columns['ann_part_offsets']
+    page_sizes = columns['rle_sizes'][part_offsets[indices]]
+    boxes = columns['ann_bboxes'][indices]
+    low = np.floor(boxes[:, :2] - slack)
+    high = np.ceil(boxes[:, :2] + boxes[:, 2:] + slack)
+    limits = page_sizes[:, ::-1]
+    pixel_boxes = np.concatenate([np.clip(np.nan_to_num(low, nan=0.0), 0, limits),
+                                  np.clip(np.nan_to_num(high, nan=0.0), 0, limits)], axis=1).astype(np.int64)
+    pixel_boxes[:, 2:] = np.maximum(pixel_boxes[:, 2:], pixel_boxes[:, :2])
+    return pixel_boxes
+
+
+def _box_areas(boxes) -> np.ndarray:
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def _mask_overlap_ratios(columns: dict, pair_frames, pair_objects, slack_overlaps, threshold: float) -> np.ndarray:
+    """
+    コマ × オブジェクトの組（ファイル内のアノテーション番号）ごとの、マスクの重なり率
+
+    ほとんどの組はマスクをデコードせずに決まる:
+      1. ボックスの重なりがマスク面積 × 閾値に届かない組は閾値に届かない
+      2. コマのマスクがボックスと同じ矩形（マスク面積 = ボックスのピクセル数）なら、コマはデコードしない
+      3. オブジェクトのボックスがコマに覆われていれば重なりはオブジェクトのマスク面積、
+         ボックスのうちコマに覆われる面積がマスク面積 × 閾値に届かなければ閾値に届かない
+    残った組（コマの境界をまたぐオブジェクト）だけオブジェクトのマスクをデコードして重なりを数える。
+    """
+    seg_areas = columns.get('ann_seg_areas')
+    if seg_areas is None:
+        seg_areas = calc_column_seg_areas(columns)
+    object_areas = seg_areas[pair_objects]
+    ratios = np.zeros(len(pair_frames), dtype=np.float64)
+
+    # 1. ボックスの重なりによる絞り込み
+    candidate = (object_areas > 0) & (seg_areas[pair_frames] > 0) & (slack_overlaps >= threshold * object_areas)
+    candidate = np.flatnonzero(candidate)
+    if len(candidate) == 0:
+        return ratios
+    pair_frames, pair_objects = pair_frames[candidate], pair_objects[candidate]
+    object_areas = object_areas[candidate]
+
+    # 2. 組に出てくるコマのラン（矩形のコマはボックスから作る）
+    mask_frames, frame_codes = np.unique(pair_frames, return_inverse=True)
+    frame_codes = frame_codes.ravel()
+    frame_boxes = _pixel_boxes(columns, mask_frames)
+    rectangular = seg_areas[mask_frames] == _box_areas(frame_boxes)
+    page_heights = columns['rle_sizes'][columns['ann_part_offsets'][mask_frames], 0]
+    rect_frames = np.flatnonzero(rectangular)
+    shaped_frames = np.flatnonzero(~rectangular)
+    frame_runs = MaskRuns.concatenate(
+        [MaskRuns.from_boxes(frame_boxes[rect_frames], page_heights[rect_frames]),
+         column_mask_runs(columns, mask_frames[shaped_frames])],
+        [rect_frames, shaped_frames], len(mask_frames))
+
+    # 3. オブジェクトのボックスのうちコマに覆われる面積
+    mask_objects, object_codes = np.unique(pair_objects, return_inverse=True)
+    object_codes = object_codes.ravel()
+    object_boxes = _pixel_boxes(columns, mask_objects, BBOX_SLACK)
+    pair_boxes = object_boxes[object_codes]
+    clipped = np.concatenate([np.maximum(pair_boxes[:, :2], frame_boxes[frame_codes, :2]),
+                              np.minimum(pair_boxes[:, 2:], frame_boxes[frame_codes, 2:])], axis=1)
+    covered = np.maximum(clipped[:, 2] - clipped[:, 0], 0) * np.maximum(clipped[:, 3] - clipped[:, 1], 0)
+    shaped_pairs = np.flatnonzero(~rectangular[frame_codes])
+    if len(shaped_pairs):
+        # 矩形でないコマはランで数える
+        object_box_runs = MaskRuns.from_boxes(
+            object_boxes, columns['rle_sizes'][columns['ann_part_offsets'][mask_objects], 0])
+        covered[shaped_pairs] = intersection_areas(object_box_runs, frame_runs, object_codes[shaped_pairs],
+                                                   frame_codes[shaped_pairs])
+    overlaps = np.where(covered == _box_areas(object_boxes)[object_codes], object_areas, 0)
+
+    # 残りの組はオブジェクトのマスクで数える
+    straddling = np.flatnonzero((covered < _box_areas(object_boxes)[object_codes])
+                                & (covered >= threshold * object_areas))
+    if len(straddling):
+        used_objects, used_codes = np.unique(object_codes[straddling], return_inverse=True)
+        object_runs = column_mask_runs(columns, mask_objects[used_objects])
+        overlaps[straddling] = intersection_areas(object_runs, frame_runs, used_codes.ravel(),
+                                                  frame_codes[straddling])
+
+    ratios[candidate] = overlaps / object_areas
+    return ratios
+
+
+def assign_file_objects_to_frames(columns: dict, object_category_ids, threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+                                  frame_category_id: int = FRAME_CATEGORY_ID, use_masks: bool = True) -> dict:
+    """
+    1ファイル分の列で、各オブジェクトを含むコマを判定する
+
+    Args:
+        columns: seg_json_cache の列（MangaSegDataset.iter_file_columns の列）
+        object_category_ids: 判定するオブジェクトのカテゴリID
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        frame_category_id: コマのカテゴリID
+        use_masks: False の場合はすべての組をバウンディングボックスで判定する
+
+    Returns:
+        重なり率が閾値以上の組の列（assign_objects_to_frames と同じ。番号はファイル内のアノテーション番号）
+    """
+    category_ids = columns['ann_category_ids']
+    frames = np.flatnonzero(category_ids == frame_category_id)
+    objects = np.flatnonzero(np.isin(category_ids, list(object_category_ids)))
+    if len(frames) == 0 or len(objects) == 0:
+        return _empty_assignment()
+
+    # 同じ画像の組を作り、ボックスが重ならない組を除く
+    pair_frames, pair_objects = _candidate_pairs(columns['ann_image_ids'], frames, objects)
+    bboxes = columns['ann_bboxes']
+    frame_boxes = bboxes[frames[pair_frames]]
+    object_boxes = bboxes[objects[pair_objects]]
+    bbox_overlaps = _bbox_overlap_areas(frame_boxes, object_boxes)
+    slack_overlaps = _bbox_overlap_areas(frame_boxes, object_boxes, BBOX_SLACK)
+    touching = slack_overlaps > 0
+    pair_frames, pair_objects = pair_frames[touching], pair_objects[touching]
+    bbox_overlaps, slack_overlaps = bbox_overlaps[touching], slack_overlaps[touching]
+
+    # ボックスで判定する組（セグメンテーションのないコマ・オブジェクト、または use_masks=False）
+    object_box_areas = bboxes[objects, 2] * bboxes[objects, 3]
+    ratios = np.zeros(len(pair_frames), dtype=np.float64)
+    np.divide(bbox_overlaps, object_box_areas[pair_objects], out=ratios,
+              where=object_box_areas[pair_objects] > 0)
+    seg_kinds = columns['ann_seg_kinds']
+    from_mask = np.zeros(len(pair_frames), dtype=bool)
+    if use_masks:
+        from_mask = (seg_kinds[frames][pair_frames] > 0) & (seg_kinds[objects][pair_objects] > 0)
+
+    if np.any(from_mask):
+        ratios[from_mask] = _mask_overlap_ratios(columns, frames[pair_frames[from_mask]],
+                                                 objects[pair_objects[from_mask]], slack_overlaps[from_mask],
+                                                 threshold)
+
+    inside = ratios >= threshold
+    return {
+        'frame': frames[pair_frames[inside]],
+        'object': objects[pair_objects[inside]],
+        'overlap_ratio': ratios[inside],
+        'from_mask': from_mask[inside],
+    }
+
+
+def assign_objects_to_frames(dataset, object_category_ids=None, threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+                             frame_category_id: int = FRAME_CATEGORY_ID, use_masks: bool = True) -> dict:
+    """
+    データセットの全オブジェクトについて、それを含むコマをセグメンテーションで判定する
+
+    Args:
+        dataset: MangaSegDataset
+        object_category_ids: 判定するオブジェクトのカテゴリID（None の場合はコマ以外のすべて）
+        threshold: オブジェクト面積のうちコマと重なる割合の閾値
+        frame_category_id: コマのカテゴリID
+        use_masks: False の場合はすべての組をバウンディングボックスで判定する（従来の判定との比較用）
+
+    Returns:
+        重なり率が閾値以上のコマ × オブジェクトの組の列:
+            frame, object   データセットのアノテーション番号（int64）
+            overlap_ratio   重なり率（float64）
+            from_mask       セグメンテーションで判定したかどうか（False はボックスで判定）
+        1つのオブジェクトが複数のコマに含まれることもある（コマが重なっている場合）
+    """
+    if object_category_ids is None:
+        object_category_ids = [category_id for category_id in dataset.categories if category_id != frame_category_id]
+
+    parts = []
+    with profile_stage("frame_containment"):
+        for start, columns in dataset.iter_file_columns(release_rle=True):
+            assignment = assign_file_objects_to_frames(columns, object_category_ids, threshold,
+                                                       frame_category_id, use_masks)
+            assignment['frame'] += start
+            assignment['object'] += start
+            parts.append(assignment)
+
+    if not parts:
+        return _empty_assignment()
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
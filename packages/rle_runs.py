@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RLE の前景ラン（区間）表現
+
+COCO の圧縮 RLE（counts 文字列）をマスク画像にデコードせず、前景のランを
+列優先（Fortran 順）の通し番号の半開区間 [start, end) の配列として取り出します。
+ページ全体（数百万ピクセル）ではなく、ランの数（マスクの列数程度）に比例した配列だけを作ります。
+
+    counts, count_offsets = decode_rle_counts(rle_counts, rle_offsets, parts)
+    runs = MaskRuns.from_counts(counts, count_offsets, owners, num_masks)
+    runs = column_mask_runs(columns, indices)   # seg_json_cache の列から
+
+counts 文字列のデコード（pycocotools の rleFrString と同じ 6 ビット可変長符号と差分）は
+複数の RLE をまとめて NumPy で行います。複数パーツのセグメンテーションは
+パーツのランの和集合（重なりを除いた区間）にまとめます。
+
+2つのマスクの重なり面積は、片方の被覆関数（位置 x より前の前景ピクセル数）を
+もう片方のランの両端で引いて求めます（intersection_areas）。
+"""
+
+import numpy as np
+
+# counts 文字列の1文字のビット（pycocotools の rleFrString と同じ）
+_VALUE_BITS = 0x1f
+_MORE_BIT = 0x20
+_SIGN_BIT = 0x10
+
+
+def concatenate_ranges(starts, lengths) -> np.ndarray:
+    """[starts[i], starts[i] + lengths[i]) を連結した番号の配列"""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    range_starts = np.cumsum(lengths) - lengths
+    return np.arange(total, dtype=np.int64) + np.repeat(starts - range_starts, lengths)
+
+
+def _segmented_cumsum(values, segment_starts, segment_lengths) -> np.ndarray:
+    """区間ごとにリセットする累積和（区間は連続して並んでいること）"""
+    cumulative = np.cumsum(values)
+    offsets = np.repeat(cumulative[segment_starts] - values[segment_starts], segment_lengths)
+    return cumulative - offsets
+
+
+def decode_rle_counts(rle_counts, rle_offsets, parts):
+    """
+    複数の圧縮 RLE の counts 文字列をまとめて整数のランの長さに戻す
+
+    Args:
+        rle_counts: counts 文字列を連結したバイト列（uint8 配列。seg_json_cache の rle_counts）
+        rle_offsets: 各 RLE の rle_counts 内の範囲（(R+1,)）
+        parts: デコードする RLE の番号（(P,)）
+
+    Returns:
+        (ランの長さを連結した int64 配列, 各 RLE のランの範囲 (P+1,))。
+        ランは背景から始まり、背景・前景が交互に並ぶ
+    """
+    parts = np.asarray(parts, dtype=np.int64)
+    rle_offsets = np.asarray(rle_offsets, dtype=np.int64)
+    char_starts = rle_offsets[parts]
+    char_lengths = rle_offsets[parts + 1] - char_starts
+    count_offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    if char_lengths.sum() == 0:
+        return np.empty(0, dtype=np.int64), count_offsets
+
+    rle_counts = np.asarray(rle_counts)
+    if len(parts) and np.all(parts[1:] == parts[:-1] + 1):
+        # 連続した RLE はバイト列をそのまま切り出す
+        chars = rle_counts[char_starts[0]:char_starts[0] + char_lengths.sum()]
+    else:
+        chars = rle_counts[concatenate_ranges(char_starts, char_lengths)]
+    chars = chars.astype(np.int32) - 48
+
+    # 1つの値は MORE ビットが立っていない文字で終わる（5 ビットずつ下位から）。
+    # 差分は小さいため、ほとんどの値は1文字
+    last = chars < _MORE_BIT
+    if last.all():
+        values = (chars & _VALUE_BITS).astype(np.int64)
+        values[(chars & _SIGN_BIT) != 0] -= 1 << 5
+        last_positions = None
+    else:
+        last_positions = np.flatnonzero(last)
+        value_starts = np.concatenate([[0], last_positions[:-1] + 1])
+        value_lengths = last_positions - value_starts + 1
+        shifts = 5 * (np.arange(len(chars)) - np.repeat(value_starts, value_lengths))
+        values = np.add.reduceat((chars & _VALUE_BITS).astype(np.int64) << shifts, value_starts)
+        # 最後の文字の SIGN ビットは負の値（上位ビットをすべて 1 にする）
+        negative = (chars[last_positions] & _SIGN_BIT) != 0
+        values[negative] -= np.left_shift(1, 5 * value_lengths[negative])
+
+    # RLE ごとの値の数（各 RLE の最後の文字までに終わった値の数）
+    char_ends = np.cumsum(char_lengths)
+    if last_positions is None:
+        count_offsets[1:] = char_ends
+    else:
+        count_offsets[1:] = np.searchsorted(last_positions, char_ends - 1, side='right')
+
+    # 3番目以降（RLE 内の番号 m >= 3）の値は2つ前の値との差分。RLE 内の偶奇が同じ値は
+    # 通し番号の偶奇も同じなので、通し番号の偶奇ごとの累積和から系列の始まりの手前を引く
+    counts_per_part = np.diff(count_offsets)
+    part_starts = np.repeat(count_offsets[:-1], counts_per_part)
+    m = np.arange(len(values)) - part_starts
+    chained = np.where(m >= 1, values, 0)
+    cumulative = np.empty(len(values), dtype=np.int64)
+    cumulative[0::2] = np.cumsum(chained[0::2])
+    cumulative[1::2] = np.cumsum(chained[1::2])
+    chain_starts = np.minimum(part_starts + 2 - (m & 1), len(values) - 1)
+    decoded = cumulative - (cumulative[chain_starts] - chained[chain_starts])
+    return np.where(m >= 1, decoded, values), count_offsets
+
+
+class MaskRuns:
+    """
+    マスクごとの前景ランの集合
+
+    Attributes:
+        starts, ends: 前景ランの列優先の通し番号 [start, end)（int64, (K,)。マスクごと・位置順に並ぶ）
+        offsets: マスク → ランの範囲（(M+1,)）
+        areas: マスクのピクセル数（int64, (M,)）
+    """
+
+    __slots__ = ("starts", "ends", "offsets")
+
+    def __init__(self, starts, ends, offsets):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def areas(self) -> np.ndarray:
+        lengths = self.ends - self.starts
+        if len(lengths) == 0:
+            return np.zeros(len(self), dtype=np.int64)
+        sums = np.add.reduceat(np.append(lengths, 0), self.offsets[:-1])
+        return np.where(np.diff(self.offsets) > 0, sums, 0)
+
+    @property
+    def run_counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @classmethod
+    def from_counts(cls, counts, count_offsets, owners, num_masks: int):
+        """
+        decode_rle_counts の結果から、マスク（パーツの持ち主）ごとの前景ランを作る
+
+        Args:
+            counts, count_offsets: decode_rle_counts の戻り値
+            owners: 各 RLE パーツが属するマスクの番号（(P,)。同じマスクのパーツは和集合になる）
+            num_masks: マスクの数
+
+        Returns:
+            MaskRuns
+        """
+        owners = np.asarray(owners, dtype=np.int64)
+        counts_per_part = np.diff(count_offsets)
+        # パーツごとのランの位置（背景・前景を合わせた累積）
+        ends = _segmented_cumsum(counts, count_offsets[:-1][counts_per_part > 0],
+                                 counts_per_part[counts_per_part > 0]) if len(counts) else counts
+        m = np.arange(len(counts)) - np.repeat(count_offsets[:-1], counts_per_part)
+        foreground = ((m & 1) == 1) & (counts > 0)
+        run_ends = ends[foreground]
+        run_starts = run_ends - counts[foreground]
+        run_owners = np.repeat(owners, counts_per_part)[foreground]
+        return cls._from_owned_runs(run_starts, run_ends, run_owners, num_masks,
+                                    merge=len(np.unique(owners)) != len(owners))
+
+    @classmethod
+    def from_boxes(cls, boxes, page_heights):
+        """
+        矩形のマスクの前景ラン（列ごとに1本）を作る
+
+        Args:
+            boxes: ピクセル単位の xmin, ymin, xmax, ymax（int, (M, 4)。xmax, ymax は含まない）
+            page_heights: 各矩形のページの高さ（(M,)）
+
+        Returns:
+            MaskRuns
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        page_heights = np.asarray(page_heights, dtype=np.int64)
+        heights = np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+        widths = np.where(heights > 0, np.maximum(boxes[:, 2] - boxes[:, 0], 0), 0)
+        columns = concatenate_ranges(boxes[:, 0], widths)
+        starts = columns * np.repeat(page_heights, widths) + np.repeat(boxes[:, 1], widths)
+        ends = starts + np.repeat(heights, widths)
+        offsets = np.zeros(len(boxes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(widths)
+        return cls(starts, ends, offsets)
+
+    @classmethod
+    def concatenate(cls, runs_list, owners_list, num_masks: int):
+        """
+        複数の MaskRuns を、マスクの番号を付け替えて1つにまとめる
+
+        Args:
+            runs_list: MaskRuns のリスト
+            owners_list: 各 MaskRuns のマスクの、まとめた後の番号（(len(runs),) の配列のリスト。重複しないこと）
+            num_masks: まとめた後のマスクの数
+        """
+        starts = np.concatenate([runs.starts for runs in runs_list])
+        ends = np.concatenate([runs.ends for runs in runs_list])
+        owners = np.concatenate([np.repeat(np.asarray(owners, dtype=np.int64), runs.run_counts)
+                                 for runs, owners in zip(runs_list, owners_list)])
+        return cls._from_owned_runs(starts, ends, owners, num_masks, merge=False)
+
+    @classmethod
+    def _from_owned_runs(cls, starts, ends, owners, num_masks: int, merge: bool):
+        """持ち主ごとに並べ、同じ持ち主の重なる・接するランを1つにまとめる"""
+        stride = int(ends.max()) + 1 if len(ends) else 1
+        order = np.argsort(owners * stride + starts, kind='stable')
+        starts, ends, owners = starts[order], ends[order], owners[order]
+        if merge and len(starts):
+            # 持ち主の番号を上位に置いた通し番号で、それまでの終端の最大より後に始まるランが新しい区間
+            keyed_ends = np.maximum.accumulate(owners * stride + ends)
+            keyed_starts = owners * stride + starts
+            new_run = np.ones(len(starts), dtype=bool)
+            new_run[1:] = keyed_starts[1:] > keyed_ends[:-1]
+            run_index = np.flatnonzero(new_run)
+            group_ends = np.append(run_index[1:], len(starts)) - 1
+            ends = keyed_ends[group_ends] - owners[run_index] * stride
+            starts = starts[run_index]
+            owners = owners[run_index]
+        offsets = np.zeros(num_masks + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(owners, minlength=num_masks))
+        return cls(starts, ends, offsets)
+
+
+def column_mask_runs(columns: dict, indices) -> MaskRuns:
+    """
+    seg_json_cache の列（1ファイル分）から、アノテーションのマスクの前景ランを作る
+
+    Args:
+        columns: seg_json_cache の列（MangaSegDataset.iter_file_columns の列）
+        indices: ファイル内のアノテーション番号の配列（セグメンテーションがないものはランなし）
+
+    Returns:
+        MaskRuns（マスクの番号は indices の順）
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    part_offsets = columns['ann_part_offsets']
+    part_counts = part_offsets[indices + 1] - part_offsets[indices]
+    parts = concatenate_ranges(part_offsets[indices], part_counts)
+    counts, count_offsets = decode_rle_counts(columns['rle_counts'], columns['rle_offsets'], parts)
+    owners = np.repeat(np.arange(len(indices)), part_counts)
+    return MaskRuns.from_counts(counts, count_offsets, owners, len(indices))
+
+
+def intersection_areas(runs_a: MaskRuns, runs_b: MaskRuns, pairs_a, pairs_b,
+                       max_runs_per_chunk: int = 1 << 22) -> np.ndarray:
+    """
+    マスクの組ごとの重なりのピクセル数をデコードせずに求める
+
+    runs_b の被覆関数 C(x)（x より前の前景ピクセル数）を、runs_a の各ランの両端で引いた差の合計が
+    重なり面積になる。runs_b のマスクごとに通し番号をずらして1本の配列にし、
+    全組のランの両端を1回の np.searchsorted で調べる。
+
+    Args:
+        runs_a, runs_b: MaskRuns（同じ組のマスクは同じページの大きさであること）
+        pairs_a, pairs_b: 組ごとのマスクの番号（(N,)）
+        max_runs_per_chunk: 1回に調べる runs_a のランの数の上限（メモリ使用量の上限）
+
+    Returns:
+        組ごとの重なりのピクセル数（int64, (N,)）
+    """
+    pairs_a = np.asarray(pairs_a, dtype=np.int64)
+    pairs_b = np.asarray(pairs_b, dtype=np.int64)
+    areas = np.zeros(len(pairs_a), dtype=np.int64)
+    if len(pairs_a) == 0 or len(runs_b.starts) == 0:
+        return areas
+
+    # runs_b のマスク j のランを j * stride ずらして1本の昇順の配列にする
+    stride = int(max(runs_a.ends.max(initial=0), runs_b.ends.max(initial=0))) + 1
+    b_owner = np.repeat(np.arange(len(runs_b)), runs_b.run_counts)
+    b_starts = runs_b.starts + b_owner * stride
+    b_lengths = runs_b.ends - runs_b.starts
+    b_covered = np.cumsum(b_lengths) - b_lengths
+
+    def coverage(x):
+        j = np.searchsorted(b_starts, x, side='right') - 1
+        valid = j >= 0
+        j = np.maximum(j, 0)
+        covered = b_covered[j] + np.clip(x - b_starts[j], 0, b_lengths[j])
+        return np.where(valid, covered, 0)
+
+    # runs_a のランの数が max_runs_per_chunk 程度になるように組を区切って調べる
+    run_counts = runs_a.run_counts[pairs_a]
+    cumulative = np.cumsum(run_counts)
+    pair_start = 0
+    while pair_start < len(pairs_a):
+        base = cumulative[pair_start] - run_counts[pair_start]
+        pair_end = int(np.searchsorted(cumulative, base + max_runs_per_chunk, side='right'))
+        pair_end = max(pair_end, pair_start + 1)
+        chunk = slice(pair_start, pair_end)
+        lengths = run_counts[chunk]
+        run_index = concatenate_ranges(runs_a.offsets[pairs_a[chunk]], lengths)
+        shift = np.repeat(pairs_b[chunk] * stride, lengths)
+        overlap = coverage(runs_a.ends[run_index] + shift) - coverage(runs_a.starts[run_index] + shift)
+        nonempty = lengths > 0
+        if np.any(nonempty):
+            sums = np.add.reduceat(overlap, (np.cumsum(lengths) - lengths)[nonempty])
+            areas[pair_start:pair_end][nonempty] = sums
+        pair_start = pair_end
+    return areas
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+タイトルごとにメモリマップした RLE ストア
+
+seg_json_cache のキャッシュは、タイトル（JSON ファイル）ごとに圧縮 RLE の counts 文字列を
+連結した1つのバイト列（rle_counts.npy）と、パーツの範囲（rle_offsets）を持っています。
+RLEStore はこのバイト列をタイトルごとに mmap で開き、データセットのアノテーション番号から
+O(1) でその RLE を取り出します。
+
+    counts_views(index)   counts をコピーせずに memoryview で返す
+    segmentation(index)   pycocotools に渡せる RLE の辞書（get_column_segmentation と同じ形式）
+    rle_counts(file)      タイトルのバイト列全体（uint8 配列、コピーなし。rle_runs.decode_rle_counts 用）
+    release(file)         処理し終えたタイトルのページを madvise(MADV_DONTNEED) で手放す
+
+pycocotools の C 拡張は counts に bytes しか受け付けません（memoryview・bytearray・ndarray は
+TypeError）。そのため segmentation は渡すパーツの counts だけをその場で bytes にし、
+タイトル全体をコピーすることはありません。
+
+手放したページはファイルから読み直せるので、次に触れたときに再び読み込まれます。
+マスクを使う分析でタイトルごとに release を呼べば（MangaSegDataset.iter_file_columns(release_rle=True)）、
+RLE の常駐メモリ（RSS）はデータセット全体ではなく処理中のタイトルの分までに抑えられます。
+キャッシュを使わずに読み込んだタイトル（cache_dir=None）の RLE はメモリ上の配列のままで、
+release は何もしません。
+"""
+
+import mmap
+import numpy as np
+from packages.seg_json_cache import SEG_RLE, SEG_RLE_LIST
+
+
+class _TitleRLE:
+    """1タイトル分の RLE のバイト列（キャッシュのファイルを mmap で開く。開くのは初めて使うとき）"""
+
+    __slots__ = ('path', 'offset', 'nbytes', '_array', '_mmap')
+
+    def __init__(self, rle_counts):
+        self.nbytes = int(rle_counts.nbytes)
+        self._mmap = None
+        if isinstance(rle_counts, np.memmap) and rle_counts.filename and self.nbytes > 0:
+            # np.load(mmap_mode='r') の配列からファイルと .npy ヘッダーの後ろの位置だけを受け取る
+            self.path = rle_counts.filename
+            self.offset = int(rle_counts.offset)
+            self._array = None
+        else:
+            self.path = None
+            self.offset = 0
+            self._array = np.asarray(rle_counts, dtype=np.uint8)
+
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._array = np.frombuffer(self._mmap, dtype=np.uint8, count=self.nbytes, offset=self.offset)
+        return self._array
+
+    def release(self):
+        if self._mmap is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            self._mmap.madvise(mmap.MADV_DONTNEED)
+
+    def close(self):
+        if self._mmap is None:
+            return
+        self._array = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 返した配列・memoryview が残っている場合は、それが解放されたときに閉じられる
+            pass
+        self._mmap = None
+
+
+class RLEStore:
+    """
+    データセットの RLE をアノテーション番号で取り出すストア
+
+    Attributes:
+        num_files: タイトル（JSON ファイル）の数
+    """
+
+    def __init__(self, dataset):
+        self._file_columns = dataset._file_columns
+        self._ann_file_index = dataset._ann_file_index
+        self._ann_file_starts = dataset._ann_file_starts
+        self._titles = [_TitleRLE(columns['rle_counts']) for columns in self._file_columns]
+
+    def __len__(self):
+        return len(self._ann_file_index)
+
+    @property
+    def num_files(self) -> int:
+        return len(self._titles)
+
+    def locate(self, index: int):
+        """アノテーション番号 → (タイトルの番号, タイトル内のアノテーション番号)"""
+        file_index = int(self._ann_file_index[index])
+        return file_index, int(index - self._ann_file_starts[file_index])
+
+    def rle_counts(self, file_index: int) -> np.ndarray:
+        """タイトルの counts 文字列を連結したバイト列（uint8、コピーなし）"""
+        return self._titles[file_index].array()
+
+    def _parts(self, index: int):
+        file_index, local_index = self.locate(index)
+        columns = self._file_columns[file_index]
+        part_offsets = columns['ann_part_offsets']
+        return file_index, columns, int(part_offsets[local_index]), int(part_offsets[local_index + 1])
+
+    def counts_views(self, index: int) -> list:
+        """
+        アノテーションの各パーツの counts（コピーなしの memoryview）
+
+        Returns:
+            ([height, width], memoryview) のリスト（セグメンテーションがない場合は空）
+        """
+        file_index, columns, part_start, part_end = self._parts(index)
+        if part_start == part_end:
+            return []
+        buffer = memoryview(self.rle_counts(file_index))
+        offsets = columns['rle_offsets'][part_start:part_end + 1].tolist()
+        sizes = columns['rle_sizes'][part_start:part_end].tolist()
+        return [(size, buffer[start:end]) for size, start, end in zip(sizes, offsets[:-1], offsets[1:])]
+
+    def segmentation(self, index: int):
+        """
+        アノテーションのセグメンテーション（RLE）
+
+        Returns:
+            {'size': [h, w], 'counts': bytes} またはそのリスト。ない場合は None
+        """
+        file_index, local_index = self.locate(index)
+        kind = self._file_columns[file_index]['ann_seg_kinds'][local_index]
+        if kind != SEG_RLE and kind != SEG_RLE_LIST:
+            return None
+        # pycocotools は bytes しか受け付けないため、このパーツだけを bytes にする
+        rles = [{'size': size, 'counts': view.tobytes()} for size, view in self.counts_views(index)]
+        return rles[0] if kind == SEG_RLE else rles
+
+    def release(self, file_index: int = None):
+        """
+        タイトルの RLE のページを手放す（file_index が None の場合はすべてのタイトル）
+        """
+        titles = self._titles if file_index is None else [self._titles[file_index]]
+        for title in titles:
+            title.release()
+
+    def close(self):
+        """開いている mmap を閉じる"""
+        for title in self._titles:
+            title.close()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+実行プロファイル（段階ごとの処理時間・メモリ）
+
+読み込み（ingest）・集計（metrics）・レポート保存（report）・描画（plot）の各段階を
+profile_stage の with 文で囲み、段階ごとの呼び出し回数・経過時間・CPU 時間・RSS
+（と tracemalloc で追跡した Python のメモリ確保のピーク）を記録します。
+段階は入れ子にでき、記録は親の段階名を "/" でつないだパスごとに合計します。
+
+    enable_profiling(trace_memory=False)
+    with profile_stage("ingest"):
+        with profile_stage("parse_json"):
+            ...
+    save_run_profile("./statistics/")   # statistics/run_profile.json
+
+enable_profiling を呼ばない場合、profile_stage は共有の nullcontext を返すだけなので、
+ファイルごとのループの中で使ってもほとんど時間はかかりません。
+tracemalloc はメモリ確保のたびに記録するため処理が数倍遅くなります（trace_memory=True のときだけ使う）。
+
+--workers / --render-workers で別プロセスに渡した読み込み・描画の中の段階は記録されません
+（メインプロセスから見た待ち時間・投入時間だけが記録されます）。
+"""
+
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_FILE_NAME = "run_profile.json"
+
+# プロファイルの JSON の形式を変えたら上げる
+RUN_PROFILE_VERSION = 1
+
+_profiler = None
+
+# 無効時に返す共有の何もしないコンテキスト
+_NULL_STAGE = nullcontext()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss():
+    """現在の RSS（バイト）。取得できない環境では None"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss():
+    """プロセス開始からの最大 RSS（バイト）。取得できない環境では None"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KiB、macOS はバイト
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class _Stage:
+    """profile_stage が返す1回分の計測"""
+
+    __slots__ = ('profiler', 'name', 'record', 'start_wall', 'start_cpu', 'start_traced', 'peak_traced')
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        stack = profiler._stack
+        path = f"{stack[-1].record['stage']}/{self.name}" if stack else self.name
+        self.record = profiler._get_record(path, len(stack))
+        rss = current_rss()
+        if self.record['rss_start_bytes'] is None:
+            self.record['rss_start_bytes'] = rss
+        if profiler.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # 親の段階のピークを引き継いでから、この段階のピークを測り直す
+            if stack:
+                stack[-1].peak_traced = max(stack[-1].peak_traced, peak)
+            tracemalloc.reset_peak()
+            self.start_traced = current
+            self.peak_traced = current
+        stack.append(self)
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        profiler = self.profiler
+        profiler._stack.pop()
+        record = self.record
+        record['calls'] += 1
+        record['wall_seconds'] += wall
+        record['cpu_seconds'] += cpu
+        record['max_wall_seconds'] = max(record['max_wall_seconds'], wall)
+        rss = current_rss()
+        record['rss_end_bytes'] = rss
+        if rss is not None:
+            record['rss_max_bytes'] = max(record['rss_max_bytes'] or 0, rss)
+        if profiler.trace_memory:
+            self.peak_traced = max(self.peak_traced, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_bytes'] = max(record['traced_peak_bytes'] or 0,
+                                              self.peak_traced - self.start_traced)
+            # 親の段階のピークにこの段階のピークを含める
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent.peak_traced = max(parent.peak_traced, self.peak_traced)
+        return False
+
+
+class RunProfiler:
+    """
+    段階ごとの計測を集める
+
+    Attributes:
+        trace_memory: tracemalloc で Python のメモリ確保のピークを記録するかどうか
+        records: 段階のパス → 計測値の辞書（段階に初めて入った順）
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records = {}
+        self._stack = []
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.created = datetime.datetime.now().isoformat(timespec='seconds')
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    def _get_record(self, path: str, depth: int) -> dict:
+        record = self.records.get(path)
+        if record is None:
+            record = {
+                'stage': path,
+                'depth': depth,
+                'calls': 0,
+                'wall_seconds': 0.0,
+                'cpu_seconds': 0.0,
+                'max_wall_seconds': 0.0,
+                'rss_start_bytes': None,
+                'rss_end_bytes': None,
+                'rss_max_bytes': None,
+                'traced_peak_bytes': None,
+            }
+            self.records[path] = record
+        return record
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def to_dict(self) -> dict:
+        """JSON に保存する内容"""
+        return {
+            'version': RUN_PROFILE_VERSION,
+            'created': self.created,
+            'command': sys.argv,
+            'wall_seconds': time.perf_counter() - self.start_wall,
+            'cpu_seconds': time.process_time() - self.start_cpu,
+            'peak_rss_bytes': peak_rss(),
+            'trace_memory': self.trace_memory,
+            'stages': list(self.records.values()),
+        }
+
+    def save(self, output_dir: str, file_name: str = PROFILE_FILE_NAME) -> str:
+        """
+        プロファイルを JSON に保存し、上位の段階の時間を表示する
+
+        Returns:
+            保存したファイルのパス
+        """
+        profile = self.to_dict()
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, file_name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2, ensure_ascii=False)
+
+        print(f"\nRun profile ({profile['wall_seconds']:.2f} s wall, {profile['cpu_seconds']:.2f} s CPU):")
+        for record in profile['stages']:
+            if record['depth'] == 0:
+                print(f"  {record['stage']:<40} {record['wall_seconds']:9.3f} s  ({record['calls']} calls)")
+        print(f"Run profile saved to: {path}")
+        return path
+
+    def close(self):
+        """enable_profiling で開始した tracemalloc を止める"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def enable_profiling(trace_memory: bool = False) -> RunProfiler:
+    """
+    このプロセスで実行プロファイルの記録を始める
+
+    Args:
+        trace_memory: tracemalloc で段階ごとのメモリ確保のピークも記録する（処理は遅くなる）
+
+    Returns:
+        RunProfiler
+    """
+    global _profiler
+    disable_profiling()
+    _profiler = RunProfiler(trace_memory)
+    return _profiler
+
+
+def disable_profiling():
+    """実行プロファイルの記録をやめる"""
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+    _profiler = None
+
+
+def profiling_enabled() -> bool:
+    """実行プロファイルを記録しているかどうか"""
+    return _profiler is not None
+
+
+def profile_stage(name: str):
+    """
+    段階を計測するコンテキストマネージャー（記録していない場合は何もしない）
+
+    Args:
+        name: 段階名（入れ子の場合は親の段階名の下に記録される）
+    """
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(name)
+
+
+def save_run_profile(output_dir: str, file_name: str = PROFILE_FILE_NAME):
+    """
+    記録した実行プロファイルを保存する
+
+    Args:
+        output_dir: 保存先ディレクトリ（statistics/ など、分析結果と同じ場所）
+        file_name: ファイル名
+
+    Returns:
+        保存したファイルのパス（記録していない場合は None）
+    """
+    if _profiler is None:
+        return None
+    return _profiler.save(output_dir, file_name)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+manga_seg_jsons の列指向バイナリキャッシュ
+
+各 JSON ファイルを列ごとの NumPy 配列（.npy）に変換して保存します。
+キャッシュはソースファイルのパス・サイズ・更新時刻（mtime）で管理し、
+いずれかが変わった場合のみ JSON を読み直します。
+2回目以降はメモリマップで読み込むため、JSON のパースは発生しません。
+初回も保存したキャッシュをメモリマップで開き直して返すため、RLE のバイト列（rle_counts）は
+メモリに残りません（rle_store がタイトルごとに mmap で読む）。
+セグメンテーション面積（ann_seg_areas）も JSON を変換するときに1回だけ計算して保存するため、
+キャッシュから読み込む場合は RLE を読まず、pycocotools も import しません。
+
+列構成（アノテーション N 件、RLE パーツ P 件）:
+    image_ids, image_widths, image_heights, image_file_names
+    category_ids, category_names
+    ann_ids, ann_image_ids, ann_category_ids   (N,)
+    ann_bboxes                                 (N, 4)  bbox がない場合は NaN
+    ann_seg_kinds                              (N,)    0: なし, 1: 単一RLE, 2: RLEのリスト
+    ann_part_offsets                           (N+1,)  アノテーション → RLE パーツの範囲
+    ann_seg_areas                              (N,)    セグメンテーションのピクセル数（ない・計算失敗は -1）
+    rle_sizes                                  (P, 2)  各パーツの [height, width]
+    rle_offsets                                (P+1,)  rle_counts 内の各パーツの範囲
+    rle_counts                                 (bytes) 圧縮RLE文字列を連結したもの
+"""
+
+import json
+import os
+import hashlib
+import numpy as np
+from packages.calc_mask_area import calc_segmentation_area
+from packages.run_profile import profile_stage
+
+# キャッシュ形式を変えたら上げる
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = "./cache/manga_seg_jsons/"
+
+SEG_NONE = 0
+SEG_RLE = 1
+SEG_RLE_LIST = 2
+
+COLUMN_NAMES = [
+    'image_ids', 'image_widths', 'image_heights', 'image_file_names',
+    'category_ids', 'category_names',
+    'ann_ids', 'ann_image_ids', 'ann_category_ids', 'ann_bboxes',
+    'ann_seg_kinds', 'ann_part_offsets', 'ann_seg_areas',
+    'rle_sizes', 'rle_offsets', 'rle_counts',
+]
+
+
+def _encode_rle_counts(rle: dict) -> bytes:
+    """RLE の counts を圧縮文字列（bytes）として取得する"""
+    counts = rle['counts']
+    if isinstance(counts, str):
+        return counts.encode('ascii')
+    if isinstance(counts, bytes):
+        return counts
+
+    # 非圧縮RLE（counts がリスト）は pycocotools で圧縮形式に変換
+    from pycocotools import mask as maskUtils
+    height, width = rle['size']
+    return maskUtils.frPyObjects(rle, height, width)['counts']
+
+
+def convert_seg_json_to_columns(data: dict) -> dict:
+    """
+    COCO形式の JSON データを列指向の NumPy 配列に変換する
+
+    Args:
+        data: json.load した manga_seg_jsons の内容
+
+    Returns:
+        列名 → NumPy 配列 の辞書
+    """
+    images = data['images']
+    categories = data.get("categories", [])
+    annotations = data['annotations']
+
+    ann_bboxes = np.full((len(annotations), 4), np.nan, dtype=np.float64)
+    ann_seg_kinds = np.zeros(len(annotations), dtype=np.int8)
+    ann_part_offsets = np.zeros(len(annotations) + 1, dtype=np.int64)
+    rle_sizes = []
+    rle_chunks = []
+
+    for i, ann in enumerate(annotations):
+        if 'bbox' in ann:
+            ann_bboxes[i] = ann['bbox']
+
+        segmentation = ann.get('segmentation')
+        if isinstance(segmentation, dict):
+            ann_seg_kinds[i] = SEG_RLE
+            parts = [segmentation]
+        elif isinstance(segmentation, list) and segmentation and isinstance(segmentation[0], dict):
+            ann_seg_kinds[i] = SEG_RLE_LIST
+            parts = segmentation
+        else:
+            parts = []
+
+        for rle in parts:
+            rle_sizes.append(rle['size'])
+            rle_chunks.append(_encode_rle_counts(rle))
+        ann_part_offsets[i + 1] = len(rle_chunks)
+
+    rle_offsets = np.zeros(len(rle_chunks) + 1, dtype=np.int64)
+    if rle_chunks:
+        rle_offsets[1:] = np.cumsum([len(chunk) for chunk in rle_chunks])
+
+    return {
+        'image_ids': np.array([img['id'] for img in images], dtype=np.int64),
+        'image_widths': np.array([img['width'] for img in images], dtype=np.int64),
+        'image_heights': np.array([img['height'] for img in images], dtype=np.int64),
+        'image_file_names': np.array([img['file_name'] for img in images], dtype=np.str_),
+        'category_ids': np.array([cat['id'] for cat in categories], dtype=np.int64),
+        'category_names': np.array([cat['name'] for cat in categories], dtype=np.str_),
+        'ann_ids': np.array([ann.get('id', -1) for ann in annotations], dtype=np.int64),
+        'ann_image_ids': np.array([ann['image_id'] for ann in annotations], dtype=np.int64),
+        'ann_category_ids': np.array([ann['category_id'] for ann in annotations], dtype=np.int64),
+        'ann_bboxes': ann_bboxes,
+        'ann_seg_kinds': ann_seg_kinds,
+        'ann_part_offsets': ann_part_offsets,
+        'rle_sizes': np.array(rle_sizes, dtype=np.int64).reshape(-1, 2),
+        'rle_offsets': rle_offsets,
+        'rle_counts': np.frombuffer(b''.join(rle_chunks), dtype=np.uint8),
+    }
+
+
+def get_column_segmentation(columns: dict, index: int):
+    """
+    列からアノテーション1件分のセグメンテーション（RLE）を取り出す
+
+    Args:
+        columns: convert_seg_json_to_columns / load_columns が返す列
+        index: ファイル内のアノテーション番号
+
+    Returns:
+        {'size': [h, w], 'counts': bytes} またはそのリスト。ない場合は None
+    """
+    kind = columns['ann_seg_kinds'][index]
+    if kind != SEG_RLE and kind != SEG_RLE_LIST:
+        return None
+
+    part_start = columns['ann_part_offsets'][index]
+    part_end = columns['ann_part_offsets'][index + 1]
+    rle_offsets = columns['rle_offsets']
+    rles = []
+    for part in range(part_start, part_end):
+        height, width = columns['rle_sizes'][part].tolist()
+        counts = columns['rle_counts'][rle_offsets[part]:rle_offsets[part + 1]].tobytes()
+        rles.append({'size': [height, width], 'counts': counts})
+
+    return rles[0] if kind == SEG_RLE else rles
+
+
+def calc_column_seg_areas(columns: dict, json_path: str = "") -> np.ndarray:
+    """
+    1ファイル分の列から各アノテーションのセグメンテーション面積を計算する
+
+    Returns:
+        ピクセル数の配列（int64）。セグメンテーションがない・計算失敗は -1
+    """
+    seg_areas = np.full(len(columns['ann_ids']), -1, dtype=np.int64)
+    for i in range(len(seg_areas)):
+        segmentation = get_column_segmentation(columns, i)
+        if segmentation is None:
+            continue
+        try:
+            seg_areas[i] = calc_segmentation_area(segmentation)
+        except Exception as e:
+            print(f"Warning: Failed to compute segmentation area "
+                  f"(annotation {columns['ann_ids'][i]} in {os.path.basename(json_path)}): {e}")
+    return seg_areas
+
+
+def _get_source_key(json_path: str) -> dict:
+    """キャッシュの有効性判定に使うソースファイルの情報"""
+    stat = os.stat(json_path)
+    return {
+        'version': CACHE_VERSION,
+        'source_path': os.path.abspath(json_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def get_cache_path(json_path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """JSON ファイルに対応するキャッシュディレクトリのパス"""
+    title = os.path.splitext(os.path.basename(json_path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(json_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{title}-{path_hash}")
+
+
+def save_columns(columns: dict, cache_path: str, source_key: dict):
+    """列を .npy ファイル群として保存する（meta.json は最後に書く）"""
+    os.makedirs(cache_path, exist_ok=True)
+    for name in COLUMN_NAMES:
+        np.save(os.path.join(cache_path, f"{name}.npy"), columns[name])
+
+    meta_path = os.path.join(cache_path, 'meta.json')
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(source_key, f)
+    os.replace(tmp_path, meta_path)
+
+
+def load_columns(cache_path: str, source_key: dict):
+    """
+    キャッシュが有効ならメモリマップで列を読み込む
+
+    Returns:
+        列名 → NumPy 配列 の辞書。キャッシュがない・古い場合は None
+    """
+    meta_path = os.path.join(cache_path, 'meta.json')
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta != source_key:
+        return None
+
+    try:
+        return {
+            name: np.load(os.path.join(cache_path, f"{name}.npy"), mmap_mode='r')
+            for name in COLUMN_NAMES
+        }
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_seg_json(json_path: str) -> dict:
+    """JSON ファイルをパースして列に変換し、セグメンテーション面積を加える"""
+    with profile_stage("parse_json"):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    with profile_stage("convert_columns"):
+        columns = convert_seg_json_to_columns(data)
+    with profile_stage("mask_area"):
+        columns['ann_seg_areas'] = calc_column_seg_areas(columns, json_path)
+    return columns
+
+
+def read_seg_json_columns(json_path: str, cache_dir: str = DEFAULT_CACHE_DIR):
+    """
+    JSON ファイルの列をキャッシュ経由で取得する
+
+    Args:
+        json_path: manga_seg_jsons の JSON ファイルパス
+        cache_dir: キャッシュの保存先。None の場合はキャッシュを使わない
+
+    Returns:
+        (列名 → NumPy 配列 の辞書, キャッシュから読み込んだかどうか)
+    """
+    if cache_dir is None:
+        return _parse_seg_json(json_path), False
+
+    source_key = _get_source_key(json_path)
+    cache_path = get_cache_path(json_path, cache_dir)
+
+    with profile_stage("load_cache"):
+        columns = load_columns(cache_path, source_key)
+    if columns is not None:
+        return columns, True
+
+    columns = _parse_seg_json(json_path)
+
+    try:
+        with profile_stage("save_cache"):
+            save_columns(columns, cache_path, source_key)
+    except OSError as e:
+        print(f"Warning: Failed to write cache for {json_path}: {e}")
+        return columns, False
+
+    # 保存したキャッシュをメモリマップで開き直し、変換した配列（RLE のバイト列を含む）はメモリから捨てる
+    cached = load_columns(cache_path, source_key)
+    return (columns if cached is None else cached), False
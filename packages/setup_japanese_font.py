@@ -1,41 +1,24 @@
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
+from packages.japanese_font import resolve_japanese_font
 
 def setup_japanese_font():
     """
     日本語フォントを設定する関数
-    利用可能な日本語フォントを探して設定
+    利用可能な日本語フォントを探して設定（結果は ./cache/japanese_font.json にキャッシュし、
+    2回目以降はフォント一覧を走査しない）
     """
-    # システムで利用可能なフォント一覧を取得
-    font_list = [f.name for f in fm.fontManager.ttflist]
-    
-    # 日本語フォントのリスト（優先順）
-    japanese_fonts = [
-        'Hiragino Sans',
-        'Hiragino Kaku Gothic Pro', 
-        'Yu Gothic',
-        'Meiryo',
-        'MS Gothic',
-        'Takao PGothic',
-        'IPAexGothic',
-        'IPAPGothic',
-        'VL PGothic',
-        'Noto Sans CJK JP',
-        'DejaVu Sans'
-    ]
-    
-    # 利用可能な日本語フォントを探す
-    available_font = None
-    for font in japanese_fonts:
-        if font in font_list:
-            available_font = font
-            break
+    # キャッシュ済みの日本語フォント（なければ探してキャッシュする）
+    font = resolve_japanese_font()
+    available_font = font['family'] if font is not None else None
     
     if available_font:
+        fm.fontManager.addfont(font['path'])
         plt.rcParams['font.family'] = available_font
         print(f"Using font: {available_font}")
     else:
         # フォールバック：デフォルトフォントを使用
+        font_list = [f.name for f in fm.fontManager.ttflist]
         plt.rcParams['font.family'] = ['DejaVu Sans']
         print("Warning: No Japanese font found. Using default font.")
         print("Available fonts:", [f for f in font_list if any(j in f.lower() for j in ['gothic', 'hiragino', 'yu', 'meiryo', 'noto'])])
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストリーミング統計
+
+値を1つずつ（または配列でまとめて）追加しながら、全値をリストに保持せずに
+統計量を求めるアキュムレーターです。いずれも merge で別プロセスの結果と統合できます。
+
+    RunningStats:   Welford 法による件数・平均・分散・最小・最大
+    IntegerCounts:  整数値（1画像あたりの個数など）の値ごとの件数。
+                    平均・分散・最頻値・パーセンタイルを厳密に求める
+    QuantileSketch: 実数値（サイズ比率など）のパーセンタイル用スケッチ。
+                    exact_capacity 件までは全値を保持して厳密に計算し、
+                    それを超えると相対誤差 relative_accuracy の対数ビンに集約する
+    FloatStats:     RunningStats + QuantileSketch
+
+summary() はレポートで使う統計量（平均・中央値・標準偏差・最小・最大・四分位）を
+1回だけ計算して辞書で返し、値が追加されるまで同じ結果を使い回します。
+"""
+
+import math
+from array import array
+import numpy as np
+
+
+def _lerp(low, high, t):
+    """np.percentile（linear）と同じ補間"""
+    if t >= 0.5:
+        return high - (high - low) * (1 - t)
+    return low + (high - low) * t
+
+
+class RunningStats:
+    """Welford 法による件数・平均・分散・最小・最大"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value):
+        """値を1つ追加する"""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def update(self, values):
+        """配列の値をまとめて追加する"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.square(values - batch.mean).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """別の RunningStats を統合する（Chan らの並列アルゴリズム）"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 0) -> float:
+        if self.count - ddof <= 0:
+            return math.nan
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof: int = 0) -> float:
+        return math.sqrt(self.variance(ddof))
+
+
+class IntegerCounts:
+    """整数値の値ごとの件数（平均・分散・最頻値・パーセンタイルを厳密に求める）"""
+
+    def __init__(self):
+        self.counts = {}
+        self._summary = None
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def add(self, value):
+        """値を1つ追加する"""
+        value = int(value)
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self._summary = None
+
+    def update(self, values):
+        """配列の値をまとめて追加する"""
+        values, counts = np.unique(np.asarray(values, dtype=np.int64), return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._summary = None
+
+    def merge(self, other):
+        """別の IntegerCounts を統合する"""
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._summary = None
+        return self
+
+    def _sorted_counts(self):
+        values = np.array(sorted(self.counts), dtype=np.int64)
+        counts = np.array([self.counts[value] for value in values.tolist()], dtype=np.int64)
+        return values, counts
+
+    def mean(self) -> float:
+        if not self.counts:
+            return math.nan
+        values, counts = self._sorted_counts()
+        return int((values * counts).sum()) / int(counts.sum())
+
+    def variance(self, ddof: int = 0) -> float:
+        # Σc·v, Σc·v² を整数のまま集計し、最後に1回だけ割る（丸め誤差は1回のみ）
+        total = sum(self.counts.values())
+        if total - ddof <= 0:
+            return math.nan
+        value_sum = sum(value * count for value, count in self.counts.items())
+        square_sum = sum(value * value * count for value, count in self.counts.items())
+        return (total * square_sum - value_sum * value_sum) / (total * (total - ddof))
+
+    def std(self, ddof: int = 0) -> float:
+        return math.sqrt(self.variance(ddof))
+
+    def mode(self) -> int:
+        """最頻値（同数の場合は最小の値）"""
+        if not self.counts:
+            return None
+        return min(self.counts, key=lambda value: (-self.counts[value], value))
+
+    def percentile(self, q: float) -> float:
+        """パーセンタイル（np.percentile の linear 補間と同じ値。値がない場合は NaN）"""
+        if not self.counts:
+            return math.nan
+        values, counts = self._sorted_counts()
+        ends = np.cumsum(counts)
+        position = (int(ends[-1]) - 1) * q / 100
+        low = int(math.floor(position))
+        high = min(low + 1, int(ends[-1]) - 1)
+        low_value = int(values[np.searchsorted(ends, low, side='right')])
+        high_value = int(values[np.searchsorted(ends, high, side='right')])
+        return _lerp(low_value, high_value, position - low)
+
+    def summary(self) -> dict:
+        """レポート用の統計量（値が追加されるまで再計算しない）"""
+        if self._summary is None:
+            # 値がない場合、最小・最大は NaN（最頻値は None）
+            values, _ = self._sorted_counts()
+            self._summary = {
+                'count': len(self),
+                'mean': self.mean(),
+                'median': self.percentile(50),
+                'std': self.std(),
+                'min': int(values[0]) if len(values) else math.nan,
+                'max': int(values[-1]) if len(values) else math.nan,
+                'p25': self.percentile(25),
+                'p75': self.percentile(75),
+                'mode': self.mode(),
+            }
+        return self._summary
+
+
+class QuantileSketch:
+    """
+    実数値のパーセンタイル用スケッチ
+
+    exact_capacity 件までは全値を保持して np.percentile と同じ値を返す。
+    超えた時点で、値を相対誤差 relative_accuracy の対数ビン（DDSketch と同じ方式）に
+    集約し、以降のメモリ使用量は値の範囲だけで決まる。
+    """
+
+    def __init__(self, relative_accuracy: float = 1e-3, exact_capacity: int = 1 << 18):
+        self.relative_accuracy = relative_accuracy
+        self.exact_capacity = exact_capacity
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.values = array('d')
+        self.positive_bins = {}
+        self.negative_bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_exact(self) -> bool:
+        return self.values is not None
+
+    def add(self, value):
+        """値を1つ追加する"""
+        self.count += 1
+        if self.values is not None:
+            self.values.append(value)
+            if len(self.values) > self.exact_capacity:
+                self._collapse()
+        else:
+            self._add_to_bins(np.array([value], dtype=np.float64))
+
+    def update(self, values):
+        """配列の値をまとめて追加する"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += len(values)
+        if self.values is not None:
+            self.values.extend(values.tolist())
+            if len(self.values) > self.exact_capacity:
+                self._collapse()
+        else:
+            self._add_to_bins(values)
+
+    def merge(self, other):
+        """別の QuantileSketch（同じ relative_accuracy）を統合する"""
+        if other.values is not None:
+            self.count += other.count
+            if self.values is not None:
+                self.values.extend(other.values)
+                if len(self.values) > self.exact_capacity:
+                    self._collapse()
+            else:
+                self._add_to_bins(np.frombuffer(other.values, dtype=np.float64))
+            return self
+
+        if self.values is not None:
+            self._collapse()
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for bins, other_bins in ((self.positive_bins, other.positive_bins),
+                                 (self.negative_bins, other.negative_bins)):
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+        return self
+
+    def _collapse(self):
+        """保持している値を対数ビンに移す"""
+        values = np.frombuffer(self.values, dtype=np.float64)
+        self.values = None
+        self._add_to_bins(values)
+
+    def _add_to_bins(self, values):
+        self.zero_count += int(np.count_nonzero(values == 0))
+        for bins, selected in ((self.positive_bins, values[values > 0]),
+                               (self.negative_bins, -values[values < 0])):
+            keys, counts = np.unique(np.ceil(np.log(selected) / self.log_gamma).astype(np.int64),
+                                     return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                bins[key] = bins.get(key, 0) + count
+
+    def _bin_value(self, key: int) -> float:
+        """ビンの代表値（ビン内の値に対する相対誤差が relative_accuracy 以下）"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """q（0〜1）分位点（値がない場合は NaN）"""
+        if self.count == 0:
+            return math.nan
+        if self.values is not None:
+            return float(np.percentile(np.frombuffer(self.values, dtype=np.float64), q * 100))
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative_bins, reverse=True):
+            seen += self.negative_bins[key]
+            if seen > rank:
+                return -self._bin_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive_bins):
+            seen += self.positive_bins[key]
+            if seen > rank:
+                return self._bin_value(key)
+        return self._bin_value(max(self.positive_bins))
+
+
+class FloatStats:
+    """実数値の平均・分散（RunningStats）とパーセンタイル（QuantileSketch）"""
+
+    def __init__(self, relative_accuracy: float = 1e-3, exact_capacity: int = 1 << 18):
+        self.moments = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy, exact_capacity)
+        self._summary = None
+
+    def __len__(self):
+        return self.moments.count
+
+    def add(self, value):
+        """値を1つ追加する"""
+        self.moments.add(value)
+        self.sketch.add(value)
+        self._summary = None
+
+    def update(self, values):
+        """配列の値をまとめて追加する"""
+        self.moments.update(values)
+        self.sketch.update(values)
+        self._summary = None
+
+    def merge(self, other):
+        """別の FloatStats を統合する"""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self._summary = None
+        return self
+
+    def summary(self) -> dict:
+        """レポート用の統計量（値が追加されるまで再計算しない）"""
+        if self._summary is None:
+            # 値がない場合、平均・最小・最大は NaN
+            empty = self.moments.count == 0
+            self._summary = {
+                'count': self.moments.count,
+                'mean': math.nan if empty else self.moments.mean,
+                'median': self.sketch.quantile(0.5),
+                'std': self.moments.std(),
+                'min': math.nan if empty else self.moments.min,
+                'max': math.nan if empty else self.moments.max,
+                'p25': self.sketch.quantile(0.25),
+                'p75': self.sketch.quantile(0.75),
+            }
+        return self._summary
+
+
+def summarize(values, integer: bool = False) -> dict:
+    """
+    配列の統計量を1回だけ計算する
+
+    Args:
+        values: 値の配列
+        integer: True の場合は IntegerCounts（最頻値も含む）、False の場合は FloatStats で集計する
+
+    Returns:
+        summary() と同じキーの辞書
+    """
+    stats = IntegerCounts() if integer else FloatStats()
+    stats.update(values)
+    return stats.summary()
@@ -1,6 +1,9 @@
 import matplotlib.pyplot as plt
-import japanize_matplotlib
 import numpy as np
+from packages.figure_renderer import show_figure
+from packages.japanese_font import use_japanese_font
+
+use_japanese_font()
  
 # 二次曲線の作成
 x = np.linspace(-3,3)
@@ -20,4 +23,5 @@ plt.text(0, 4,"テキスト例")
 # 凡例表示
 plt.legend()
  
-plt.show()
\ No newline at end of file
+# 対話実行のときだけ表示する
+show_figure()
\ No newline at end of file
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+classify_face_text_layouts（全コマをまとめて分類）と classify_face_text_layout（1コマずつ）の比較
+
+テキスト2つ・顔1つのコマでは、中心の x 座標が同じ場合も含めて同じ配置になること。
+"""
+
+import itertools
+
+import numpy as np
+
+from packages.classify_face_text_layout import (
+    UNKNOWN_LAYOUT, classify_face_text_layout, classify_face_text_layouts
+)
+
+
+def _bbox(center_x):
+    """中心の x 座標が center_x になるボックス（classify_face_text_layout の形式）"""
+    return {"xmin": center_x - 10, "ymin": 0, "xmax": center_x + 10, "ymax": 20}
+
+
+def _classify_each_frame(frames):
+    """(テキスト1, テキスト2, 顔) の中心の x 座標のリストを1コマずつ分類する"""
+    return [classify_face_text_layout(_bbox(face_x), [_bbox(text1_x), _bbox(text2_x)])
+            for text1_x, text2_x, face_x in frames]
+
+
+def _classify_all_frames(frames):
+    """同じコマをまとめて分類する（組の順番はコマの中でテキスト, テキスト, 顔）"""
+    center_x = np.asarray(frames, dtype=np.float64).ravel()
+    pair_frames = np.repeat(np.arange(len(frames)), 3)
+    is_face = np.tile([False, False, True], len(frames))
+    frame_ids, layouts = classify_face_text_layouts(pair_frames, center_x, is_face)
+    assert frame_ids.tolist() == list(range(len(frames)))
+    return layouts.tolist()
+
+
+def test_two_texts_one_face_ties_match_per_frame():
+    # 中心の x 座標が 100, 200, 300 のすべての組み合わせ（同じ値の組を含む）
+    frames = list(itertools.product((100, 200, 300), repeat=3))
+    assert _classify_all_frames(frames) == _classify_each_frame(frames)
+
+
+def test_two_texts_one_face_tie_examples():
+    frames = [(200, 200, 200), (200, 300, 200), (100, 200, 200), (100, 300, 200)]
+    assert _classify_all_frames(frames) == [UNKNOWN_LAYOUT, "ctt", "ttc", "tct"]
+
+
+def test_two_texts_one_face_random_match_per_frame():
+    rng = np.random.default_rng(0)
+    frames = [tuple(frame) for frame in rng.integers(0, 8, size=(500, 3)).tolist()]
+    assert _classify_all_frames(frames) == _classify_each_frame(frames)
+
+
+def test_other_configurations_are_ordered_by_center_x():
+    # テキスト1つ・顔1つ（同じ中心はテキストが先）とテキスト3つ・顔1つ
+    frames, layouts = classify_face_text_layouts(
+        [0, 0, 1, 1, 1, 1], [50, 50, 30, 10, 20, 40], [False, True, True, False, False, False])
+    assert frames.tolist() == [0, 1]
+    assert layouts.tolist() == ["tc", "ttct"]
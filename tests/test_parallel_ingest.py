@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+並列読み込み（--workers）のテスト
+
+ワーカーがキャッシュに書けない場合（読み取り専用のキャッシュディレクトリなど）も、
+このプロセスで JSON を変換し直さずに、逐次読み込みと同じ列になること。
+"""
+
+import glob
+import os
+
+import numpy as np
+
+from packages import load_manga_seg_dataset as loader
+from packages.generate_synthetic_manga109 import generate_synthetic_manga109
+
+
+def _generate_json_files(tmp_path, num_titles: int) -> list:
+    generated = generate_synthetic_manga109(str(tmp_path / "data"), num_titles=num_titles, pages_per_title=2)
+    return sorted(glob.glob(os.path.join(generated['json_dir'], "*.json")))
+
+
+def _unwritable_cache_dir(tmp_path) -> str:
+    """ディレクトリを作れないキャッシュの保存先（同じ名前のファイルがある）"""
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("")
+    return str(cache_dir)
+
+
+def test_worker_returns_columns_when_cache_write_fails(tmp_path, monkeypatch):
+    json_path = _generate_json_files(tmp_path, 1)[0]
+
+    columns, from_cache = loader._read_json_file_cached(json_path, _unwritable_cache_dir(tmp_path))
+    assert columns is not None and not from_cache
+
+    # ワーカーの列があれば、このプロセスではキャッシュも JSON も読まない
+    def fail(*args, **kwargs):
+        raise AssertionError("re-parsed in the parent process")
+    monkeypatch.setattr(loader, 'read_seg_json_columns', fail)
+    opened, _ = loader._open_cached_columns(json_path, str(tmp_path / "cache"), columns, from_cache)
+    assert opened.keys() == columns.keys()
+
+
+def test_parallel_read_matches_serial_without_writable_cache(tmp_path):
+    json_files = _generate_json_files(tmp_path, 3)
+
+    serial = loader.read_json_files(json_files, cache_dir=None)
+    parallel = loader.read_json_files(json_files, _unwritable_cache_dir(tmp_path), workers=2)
+
+    assert [path for path, _ in parallel] == json_files
+    for (_, (expected, _)), (_, (columns, from_cache)) in zip(serial, parallel):
+        assert not from_cache
+        for name, values in expected.items():
+            np.testing.assert_array_equal(columns[name], values)
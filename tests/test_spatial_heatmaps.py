@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+_accumulate_runs（1列分のランをグリッドに積む）と、ピクセルごとにセルとの重なりを求めた結果の比較
+
+グリッドの列数がページの幅より少ない場合（ページの1列が2つのセルにまたがる）と、
+多い場合（ページの1列が3つ以上のセルにまたがる）の両方を確かめる。
+"""
+
+import numpy as np
+import pytest
+
+from packages.plot_spatial_heatmaps import _accumulate_runs
+
+
+def _overlaps(low, high, size: int):
+    """区間 [low, high)（グリッド座標）と各セルの重なりの長さ"""
+    cells = np.arange(size)
+    return np.clip(np.minimum(high, cells + 1) - np.maximum(low, cells), 0, None)
+
+
+def _reference_heatmaps(mask, slot: int, num_slots: int, grid_shape):
+    """マスクの前景ピクセルを1つずつ縮小したグリッドに積む"""
+    rows, cols = grid_shape
+    height, width = mask.shape
+    heatmaps = np.zeros((num_slots, rows, cols), dtype=np.float64)
+    for y, x in zip(*np.nonzero(mask)):
+        heatmaps[slot] += np.outer(_overlaps(y * rows / height, (y + 1) * rows / height, rows),
+                                   _overlaps(x * cols / width, (x + 1) * cols / width, cols))
+    return heatmaps
+
+
+def _column_runs(mask):
+    """マスクの前景を1列分の縦のラン (列, 開始行, 終了行) にする"""
+    columns_x, y0, y1 = [], [], []
+    for x in range(mask.shape[1]):
+        column = np.concatenate([[0], mask[:, x].astype(np.int8), [0]])
+        edges = np.flatnonzero(np.diff(column))
+        columns_x.extend([x] * (len(edges) // 2))
+        y0.extend(edges[0::2])
+        y1.extend(edges[1::2])
+    return np.array(columns_x), np.array(y0), np.array(y1)
+
+
+@pytest.mark.parametrize("grid_shape", [(3, 4), (16, 20), (2, 37)], ids=["coarse", "fine", "wide"])
+def test_accumulate_runs_matches_pixel_overlaps(grid_shape):
+    mask = np.random.default_rng(0).random((9, 11)) < 0.4
+    columns_x, y0, y1 = _column_runs(mask)
+    height, width = mask.shape
+    slots = np.ones(len(columns_x), dtype=np.int64)
+
+    heatmaps = _accumulate_runs(slots, columns_x, y0, y1, np.full(len(columns_x), height),
+                                np.full(len(columns_x), width), 2, grid_shape)
+    np.testing.assert_allclose(heatmaps, _reference_heatmaps(mask, 1, 2, grid_shape), atol=1e-9)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+streaming_stats のアキュムレーターと NumPy（np.percentile / np.var）の比較
+
+値がない・1つだけ・乱数のそれぞれで、1回で追加した場合と分けて merge した場合を確かめる。
+QuantileSketch は対数ビンに集約した（collapse した）場合も確かめる。
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from packages.calc_stats import calc_stats
+from packages.streaming_stats import FloatStats, IntegerCounts, QuantileSketch, summarize
+
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+RELATIVE_ACCURACY = 1e-3
+
+
+def _random_integers():
+    return np.random.default_rng(0).integers(-5, 40, size=1000)
+
+
+def _random_floats():
+    return np.random.default_rng(1).lognormal(-3, 1, size=2000) * np.where(
+        np.random.default_rng(2).random(2000) < 0.1, -1, 1)
+
+
+def _single(accumulator_class, values, **kwargs):
+    """値を1回で追加する"""
+    accumulator = accumulator_class(**kwargs)
+    accumulator.update(values)
+    return accumulator
+
+
+def _merged(accumulator_class, values, parts=7, **kwargs):
+    """値を parts 個に分けて別々に集計し、merge する（値が parts 個より少なければ空の集計も混ざる）"""
+    merged = accumulator_class(**kwargs)
+    for chunk in np.array_split(values, parts):
+        part = accumulator_class(**kwargs)
+        part.update(chunk)
+        merged.merge(part)
+    return merged
+
+
+def _assert_within_relative_accuracy(estimate, values, q):
+    """集約したスケッチの分位点が、その順位の前後の値の範囲（相対誤差込み）にある"""
+    sorted_values = np.sort(values)
+    rank = q * (len(values) - 1)
+    low = sorted_values[int(math.floor(rank))]
+    high = sorted_values[int(math.ceil(rank))]
+    margin = RELATIVE_ACCURACY * max(abs(low), abs(high))
+    assert low - margin <= estimate <= high + margin
+
+
+def test_empty_accumulators_return_nan():
+    counts = IntegerCounts()
+    assert math.isnan(counts.mean())
+    assert math.isnan(counts.percentile(50))
+    assert math.isnan(counts.variance())
+    assert counts.mode() is None
+    assert math.isnan(QuantileSketch().quantile(0.5))
+
+    for summary in (summarize([]), summarize([], integer=True)):
+        assert summary['count'] == 0
+        for key in ('mean', 'median', 'std', 'min', 'max', 'p25', 'p75'):
+            assert math.isnan(summary[key])
+    assert summarize([], integer=True)['mode'] is None
+
+
+def test_empty_merged_and_collapsed_sketch_returns_nan():
+    sketch = QuantileSketch(exact_capacity=4)
+    sketch.merge(QuantileSketch())
+    assert math.isnan(sketch.quantile(0.5))
+    sketch._collapse()
+    assert math.isnan(sketch.quantile(0.5))
+
+
+def test_calc_stats_empty(tmp_path):
+    mode, median, mean, variance, std_dev = calc_stats([], str(tmp_path / "empty"))
+    assert mode is None
+    assert all(math.isnan(value) for value in (median, mean, variance, std_dev))
+
+
+@pytest.mark.parametrize("values", [np.array([7]), _random_integers()], ids=["single", "random"])
+def test_integer_counts_match_numpy(values):
+    for counts in (_single(IntegerCounts, values), _merged(IntegerCounts, values)):
+        assert counts.mean() == pytest.approx(np.mean(values))
+        assert counts.variance() == pytest.approx(np.var(values))
+        if len(values) > 1:
+            assert counts.variance(ddof=1) == pytest.approx(np.var(values, ddof=1))
+        for q in PERCENTILES:
+            assert counts.percentile(q) == pytest.approx(np.percentile(values, q))
+        unique, unique_counts = np.unique(values, return_counts=True)
+        assert counts.mode() == unique[np.argmax(unique_counts)]
+
+
+@pytest.mark.parametrize("values", [np.array([0.25]), _random_floats()], ids=["single", "random"])
+def test_float_stats_match_numpy(values):
+    for stats in (_single(FloatStats, values), _merged(FloatStats, values)):
+        summary = stats.summary()
+        assert summary['mean'] == pytest.approx(np.mean(values))
+        assert stats.moments.variance() == pytest.approx(np.var(values))
+        assert summary['min'] == values.min()
+        assert summary['max'] == values.max()
+        for key, q in (('p25', 25), ('median', 50), ('p75', 75)):
+            assert summary[key] == pytest.approx(np.percentile(values, q))
+
+
+@pytest.mark.parametrize("values", [np.array([0.25]), _random_floats()], ids=["single", "random"])
+def test_collapsed_and_merged_sketch_within_relative_accuracy(values):
+    collapsed = QuantileSketch(RELATIVE_ACCURACY, exact_capacity=0)
+    collapsed.update(values)
+    assert not collapsed.is_exact
+
+    # 保持した値のままのスケッチと集約したスケッチを混ぜて merge する
+    merged = QuantileSketch(RELATIVE_ACCURACY, exact_capacity=len(values) // 2 + 1)
+    for index, chunk in enumerate(np.array_split(values, 5)):
+        part = QuantileSketch(RELATIVE_ACCURACY, exact_capacity=0 if index % 2 else len(values))
+        part.update(chunk)
+        merged.merge(part)
+
+    for sketch in (collapsed, merged):
+        assert len(sketch) == len(values)
+        for q in PERCENTILES:
+            _assert_within_relative_accuracy(sketch.quantile(q / 100), values, q / 100)
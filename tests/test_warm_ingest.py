@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+キャッシュから読み込む場合（2回目以降）の読み込みのテスト
+
+面積はキャッシュに保存されるため、--no-plots の集計だけの実行では pycocotools を import しない。
+import の有無はプロセスごとに決まるので、読み込みは別プロセスで行う。
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import REPO_ROOT
+from packages.generate_synthetic_manga109 import generate_synthetic_manga109
+
+# 読み込み・集計を --no-plots 相当で実行し、結果を JSON で標準出力の最終行に書く
+INGEST_SCRIPT = """
+import json, sys
+from packages.figure_renderer import disable_plots
+from packages.load_manga_seg_dataset import load_manga_seg_dataset
+from packages.metric_collectors import REGISTERED_COLLECTORS, run_collectors
+disable_plots()
+json_dir, cache_dir, output_dir = sys.argv[1:4]
+dataset = load_manga_seg_dataset(json_dir, cache_dir)
+run_collectors(dataset, REGISTERED_COLLECTORS, output_dir)
+print(json.dumps({
+    'pycocotools': sorted(name for name in sys.modules if name.startswith('pycocotools')),
+    'areas': dataset.ann_seg_areas.tolist(),
+}))
+"""
+
+
+def _run_ingest(json_dir, cache_dir, output_dir) -> dict:
+    result = subprocess.run([sys.executable, '-c', INGEST_SCRIPT, json_dir, cache_dir, output_dir],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, MPLBACKEND='Agg'))
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_warm_no_plots_ingest_does_not_import_pycocotools(tmp_path):
+    generated = generate_synthetic_manga109(str(tmp_path / "data"), num_titles=2, pages_per_title=3)
+    cache_dir = str(tmp_path / "cache")
+    output_dir = str(tmp_path / "statistics")
+
+    # 1回目はキャッシュを作る（面積の計算に pycocotools を使う）
+    cold = _run_ingest(generated['json_dir'], cache_dir, output_dir)
+    warm = _run_ingest(generated['json_dir'], cache_dir, output_dir)
+
+    assert cold['pycocotools']
+    assert warm['pycocotools'] == []
+    assert warm['areas'] == cold['areas']
+    assert max(warm['areas']) > 0